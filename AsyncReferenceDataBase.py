@@ -0,0 +1,194 @@
+"""An asyncio facade over the queries of a reference database.
+
+..:: moduleauthor: Wang Bo <wangbomicro@gmail.com>
+"""
+from Exceptions import IllegalStateException
+import asyncio
+import functools
+import threading
+
+
+class AsyncReferenceDataBase(object):
+    """Facade answering the queries of a ReferenceDataBase as coroutines, so
+    an event loop never blocks on them.
+
+    Queries run in an executor, at most maxConcurrentQueries at a time; the
+    others wait their turn. Identical queries asked while one is pending
+    share its result. When every caller of a query is cancelled, the query
+    is cancelled as well, and a running citation traversal stops. Beyond
+    maxPendingQueries distinct pending queries, new ones are refused.
+
+    A cancelled query whose call already runs in the executor keeps its
+    place among the running and pending queries until the call returns,
+    but new callers no longer share it.
+    """
+
+    def __init__(self, dataBase, executor=None, maxConcurrentQueries=4,
+                 maxPendingQueries=1000):
+        """Initialize this new AsyncReferenceDataBase.
+
+        Args:
+            dataBase (ReferenceDataBase): The database to be queried.
+            executor (concurrent.futures.Executor): The executor running the
+                queries; None for the default executor of the event loop.
+            maxConcurrentQueries (int): The maximum number of queries running
+                at the same time.
+            maxPendingQueries (int): The maximum number of distinct queries
+                running or waiting to run.
+        """
+        self._dataBase = dataBase
+        self._executor = executor
+        self._semaphore = asyncio.Semaphore(maxConcurrentQueries)
+        self._maxPendingQueries = maxPendingQueries
+        self._queries = dict()
+        self._draining = set()
+
+    def getPendingQueryCount(self):
+        """Return the number of distinct queries running or waiting to run,
+        including cancelled queries whose call still runs.
+        """
+        return len(self._queries) + len(self._draining)
+
+    async def findByAuthor(self, authorName):
+        """Find all publications authored by an author.
+
+        Args:
+            authorName (str): The author name, e.g. "A. Einstein".
+        Returns:
+            (set) All publications authored by the author.
+        """
+        return set(await self._query(('findByAuthor', authorName),
+                                     self._dataBase.findByAuthor, authorName))
+
+    async def findByTitleWord(self, word):
+        """Find all publications that have a given word in their title.
+
+        Args:
+            word (str): The word to be searched in title.
+        Returns:
+            (set) The publications that have the word in their title.
+        """
+        return set(await self._query(('findByTitleWord', word),
+                                     self._dataBase.findByTitleWord, word))
+
+    async def findDirIndirCites(self, Id, maxDepth=None):
+        """Find all publications that directly or indirectly cite the given
+        publication.
+
+        Args:
+            Id (int): The publication id to be searched.
+            maxDepth (int): The maximum length of the citation chains to be
+                followed. None for no limit.
+        Returns:
+            (set) The publications that directly or indirectly cite it.
+        """
+        return set(await self._query(('findDirIndirCites', Id, maxDepth),
+                                     self._dataBase.findDirIndirCites, Id,
+                                     maxDepth, cancellable=True))
+
+    async def authorCitationIndex(self, authorName):
+        """Calculate the citation index of the given author.
+
+        Args:
+            authorName (str): The author name.
+        Returns:
+            (double) The author citation index.
+        """
+        return await self._query(('authorCitationIndex', authorName),
+                                 self._dataBase.authorCitationIndex,
+                                 authorName)
+
+    async def _query(self, key, function, *args, cancellable=False):
+        query = self._queries.get(key)
+        if query is None:
+            if self.getPendingQueryCount() >= self._maxPendingQueries:
+                raise IllegalStateException("Too many pending queries.")
+            query = _PendingQuery()
+            self._queries[key] = query
+            query.task = asyncio.ensure_future(
+                self._run(key, query, function, args, cancellable))
+        query.waiterCount += 1
+        try:
+            return await asyncio.shield(query.task)
+        except asyncio.CancelledError:
+            if query.waiterCount == 1 and not query.task.done():
+                query.cancelEvent.set()
+                query.task.cancel()
+            raise
+        finally:
+            query.waiterCount -= 1
+
+    async def _run(self, key, query, function, args, cancellable):
+        loop = asyncio.get_running_loop()
+        isAcquired = False
+        try:
+            await self._semaphore.acquire()
+            isAcquired = True
+            if cancellable:
+                call = functools.partial(function, *args,
+                                         cancelEvent=query.cancelEvent)
+            else:
+                call = functools.partial(function, *args)
+            return await loop.run_in_executor(
+                self._executor, functools.partial(self._work, loop, query,
+                                                  call))
+        finally:
+            if self._queries.get(key) is query:
+                del self._queries[key]
+            with query.lock:
+                isDraining = query.state == _PendingQuery.RUNNING
+                query.state = _PendingQuery.DRAINING if isDraining \
+                    else _PendingQuery.FINISHED
+            if isDraining:
+                # The call still runs: it keeps its pending place and its
+                # turn until it returns.
+                self._draining.add(query)
+            elif isAcquired:
+                self._semaphore.release()
+
+    def _work(self, loop, query, call):
+        """Run the given call of the given query in the executor, unless the
+        query was given up before the call started."""
+        with query.lock:
+            if query.state != _PendingQuery.WAITING:
+                return None
+            query.state = _PendingQuery.RUNNING
+        try:
+            return call()
+        finally:
+            with query.lock:
+                isDraining = query.state == _PendingQuery.DRAINING
+                query.state = _PendingQuery.FINISHED
+            if isDraining:
+                try:
+                    loop.call_soon_threadsafe(self._drained, query)
+                except RuntimeError:
+                    # The event loop is already closed.
+                    pass
+
+    def _drained(self, query):
+        self._draining.discard(query)
+        self._semaphore.release()
+
+
+class _PendingQuery(object):
+    """A query with the callers waiting for it, and the state of its call
+    in the executor."""
+
+    __slots__ = ('task', 'waiterCount', 'cancelEvent', 'lock', 'state')
+
+    # The call has not started yet.
+    WAITING = 'waiting'
+    # The call runs and the query is still awaited.
+    RUNNING = 'running'
+    # The call runs, but the query was cancelled.
+    DRAINING = 'draining'
+    # The call returned, or never starts.
+    FINISHED = 'finished'
+
+    def __init__(self):
+        self.task = None
+        self.waiterCount = 0
+        self.cancelEvent = threading.Event()
+        self.lock = threading.Lock()
+        self.state = self.WAITING
@@ -0,0 +1,190 @@
+"""Unit Test for AsyncReferenceDataBase
+
+..:: moduleauthors:: Wang Bo <wangbomicro@gmail.com>
+"""
+from AsyncReferenceDataBase import AsyncReferenceDataBase
+from Exceptions import IllegalStateException, QueryCancelledException
+from Publication import Publication
+from ReferenceDataBase import ReferenceDataBase
+from SQLiteReferenceDataBase import SQLiteReferenceDataBase
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
+import unittest
+
+class SlowDataBase(object):
+    """A database whose queries block until released, counting calls."""
+
+    def __init__(self, dataBase):
+        self.dataBase = dataBase
+        self.release = threading.Event()
+        self.calls = 0
+        self.cancelled = threading.Event()
+
+    def findByAuthor(self, authorName):
+        self.calls += 1
+        self.release.wait(5)
+        return self.dataBase.findByAuthor(authorName)
+
+    def findDirIndirCites(self, Id, maxDepth=None, cancelEvent=None):
+        self.calls += 1
+        if cancelEvent.wait(5):
+            self.cancelled.set()
+            raise QueryCancelledException()
+        return self.dataBase.findDirIndirCites(Id, maxDepth, cancelEvent)
+
+
+class AsyncReferenceDataBaseTest(unittest.TestCase):
+    """Unit Test for AsyncReferenceDataBase"""
+
+    def setUp(self):
+        self.dataBase = ReferenceDataBase()
+        self.publication1 = Publication("Gas leak rate study of MEMS",
+                                        ["Wang, Bo"], 1990)
+        self.publication2 = Publication("Packaging of MEMS",
+                                        ["Wang, Bo", "Witvrouw, Ann"], 2012)
+        self.dataBase.addPublications([self.publication1, self.publication2])
+        self.dataBase.addCitation(self.publication2.id, self.publication1.id)
+
+    def testQueries(self):
+        async def queries():
+            facade = AsyncReferenceDataBase(self.dataBase)
+            return await asyncio.gather(
+                facade.findByAuthor("B. Wang"),
+                facade.findByTitleWord("packaging"),
+                facade.findDirIndirCites(self.publication1.id),
+                facade.authorCitationIndex("A. Witvrouw"))
+
+        self.assertEqual([set([self.publication1, self.publication2]),
+                          set([self.publication2]), set([self.publication2]),
+                          1.0], asyncio.run(queries()))
+
+    def testSQLiteDataBase(self):
+        dataBase = SQLiteReferenceDataBase(":memory:")
+        publications = [Publication("Getters {}".format(number),
+                                    ["Mao, Shengping"], 1990 + number)
+                        for number in range(20)]
+        dataBase.addPublications(publications)
+        dataBase.addCitations([(publications[number + 1].id,
+                                publications[number].id)
+                               for number in range(19)])
+        executor = ThreadPoolExecutor(4)
+
+        async def queries():
+            facade = AsyncReferenceDataBase(dataBase, executor)
+            return await asyncio.gather(*(
+                [facade.findDirIndirCites(publication.id)
+                 for publication in publications] +
+                [facade.findByAuthor("S. Mao"),
+                 facade.findByTitleWord("getters 1"),
+                 facade.authorCitationIndex("S. Mao")]))
+
+        try:
+            results = asyncio.run(queries())
+        finally:
+            executor.shutdown()
+            dataBase.close()
+        self.assertEqual([19 - number for number in range(20)],
+                         [len(result) for result in results[:20]])
+        self.assertEqual(set(publications), results[20])
+        self.assertEqual(11, len(results[21]))
+        self.assertEqual(20.0, results[22])
+
+    def testIdenticalQueriesCoalesced(self):
+        slow = SlowDataBase(self.dataBase)
+
+        async def queries():
+            facade = AsyncReferenceDataBase(slow)
+            first = asyncio.ensure_future(facade.findByAuthor("B. Wang"))
+            second = asyncio.ensure_future(facade.findByAuthor("B. Wang"))
+            await asyncio.sleep(0.05)
+            self.assertEqual(1, facade.getPendingQueryCount())
+            slow.release.set()
+            results = await asyncio.gather(first, second)
+            self.assertEqual(0, facade.getPendingQueryCount())
+            return results
+
+        first, second = asyncio.run(queries())
+        self.assertEqual(1, slow.calls)
+        self.assertEqual(first, second)
+        self.assertFalse(first is second)
+
+    def testCancel(self):
+        slow = SlowDataBase(self.dataBase)
+
+        async def cancel():
+            facade = AsyncReferenceDataBase(slow)
+            first = asyncio.ensure_future(
+                facade.findDirIndirCites(self.publication1.id))
+            second = asyncio.ensure_future(
+                facade.findDirIndirCites(self.publication1.id))
+            await asyncio.sleep(0.05)
+            first.cancel()
+            await asyncio.sleep(0.05)
+            self.assertFalse(slow.cancelled.is_set())
+            second.cancel()
+            await asyncio.gather(first, second, return_exceptions=True)
+            return facade
+
+        facade = asyncio.run(cancel())
+        self.assertTrue(slow.cancelled.wait(5))
+        self.assertEqual(0, facade.getPendingQueryCount())
+
+    def testCancelRunningQuery(self):
+        slow = SlowDataBase(self.dataBase)
+
+        async def cancel():
+            facade = AsyncReferenceDataBase(slow, maxConcurrentQueries=1)
+            first = asyncio.ensure_future(facade.findByAuthor("B. Wang"))
+            await asyncio.sleep(0.05)
+            first.cancel()
+            await asyncio.gather(first, return_exceptions=True)
+            self.assertEqual(1, facade.getPendingQueryCount())
+            second = asyncio.ensure_future(facade.findByAuthor("B. Wang"))
+            await asyncio.sleep(0.05)
+            self.assertEqual(1, slow.calls)
+            self.assertEqual(2, facade.getPendingQueryCount())
+            slow.release.set()
+            result = await second
+            self.assertEqual(2, slow.calls)
+            self.assertEqual(0, facade.getPendingQueryCount())
+            return result
+
+        self.assertEqual(set([self.publication1, self.publication2]),
+                         asyncio.run(cancel()))
+
+    def testMaxPendingQueries(self):
+        slow = SlowDataBase(self.dataBase)
+
+        async def overload():
+            facade = AsyncReferenceDataBase(slow, maxPendingQueries=1)
+            first = asyncio.ensure_future(facade.findByAuthor("B. Wang"))
+            await asyncio.sleep(0)
+            try:
+                with self.assertRaises(IllegalStateException):
+                    await facade.findByAuthor("A. Witvrouw")
+            finally:
+                slow.release.set()
+            return await first
+
+        self.assertEqual(set([self.publication1, self.publication2]),
+                         asyncio.run(overload()))
+
+    def testCancelTraversal(self):
+        cancelEvent = threading.Event()
+        cancelEvent.set()
+        previous = self.publication2
+        for number in range(3000):
+            publication = Publication("Getter {}".format(number),
+                                      ["Mao, Shengping"], 2015)
+            self.dataBase.addAsPublication(publication)
+            self.dataBase.addCitation(publication.id, previous.id)
+            previous = publication
+        self.assertRaises(QueryCancelledException,
+                          self.dataBase.findDirIndirCites,
+                          self.publication1.id, None, cancelEvent)
+        self.assertEqual(3001, self.dataBase.countDirIndirCites(
+            self.publication1.id))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+"""An inverted index from author names to the IDs of their publications.
+
+..:: moduleauthor: Wang Bo <wangbomicro@gmail.com>
+..:: invar: Every ID in the index refers to a publication that lists the
+    author it is filed under.
+"""
+
+class AuthorIndex(object):
+    """Inverted index mapping a normalized author name, e.g. "A. Einstein", to
+    the set of IDs of the publications written by that author.
+
+    The index is maintained incrementally by the ReferenceDataBase, so a
+    lookup costs O(result size) and never scans the database.
+    """
+
+    def __init__(self):
+        """Initialize this new AuthorIndex with no entries.
+
+        Post:
+            No author is filed in this index.
+        """
+        self._index = dict()
+
+    def add(self, publication):
+        """File the given publication under each of its authors.
+
+        Args:
+            publication (Publication): The publication to be indexed.
+        """
+        self._addNames(publication.id, publication.getAuthorsName())
+
+    def addAll(self, publications):
+        """File each of the given publications under each of its authors.
+
+        Args:
+            publications (iterable): The publications to be indexed.
+        """
+        for publication in publications:
+            self.add(publication)
+
+    def remove(self, publication):
+        """Remove the given publication from the entries of its authors.
+
+        Args:
+            publication (Publication): The publication to be removed.
+        """
+        self._removeNames(publication.id, publication.getAuthorsName())
+
+    def removeAll(self, publications):
+        """Remove each of the given publications from the entries of its
+        authors.
+
+        Args:
+            publications (iterable): The publications to be removed.
+        """
+        for publication in publications:
+            self.remove(publication)
+
+    def update(self, publication, attribute, oldValue):
+        """Re-index the given publication after one of its attributes changed.
+
+        Args:
+            publication (Publication): The changed publication.
+            attribute (str): The name of the changed attribute.
+            oldValue: The value of the attribute before the change.
+        """
+        if attribute != 'authors':
+            return
+        oldNames = [publication.getAuthorName(author) for author in oldValue]
+        self._removeNames(publication.id, oldNames)
+        self.add(publication)
+
+    def find(self, authorName):
+        """Return the IDs of all publications filed under the given author.
+
+        Args:
+            authorName (str): The author name, e.g. "A. Einstein".
+        Returns:
+            (set) The IDs of the publications of the author.
+        """
+        return self._index.get(authorName, set()).copy()
+
+    def count(self, authorName):
+        """Return the number of publications filed under the given author.
+
+        Args:
+            authorName (str): The author name, e.g. "A. Einstein".
+        """
+        return len(self._index.get(authorName, ()))
+
+    def getAllAuthors(self):
+        """Return all author names present in this index.
+        """
+        return self._index.keys()
+
+    def clear(self):
+        """Remove all entries of this index.
+        """
+        self._index.clear()
+
+    def _addNames(self, id, names):
+        for name in names:
+            self._index.setdefault(name, set()).add(id)
+
+    def _removeNames(self, id, names):
+        for name in names:
+            ids = self._index.get(name)
+            if ids is None:
+                continue
+            ids.discard(id)
+            if not ids:
+                del self._index[name]
@@ -0,0 +1,39 @@
+"""Unit Test for AuthorIndex
+
+..:: moduleauthors:: Wang Bo <wangbomicro@gmail.com>
+"""
+from AuthorIndex import AuthorIndex
+from Publication import Publication
+import unittest
+
+class AuthorIndexTest(unittest.TestCase):
+    """Unit Test for AuthorIndex"""
+
+    def setUp(self):
+        self.index = AuthorIndex()
+        self.publication = Publication("Gas leak rate study of MEMS",
+                                       ["Wang, Bo", "Wevers, Martine"], 1990)
+        self.publication.id = 1001
+        self.index.add(self.publication)
+
+    def testFind(self):
+        self.assertEqual(set([1001]), self.index.find("B. Wang"))
+        self.assertEqual(1, self.index.count("M. Wevers"))
+        self.assertEqual(set(), self.index.find("A. Einstein"))
+
+    def testUpdate(self):
+        self.index.update(self.publication, 'authors', ["Einstein, Albert"])
+        self.assertEqual(set([1001]), self.index.find("B. Wang"))
+        oldAuthors = self.publication.authors
+        self.publication.authors = ["Einstein, Albert"]
+        self.index.update(self.publication, 'authors', oldAuthors)
+        self.assertEqual(set(), self.index.find("B. Wang"))
+        self.assertEqual(set([1001]), self.index.find("A. Einstein"))
+
+    def testRemove(self):
+        self.index.remove(self.publication)
+        self.assertEqual(set(), self.index.find("B. Wang"))
+        self.assertEqual(0, len(list(self.index.getAllAuthors())))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+"""A materialized table of the citation index of every author.
+
+..:: moduleauthor: Wang Bo <wangbomicro@gmail.com>
+..:: invar: The score of every author is the sum of the weights of the types
+    of the publications filed under that author.
+"""
+
+class AuthorScoreIndex(object):
+    """Index keeping, for every author name, the number of publications of
+    each type and the resulting citation index, so reading a score is a
+    dictionary lookup.
+
+    The ReferenceDataBase maintains it like its other indexes, and tells it
+    when the weight of a publication type changes; only the authors of
+    publications of that type are then recomputed.
+    """
+
+    def __init__(self):
+        """Initialize this new AuthorScoreIndex with no entries.
+
+        Post:
+            No author is filed in this index.
+        """
+        self._counts = dict()
+        self._scores = dict()
+        self._authorsByType = dict()
+
+    def add(self, publication):
+        """Count the given publication for each of its authors.
+
+        Args:
+            publication (Publication): The publication to be indexed.
+        """
+        self._addNames(type(publication), publication.getAuthorsName(), 1)
+
+    def addAll(self, publications):
+        """Count each of the given publications for each of its authors.
+
+        Args:
+            publications (iterable): The publications to be indexed.
+        """
+        for publication in publications:
+            self.add(publication)
+
+    def remove(self, publication):
+        """Stop counting the given publication for its authors.
+
+        Args:
+            publication (Publication): The publication to be removed.
+        """
+        self._addNames(type(publication), publication.getAuthorsName(), -1)
+
+    def removeAll(self, publications):
+        """Stop counting each of the given publications for its authors.
+
+        Args:
+            publications (iterable): The publications to be removed.
+        """
+        for publication in publications:
+            self.remove(publication)
+
+    def update(self, publication, attribute, oldValue):
+        """Move the given publication to its new authors after its authors
+        changed.
+
+        Args:
+            publication (Publication): The changed publication.
+            attribute (str): The name of the changed attribute.
+            oldValue: The value of the attribute before the change.
+        """
+        if attribute != 'authors':
+            return
+        oldNames = [publication.getAuthorName(author) for author in oldValue]
+        self._addNames(type(publication), oldNames, -1)
+        self.add(publication)
+
+    def weightChanged(self, cls):
+        """Recompute the scores of the authors of publications of the given
+        type, or of one of its subtypes, after its weight changed.
+
+        Args:
+            cls (type): The publication type whose weight changed.
+        """
+        names = set()
+        for type, authors in self._authorsByType.items():
+            if issubclass(type, cls):
+                names.update(authors)
+        for name in names:
+            self._scores[name] = self._computeScore(self._counts[name])
+
+    def getScore(self, authorName):
+        """Return the citation index of the given author, 0 if no publication
+        is filed under the author.
+
+        Args:
+            authorName (str): The author name, e.g. "A. Einstein".
+        """
+        return self._scores.get(authorName, 0)
+
+    def getScores(self):
+        """Return a dictionary with the citation index of every author.
+        """
+        return dict(self._scores)
+
+    def clear(self):
+        """Remove all entries of this index.
+        """
+        self._counts.clear()
+        self._scores.clear()
+        self._authorsByType.clear()
+
+    def _addNames(self, type, names, delta):
+        for name in set(names):
+            counts = self._counts.setdefault(name, dict())
+            count = counts.get(type, 0) + delta
+            if count > 0:
+                counts[type] = count
+                self._authorsByType.setdefault(type, set()).add(name)
+            else:
+                counts.pop(type, None)
+                authors = self._authorsByType.get(type)
+                if authors is not None:
+                    authors.discard(name)
+            if counts:
+                self._scores[name] = self._computeScore(counts)
+            else:
+                del self._counts[name]
+                self._scores.pop(name, None)
+
+    @staticmethod
+    def _computeScore(counts):
+        # Sum in a fixed order, so a score does not depend on its history.
+        score = 0
+        for type in sorted(counts, key=lambda type: type.__name__):
+            score += type.getWeight() * counts[type]
+        return score
@@ -0,0 +1,52 @@
+"""Unit Test for AuthorScoreIndex
+
+..:: moduleauthors:: Wang Bo <wangbomicro@gmail.com>
+"""
+from AuthorScoreIndex import AuthorScoreIndex
+from Book import Book
+from Publication import Publication
+import unittest
+
+class AuthorScoreIndexTest(unittest.TestCase):
+    """Unit Test for AuthorScoreIndex"""
+
+    def setUp(self):
+        self.index = AuthorScoreIndex()
+        self.publication = Publication("Gas leak rate study of MEMS",
+                                       ["Wang, Bo", "Wevers, Martine"], 1990)
+        self.publication.id = 1001
+        self.book = Book("Packaging of MEMS", ["Wang, Bo"], 2012, "Springer")
+        self.book.id = 1002
+        self.index.addAll([self.publication, self.book])
+        self.weight = Book.getWeight()
+
+    def tearDown(self):
+        Book._weight = self.weight
+
+    def testGetScore(self):
+        self.assertEqual(2.0, self.index.getScore("B. Wang"))
+        self.assertEqual(1.0, self.index.getScore("M. Wevers"))
+        self.assertEqual(0, self.index.getScore("A. Einstein"))
+        self.assertEqual({"B. Wang": 2.0, "M. Wevers": 1.0},
+                         self.index.getScores())
+
+    def testUpdate(self):
+        oldAuthors = self.book.authors
+        self.book.authors = ["Wevers, Martine"]
+        self.index.update(self.book, 'authors', oldAuthors)
+        self.assertEqual(1.0, self.index.getScore("B. Wang"))
+        self.assertEqual(2.0, self.index.getScore("M. Wevers"))
+
+    def testWeightChanged(self):
+        Book._weight = 3.0
+        self.index.weightChanged(Book)
+        self.assertEqual(4.0, self.index.getScore("B. Wang"))
+        self.assertEqual(1.0, self.index.getScore("M. Wevers"))
+
+    def testRemove(self):
+        self.index.remove(self.publication)
+        self.index.remove(self.book)
+        self.assertEqual({}, self.index.getScores())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,419 @@
+"""A reproducible benchmark of the operations of ReferenceDataBase and
+Publication over synthetic corpora.
+
+..:: moduleauthor: Wang Bo <wangbomicro@gmail.com>
+
+Run it as a script, e.g.
+
+    python Benchmark.py --sizes 1000 10000 100000 --output results.json
+    python Benchmark.py --sizes 1000 10000 --compare results.json
+
+The results are written as JSON, one record per operation and corpus size,
+so two runs can be compared; --compare exits with status 1 when an
+operation got slower than the tolerance allows.
+"""
+from CorpusGenerator import CorpusGenerator
+from Query import AuthorIs, TypeIs, YearBetween
+from JournalArticle import JournalArticle
+from ReferenceDataBase import ReferenceDataBase
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+class Benchmark(object):
+    """Benchmark timing every public operation of ReferenceDataBase and
+    Publication on generated corpora of the given sizes.
+
+    For each size a database is filled by a CorpusGenerator with the given
+    seed. Every operation is then called repeat times with arguments drawn
+    from the corpus by a seeded random generator: frequent and rare
+    authors, title words and cited publications alike. The preparation of
+    the arguments is not timed. One more call runs under tracemalloc, for
+    the peak and the retained number of bytes allocated by a call.
+    """
+
+    def __init__(self, sizes=(1000, 10000, 100000), seed=1001, repeat=20,
+                 operations=None, measureMemory=True):
+        """Initialize this new Benchmark.
+
+        Args:
+            sizes (iterable): The numbers of publications of the corpora.
+            seed (int): The seed of the corpora and of the arguments.
+            repeat (int): The number of timed calls per operation and size.
+            operations (iterable): The names of the operations to be run;
+                None for all, see getOperationNames.
+            measureMemory (bool): False to skip the memory measurements.
+        """
+        self._sizes = list(sizes)
+        self._seed = seed
+        self._repeat = repeat
+        self._operations = None if operations is None else set(operations)
+        self._measureMemory = measureMemory
+
+    @classmethod
+    def getOperationNames(cls):
+        """Return the names of the benchmarked operations, in run order.
+        """
+        return [name for name, prepare in _OPERATIONS]
+
+    def run(self, log=None):
+        """Run the benchmark.
+
+        Args:
+            log (file): A stream to report progress to; None for none.
+        Returns:
+            (dict) The environment of the run under 'meta' and one record per
+            operation and size under 'results'.
+        """
+        results = []
+        for size in self._sizes:
+            corpus = self._buildCorpus(size, results)
+            for name, prepare in _OPERATIONS:
+                if self._operations is not None and name not in self._operations:
+                    continue
+                results.append(self._measure(name, size, prepare, corpus))
+                if log is not None:
+                    log.write(self.formatResult(results[-1]) + "\n")
+            corpus.dataBase.terminate()
+        return {'meta': self.getEnvironment(), 'results': results}
+
+    def getEnvironment(self):
+        """Return a description of the machine and parameters of this run.
+        """
+        return {'python': platform.python_version(),
+                'implementation': platform.python_implementation(),
+                'platform': platform.platform(),
+                'processor': platform.processor(),
+                'date': datetime.datetime.now().isoformat(),
+                'seed': self._seed,
+                'repeat': self._repeat,
+                'sizes': self._sizes}
+
+    @staticmethod
+    def formatResult(result):
+        """Return one line describing the given result record.
+        """
+        line = "{operation:<28} n={size:<9} median {median:.3e} s".format(
+            **result)
+        if result.get('peakBytes') is not None:
+            line += "  peak {peakBytes} B  retained {retainedBytes} B".format(
+                **result)
+        return line
+
+    @staticmethod
+    def compare(baseline, current, tolerance=1.25):
+        """Compare the median times of two runs.
+
+        Args:
+            baseline (dict): The results of the earlier run, as given by run.
+            current (dict): The results of the later run.
+            tolerance (float): The largest ratio of the current to the
+                baseline median that is not a regression.
+        Returns:
+            (list) An (operation, size, ratio, isRegression) tuple for every
+            operation and size measured in both runs.
+        """
+        medians = dict(((result['operation'], result['size']),
+                        result['median']) for result in baseline['results'])
+        comparison = []
+        for result in current['results']:
+            key = (result['operation'], result['size'])
+            if key not in medians:
+                continue
+            ratio = result['median'] / medians[key] if medians[key] else 1.0
+            comparison.append(key + (ratio, ratio > tolerance))
+        return comparison
+
+    def _buildCorpus(self, size, results):
+        # The time to fill the database includes tracing its memory, if any.
+        if self._measureMemory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        dataBase = ReferenceDataBase()
+        publications = CorpusGenerator(self._seed).populate(dataBase, size)
+        seconds = time.perf_counter() - start
+        retained = None
+        if self._measureMemory:
+            retained = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+        results.append({'operation': 'populate', 'size': size, 'calls': 1,
+                        'median': seconds, 'minimum': seconds,
+                        'maximum': seconds, 'peakBytes': None,
+                        'retainedBytes': retained})
+        return _Corpus(dataBase, publications, random.Random(self._seed))
+
+    def _measure(self, name, size, prepare, corpus):
+        times = []
+        for call in range(self._repeat):
+            function = prepare(corpus)
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+        times.sort()
+        result = {'operation': name, 'size': size, 'calls': len(times),
+                  'median': times[len(times) // 2], 'minimum': times[0],
+                  'maximum': times[-1], 'peakBytes': None,
+                  'retainedBytes': None}
+        if self._measureMemory:
+            function = prepare(corpus)
+            tracemalloc.start()
+            function()
+            retained, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            result['peakBytes'] = peak
+            result['retainedBytes'] = retained
+        return result
+
+
+class _Corpus(object):
+    """A filled database, its publications and the random generator of the
+    arguments of the operations."""
+
+    def __init__(self, dataBase, publications, generator):
+        self.dataBase = dataBase
+        self.publications = publications
+        self.random = generator
+        self.words = sorted(set(word for publication in publications
+                                for word in publication.title.lower().split()))
+        self.number = 0
+
+    def publication(self):
+        """Return a random publication of the database."""
+        return self.random.choice(self.publications)
+
+    def newPublication(self):
+        """Return a new publication, attached to no database."""
+        self.number += 1
+        publication = self.publication()
+        return JournalArticle("Benchmark {}".format(self.number),
+                              publication.authors, "Benchmark", 1, 2016)
+
+    def addedPublication(self):
+        """Return a new publication, added to the database."""
+        publication = self.newPublication()
+        self.dataBase.addAsPublication(publication)
+        return publication
+
+
+def _call(function, *args, **options):
+    return lambda: function(*args, **options)
+
+
+def _prepareAddCitation(corpus):
+    citing = corpus.addedPublication()
+    return _call(corpus.dataBase.addCitation, citing.id,
+                 corpus.publication().id)
+
+
+def _prepareAddCitations(corpus):
+    citing = corpus.addedPublication()
+    cited = set(publication.id for publication in
+                corpus.random.sample(corpus.publications,
+                                     min(20, len(corpus.publications))))
+    return _call(corpus.dataBase.addCitations,
+                 [(citing.id, id) for id in cited])
+
+
+def _prepareSetTitle(corpus):
+    publication = corpus.addedPublication()
+
+    def setTitle():
+        publication.title = "Renamed " + publication.title
+    return setTitle
+
+
+def _prepareSetAuthors(corpus):
+    publication = corpus.addedPublication()
+    authors = corpus.publication().authors
+
+    def setAuthors():
+        publication.authors = authors
+    return setAuthors
+
+
+def _prepareSetYear(corpus):
+    publication = corpus.addedPublication()
+
+    def setYear():
+        publication.year = 2015
+    return setYear
+
+
+def _prepareAddAsCite(corpus):
+    citing = corpus.addedPublication()
+    return _call(citing.addAsCite, corpus.publication())
+
+
+def _prepareRemoveAsCite(corpus):
+    citing = corpus.addedPublication()
+    cited = corpus.publication()
+    corpus.dataBase.addCitation(citing.id, cited.id)
+    return _call(citing.removeAsCite, cited)
+
+
+def _prepareSaveSnapshot(corpus):
+    descriptor, path = tempfile.mkstemp(suffix='.snapshot')
+    os.close(descriptor)
+
+    def saveSnapshot():
+        try:
+            corpus.dataBase.saveSnapshot(path)
+        finally:
+            os.remove(path)
+    return saveSnapshot
+
+
+# The operations, each with a function preparing the arguments of one call
+# and returning the call to be timed.
+_OPERATIONS = [
+    ('addAsPublication', lambda corpus: _call(
+        corpus.dataBase.addAsPublication, corpus.newPublication())),
+    ('addPublications', lambda corpus: _call(
+        corpus.dataBase.addPublications,
+        [corpus.newPublication() for number in range(100)])),
+    ('removePublication', lambda corpus: _call(
+        corpus.dataBase.removePublication, corpus.addedPublication())),
+    ('removePublications', lambda corpus: _call(
+        corpus.dataBase.removePublications,
+        [corpus.addedPublication().id for number in range(100)])),
+    ('hasPublication', lambda corpus: _call(
+        corpus.dataBase.hasPublication, corpus.publication())),
+    ('hasPublicationID', lambda corpus: _call(
+        corpus.dataBase.hasPublicationID, corpus.publication().id)),
+    ('getPublicationWithID', lambda corpus: _call(
+        corpus.dataBase.getPublicationWithID, corpus.publication().id)),
+    ('getPublicationsWithIDs', lambda corpus: _call(
+        corpus.dataBase.getPublicationsWithIDs,
+        [corpus.publication().id for number in range(100)])),
+    ('getAllPublications', lambda corpus: corpus.dataBase.getAllPublications),
+    ('hasProperPublication', lambda corpus:
+     corpus.dataBase.hasProperPublication),
+    ('findByAuthor', lambda corpus: _call(
+        corpus.dataBase.findByAuthor, corpus.publication().getAuthorsName()[0])),
+    ('iterByAuthor', lambda corpus: lambda: list(corpus.dataBase.iterByAuthor(
+        corpus.publication().getAuthorsName()[0], limit=20))),
+    ('findByTitleWord', lambda corpus: _call(
+        corpus.dataBase.findByTitleWord, corpus.random.choice(corpus.words))),
+    ('iterByTitleWord', lambda corpus: lambda: list(
+        corpus.dataBase.iterByTitleWord(corpus.random.choice(corpus.words),
+                                        limit=20))),
+    ('findByTitleWords', lambda corpus: _call(
+        corpus.dataBase.findByTitleWords,
+        " ".join(corpus.random.sample(corpus.words, 2)), False)),
+    ('rankByTitle', lambda corpus: _call(
+        corpus.dataBase.rankByTitle,
+        " ".join(corpus.random.sample(corpus.words, 2)))),
+    ('findByYearRange', lambda corpus: _call(
+        corpus.dataBase.findByYearRange, 2000, 2005)),
+    ('countByYear', lambda corpus: corpus.dataBase.countByYear),
+    ('findOlderThan', lambda corpus: _call(
+        corpus.dataBase.findOlderThan, 50, 2016)),
+    ('find', lambda corpus: _call(
+        corpus.dataBase.find,
+        AuthorIs(corpus.publication().getAuthorsName()[0]) &
+        YearBetween(1990) & TypeIs(JournalArticle))),
+    ('iterFind', lambda corpus: lambda: list(corpus.dataBase.iterFind(
+        YearBetween(1990), orderBy='citations', limit=20))),
+    ('findDuplicates', lambda corpus: corpus.dataBase.findDuplicates),
+    ('addCitation', _prepareAddCitation),
+    ('addCitations', _prepareAddCitations),
+    ('authorCitationIndex', lambda corpus: _call(
+        corpus.dataBase.authorCitationIndex,
+        corpus.publication().getAuthorsName()[0])),
+    ('authorCitationIndices', lambda corpus:
+     corpus.dataBase.authorCitationIndices),
+    ('findDirIndirCites', lambda corpus: _call(
+        corpus.dataBase.findDirIndirCites, corpus.publication().id)),
+    ('countDirIndirCites', lambda corpus: _call(
+        corpus.dataBase.countDirIndirCites, corpus.publication().id)),
+    ('iterDirIndirCites', lambda corpus: lambda: list(
+        corpus.dataBase.iterDirIndirCites(corpus.publication().id, limit=20))),
+    ('saveSnapshot', _prepareSaveSnapshot),
+    ('Publication.title', _prepareSetTitle),
+    ('Publication.authors', _prepareSetAuthors),
+    ('Publication.year', _prepareSetYear),
+    ('Publication.isTheSameAs', lambda corpus: _call(
+        corpus.publication().isTheSameAs, corpus.publication())),
+    ('Publication.canCites', lambda corpus: _call(
+        corpus.publication().canCites, corpus.publication())),
+    ('Publication.addAsCite', _prepareAddAsCite),
+    ('Publication.removeAsCite', _prepareRemoveAsCite),
+    ('Publication.getAllCites', lambda corpus:
+     corpus.publication().getAllCites),
+    ('Publication.getAllCitedBy', lambda corpus:
+     corpus.publication().getAllCitedBy),
+    ('Publication.getCitesSnapshot', lambda corpus:
+     corpus.publication().getCitesSnapshot),
+    ('Publication.getCitedBySnapshot', lambda corpus:
+     corpus.publication().getCitedBySnapshot),
+    ('Publication.haveProperCites', lambda corpus:
+     corpus.publication().haveProperCites),
+    ('Publication.getAuthorsName', lambda corpus:
+     corpus.publication().getAuthorsName),
+    ('Publication.is10YearsOld', lambda corpus:
+     corpus.publication().is10YearsOld),
+    ('Publication.terminate', lambda corpus:
+     corpus.addedPublication().terminate),
+    # Last, as from then on the near duplicate index is kept up to date.
+    ('findNearDuplicates', lambda corpus: _call(
+        corpus.dataBase.findNearDuplicates, corpus.publication())),
+    ('clusterNearDuplicates', lambda corpus:
+     corpus.dataBase.clusterNearDuplicates),
+]
+
+
+def main(arguments=None):
+    """Run the benchmark from the command line.
+
+    Args:
+        arguments (list): The command line arguments; None for sys.argv.
+    Returns:
+        (int) The exit status: 1 if a compared operation regressed.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1000, 10000, 100000],
+                        help="numbers of publications, e.g. 1000 10000000")
+    parser.add_argument('--seed', type=int, default=1001)
+    parser.add_argument('--repeat', type=int, default=20,
+                        help="timed calls per operation and size")
+    parser.add_argument('--operations', nargs='+',
+                        choices=Benchmark.getOperationNames(),
+                        help="operations to run; all by default")
+    parser.add_argument('--no-memory', action='store_true',
+                        help="skip the tracemalloc measurements")
+    parser.add_argument('--output', help="JSON file to write the results to")
+    parser.add_argument('--compare', help="JSON results of an earlier run")
+    parser.add_argument('--tolerance', type=float, default=1.25,
+                        help="slowdown ratio reported as a regression")
+    options = parser.parse_args(arguments)
+
+    benchmark = Benchmark(options.sizes, options.seed, options.repeat,
+                          options.operations, not options.no_memory)
+    results = benchmark.run(sys.stderr)
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(results, output, indent=1)
+    else:
+        json.dump(results, sys.stdout, indent=1)
+        sys.stdout.write("\n")
+    if not options.compare:
+        return 0
+    with open(options.compare) as baseline:
+        comparison = Benchmark.compare(json.load(baseline), results,
+                                       options.tolerance)
+    for operation, size, ratio, isRegression in comparison:
+        sys.stderr.write("{:<28} n={:<9} {:6.2f}x{}\n".format(
+            operation, size, ratio, "  REGRESSION" if isRegression else ""))
+    return 1 if any(item[3] for item in comparison) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
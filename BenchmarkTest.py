@@ -0,0 +1,64 @@
+"""Unit Test for Benchmark
+
+..:: moduleauthors:: Wang Bo <wangbomicro@gmail.com>
+"""
+from Benchmark import Benchmark, main
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+class BenchmarkTest(unittest.TestCase):
+    """Unit Test for Benchmark"""
+
+    def testRunAllOperations(self):
+        results = Benchmark(sizes=[200], repeat=2).run()
+        self.assertEqual(200, results['meta']['sizes'][0])
+        operations = [result['operation'] for result in results['results']]
+        self.assertEqual(['populate'] + Benchmark.getOperationNames(),
+                         operations)
+        for result in results['results']:
+            self.assertTrue(result['median'] >= result['minimum'] >= 0)
+            self.assertTrue(result['retainedBytes'] is not None)
+        json.dumps(results)
+
+    def testCompare(self):
+        baseline = {'results': [{'operation': 'findByAuthor', 'size': 10,
+                                 'median': 1.0},
+                                {'operation': 'addCitation', 'size': 10,
+                                 'median': 2.0}]}
+        current = {'results': [{'operation': 'findByAuthor', 'size': 10,
+                                'median': 1.5},
+                               {'operation': 'addCitation', 'size': 10,
+                                'median': 2.0},
+                               {'operation': 'addCitation', 'size': 20,
+                                'median': 2.0}]}
+        self.assertEqual([('findByAuthor', 10, 1.5, True),
+                          ('addCitation', 10, 1.0, False)],
+                         Benchmark.compare(baseline, current))
+
+    def testMain(self):
+        descriptor, path = tempfile.mkstemp(suffix='.json')
+        os.close(descriptor)
+        stderr = sys.stderr
+        sys.stderr = io.StringIO()
+        try:
+            arguments = ['--sizes', '100', '--repeat', '1', '--no-memory',
+                         '--operations', 'findByAuthor', 'addCitation',
+                         '--output', path]
+            self.assertEqual(0, main(arguments))
+            with open(path) as output:
+                results = json.load(output)
+            self.assertEqual(['populate', 'findByAuthor', 'addCitation'],
+                             [result['operation']
+                              for result in results['results']])
+            self.assertEqual(0, main(arguments + ['--compare', path,
+                                                  '--tolerance', '1000']))
+        finally:
+            sys.stderr = stderr
+            os.remove(path)
+
+if __name__ == "__main__":
+    unittest.main()
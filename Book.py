@@ -4,7 +4,7 @@
 ..:: moduleauthor: WangBo <wangbomicro@gmail.com> 
 """
 from Exceptions import IllegalStateException
-import Publication
+from Publication import Publication
 
 class Book(Publication):
     """A class of book as a special kind of publication. In addition to title,
@@ -23,11 +23,13 @@ class Book(Publication):
         IllegalAuthorException: if the given author is invalid
         IllegalYearException: if the given year is invalid
     """
+    __slots__ = ('_publisher',)
+    
     _weight = 1.0
     
     def __init__(self, title, authors, year, publisher):
         super(Book, self).__init__(title = title, authors = authors, year = year)
-        self._publisher = publisher
+        self._publisher = self._strings.intern(publisher)
 
     @property
     def publisher(self):
@@ -47,4 +49,22 @@ class Book(Publication):
         """
         if self.isTerminated():
             raise IllegalStateException("The instance already terminated.")
-        self._publisher = val
\ No newline at end of file
+        with self._changeLocked():
+            self._checkChangeable('publisher')
+            oldPublisher = self._publisher
+            self._publisher = self._strings.intern(val)
+            self._notifyDatabase('publisher', oldPublisher)
+    
+    def __repr__(self):
+        """The internal representation of the Book
+        """
+        return "Book({title},{authors},{year},{publisher})".\
+            format(title = self.title, authors = self.authors, year = self.year,
+                   publisher = self.publisher)
+    
+    def __str__(self):
+        """The string representation of the Book
+        """
+        return "{authors}, {title}, {publisher}, {year}".\
+            format(authors = ', '.join(self.getAuthorsName()), title = self.title, 
+                   publisher = self.publisher, year = self.year)
\ No newline at end of file
@@ -0,0 +1,387 @@
+"""A compact citation graph storing edges as publication IDs in compressed
+sparse row (CSR) arrays.
+
+..:: moduleauthor: Wang Bo <wangbomicro@gmail.com>
+..:: invar: Every citation is present in both the forward and the reverse
+    direction, and at most once.
+"""
+from Exceptions import IllegalValueException
+from array import array
+import bisect
+
+class CSRCitationGraph(object):
+    """Citation graph keeping the citations of the compacted part in forward
+    (citing to cited) and reverse (cited to citing) CSR arrays of publication
+    IDs, with a delta buffer for recently added citations and a set of
+    tombstones for removed ones.
+
+    The rows of both directions are indexed by the same sorted array of
+    publication IDs, and the neighbours within a row are sorted, so every
+    lookup is a binary search. Once the buffered changes outgrow a fraction
+    of the compacted edges the graph compacts itself.
+    """
+
+    def __init__(self, compactionRatio=0.5, minCompactionSize=4096):
+        """Initialize this new CSRCitationGraph with no citations.
+
+        Args:
+            compactionRatio (float): The number of buffered changes, relative
+                to the size of the compacted arrays, that triggers a
+                compaction.
+            minCompactionSize (int): The minimum number of buffered changes
+                that triggers a compaction.
+        Post:
+            No citations are stored in this graph.
+        """
+        self._compactionRatio = compactionRatio
+        self._minCompactionSize = minCompactionSize
+        self._nodeIds = array('q')
+        self._forwardPointers = array('q', [0])
+        self._forwardIds = array('q')
+        self._reversePointers = array('q', [0])
+        self._reverseIds = array('q')
+        self._addedForward = dict()
+        self._addedReverse = dict()
+        self._removed = set()
+        self._pendingChanges = 0
+
+    def addEdge(self, citingId, citedId):
+        """Add the citation from the publication with the first ID to the
+        publication with the second ID.
+
+        Args:
+            citingId (int): The ID of the citing publication.
+            citedId (int): The ID of the cited publication.
+        Returns:
+            (bool) True if the citation was not yet present.
+        """
+        if self.hasEdge(citingId, citedId):
+            return False
+        if (citingId, citedId) in self._removed:
+            self._removed.discard((citingId, citedId))
+        else:
+            self._addedForward.setdefault(citingId, set()).add(citedId)
+            self._addedReverse.setdefault(citedId, set()).add(citingId)
+        self._changed()
+        return True
+
+    def removeEdge(self, citingId, citedId):
+        """Remove the citation from the publication with the first ID to the
+        publication with the second ID.
+
+        Args:
+            citingId (int): The ID of the citing publication.
+            citedId (int): The ID of the cited publication.
+        Returns:
+            (bool) True if the citation was present.
+        """
+        if not self._removeEdge(citingId, citedId):
+            return False
+        self._changed()
+        return True
+
+    def removeNodes(self, ids, deferCompaction=False):
+        """Remove all citations from and to the publications with the given
+        IDs, in time linear in their number of citations; citations of the
+        compacted part are left as tombstones.
+
+        Args:
+            ids (iterable): The IDs of the publications.
+            deferCompaction (bool): True to keep the tombstones until compact
+                is called, e.g. from a background thread, False to compact
+                right away if the buffered changes outgrow the threshold.
+        Returns:
+            (int) The number of removed citations.
+        """
+        ids = set(ids)
+        removedCount = 0
+        for id in ids:
+            for citedId in self.successors(id):
+                removedCount += self._removeEdge(id, citedId)
+            for citingId in self.predecessors(id):
+                if citingId not in ids:
+                    removedCount += self._removeEdge(citingId, id)
+        if deferCompaction:
+            self._pendingChanges += removedCount
+        elif removedCount:
+            self._changed(removedCount)
+        return removedCount
+
+    def hasEdge(self, citingId, citedId):
+        """Check whether the publication with the first ID cites the
+        publication with the second ID.
+
+        Args:
+            citingId (int): The ID of the citing publication.
+            citedId (int): The ID of the cited publication.
+        """
+        added = self._addedForward.get(citingId)
+        if added is not None and citedId in added:
+            return True
+        return (citingId, citedId) not in self._removed and \
+            self._inRow(self._forwardPointers, self._forwardIds, citingId,
+                        citedId)
+
+    def successors(self, id):
+        """Return the IDs of the publications cited by the given publication.
+
+        Args:
+            id (int): The ID of the citing publication.
+        Returns:
+            (list) The IDs of the cited publications.
+        """
+        removed = self._removed
+        result = [citedId for citedId in
+                  self._row(self._forwardPointers, self._forwardIds, id)
+                  if not removed or (id, citedId) not in removed]
+        result.extend(self._addedForward.get(id, ()))
+        return result
+
+    def predecessors(self, id):
+        """Return the IDs of the publications citing the given publication.
+
+        Args:
+            id (int): The ID of the cited publication.
+        Returns:
+            (list) The IDs of the citing publications.
+        """
+        removed = self._removed
+        result = [citingId for citingId in
+                  self._row(self._reversePointers, self._reverseIds, id)
+                  if not removed or (citingId, id) not in removed]
+        result.extend(self._addedReverse.get(id, ()))
+        return result
+
+    def outDegree(self, id):
+        """Return the number of publications cited by the given publication.
+        """
+        return len(self.successors(id))
+
+    def inDegree(self, id):
+        """Return the number of publications citing the given publication.
+        """
+        return len(self.predecessors(id))
+
+    def getEdgeCount(self):
+        """Return the number of citations stored in this graph.
+        """
+        return len(self._forwardIds) - len(self._removed) + \
+            sum(len(ids) for ids in self._addedForward.values())
+
+    def getPendingChangeCount(self):
+        """Return the number of buffered additions and removals not yet
+        merged into the CSR arrays by compact.
+        """
+        return self._pendingChanges
+
+    def getMemoryUsage(self):
+        """Return the approximate number of bytes used by the compacted arrays
+        of this graph; the delta buffer is not included.
+        """
+        return sum(len(values) * values.itemsize for values in
+                   (self._nodeIds, self._forwardPointers, self._forwardIds,
+                    self._reversePointers, self._reverseIds))
+
+    def compact(self):
+        """Merge the delta buffer and the tombstones into the CSR arrays.
+
+        Post:
+            The delta buffer and the tombstones of this graph are empty.
+        """
+        changedIds = set(self._addedForward)
+        changedIds.update(self._addedReverse)
+        for citingId, citedId in self._removed:
+            changedIds.add(citingId)
+            changedIds.add(citedId)
+
+        compacted = (array('q'), array('q', [0]), array('q'),
+                     array('q', [0]), array('q'))
+        # Rows without buffered changes are copied over in whole runs, only
+        # the changed rows are merged one by one.
+        position = 0
+        for id in sorted(changedIds):
+            end = bisect.bisect_left(self._nodeIds, id, position)
+            self._copyRows(compacted, position, end)
+            position = end
+            if position < len(self._nodeIds) and self._nodeIds[position] == id:
+                citedIds = self._mergeRow(self._forwardIds[
+                    self._forwardPointers[position]:
+                    self._forwardPointers[position + 1]],
+                    self._addedForward.get(id), id, True)
+                citingIds = self._mergeRow(self._reverseIds[
+                    self._reversePointers[position]:
+                    self._reversePointers[position + 1]],
+                    self._addedReverse.get(id), id, False)
+                position += 1
+            else:
+                citedIds = sorted(self._addedForward.get(id, ()))
+                citingIds = sorted(self._addedReverse.get(id, ()))
+            if citedIds or citingIds:
+                nodeIds, forwardPointers, forwardIds, reversePointers, \
+                    reverseIds = compacted
+                nodeIds.append(id)
+                forwardIds.extend(citedIds)
+                forwardPointers.append(len(forwardIds))
+                reverseIds.extend(citingIds)
+                reversePointers.append(len(reverseIds))
+        self._copyRows(compacted, position, len(self._nodeIds))
+
+        self._nodeIds, self._forwardPointers, self._forwardIds, \
+            self._reversePointers, self._reverseIds = compacted
+        self._addedForward.clear()
+        self._addedReverse.clear()
+        self._removed.clear()
+        self._pendingChanges = 0
+
+    def clear(self):
+        """Remove all citations of this graph.
+        """
+        self.__init__(self._compactionRatio, self._minCompactionSize)
+
+    def _changed(self, count=1):
+        self._pendingChanges += count
+        if self._pendingChanges >= max(self._minCompactionSize,
+                                       self._compactionRatio *
+                                       (len(self._nodeIds) +
+                                        len(self._forwardIds))):
+            self.compact()
+
+    def _copyRows(self, compacted, start, end):
+        if start == end:
+            return
+        nodeIds = compacted[0]
+        nodeIds.extend(self._nodeIds[start:end])
+        for pointers, ids, newPointers, newIds in (
+                (self._forwardPointers, self._forwardIds,
+                 compacted[1], compacted[2]),
+                (self._reversePointers, self._reverseIds,
+                 compacted[3], compacted[4])):
+            offset = len(newIds) - pointers[start]
+            newIds.extend(ids[pointers[start]:pointers[end]])
+            segment = pointers[start + 1:end + 1]
+            if offset:
+                segment = array('q', [pointer + offset for pointer in segment])
+            newPointers.extend(segment)
+
+    def _mergeRow(self, row, added, id, forward):
+        if self._removed:
+            removed = self._removed
+            if forward:
+                row = [other for other in row if (id, other) not in removed]
+            else:
+                row = [other for other in row if (other, id) not in removed]
+        if added:
+            row = list(row)
+            row.extend(added)
+            row.sort()
+        return row
+
+    def _removeEdge(self, citingId, citedId):
+        added = self._addedForward.get(citingId)
+        if added is not None and citedId in added:
+            self._discardAdded(citingId, citedId)
+        elif self._inRow(self._forwardPointers, self._forwardIds, citingId,
+                         citedId) and (citingId, citedId) not in self._removed:
+            self._removed.add((citingId, citedId))
+        else:
+            return False
+        return True
+
+    def _discardAdded(self, citingId, citedId):
+        for buffer, key, value in ((self._addedForward, citingId, citedId),
+                                   (self._addedReverse, citedId, citingId)):
+            ids = buffer[key]
+            ids.discard(value)
+            if not ids:
+                del buffer[key]
+
+    def _rowBounds(self, pointers, id):
+        position = bisect.bisect_left(self._nodeIds, id)
+        if position == len(self._nodeIds) or self._nodeIds[position] != id:
+            return 0, 0
+        return pointers[position], pointers[position + 1]
+
+    def _row(self, pointers, ids, id):
+        start, end = self._rowBounds(pointers, id)
+        return ids[start:end]
+
+    def _inRow(self, pointers, ids, id, neighbourId):
+        start, end = self._rowBounds(pointers, id)
+        position = bisect.bisect_left(ids, neighbourId, start, end)
+        return position < end and ids[position] == neighbourId
+
+
+class CitationSet(object):
+    """Set-like adapter exposing the citations of one publication stored in a
+    CSRCitationGraph, or any graph with the same methods, as Publication
+    objects, so Publication can keep using its cites and citedBy attributes
+    unchanged.
+
+    Both directions of a citation are stored as a single edge, so adding or
+    removing it through either end is enough, and doing it a second time
+    through the other end is a no-op.
+    """
+
+    __slots__ = ('_database', '_graph', '_id', '_forward')
+
+    def __init__(self, database, graph, id, forward):
+        """Initialize this new CitationSet.
+
+        Args:
+            database (ReferenceDataBase): The database owning the graph, 
+                which resolves IDs through getPublicationsWithIDs.
+            graph (CSRCitationGraph): The graph storing the citations.
+            id (int): The ID of the publication whose citations are exposed.
+            forward (bool): True to expose the cited publications, False to
+                expose the citing publications.
+        """
+        self._database = database
+        self._graph = graph
+        self._id = id
+        self._forward = forward
+
+    def _edge(self, other):
+        if self._forward:
+            return self._id, other.id
+        return other.id, self._id
+
+    def _ids(self):
+        if self._forward:
+            return self._graph.successors(self._id)
+        return self._graph.predecessors(self._id)
+
+    def __contains__(self, other):
+        return other.database is self._database and \
+            self._graph.hasEdge(*self._edge(other))
+
+    def __iter__(self):
+        return iter(self._database.getPublicationsWithIDs(self._ids()))
+
+    def __len__(self):
+        return len(self._ids())
+
+    def add(self, other):
+        """Add the citation between the exposed publication and the given one.
+
+        Throws:
+            IllegalValueException: The given publication does not belong to
+            the database of the graph.
+        """
+        if other.database is not self._database:
+            raise IllegalValueException("A compact citation graph can only \
+            hold citations between publications of its own database.")
+        self._graph.addEdge(*self._edge(other))
+
+    def remove(self, other):
+        """Remove the citation between the exposed publication and the given
+        one, if any.
+        """
+        if other.database is self._database:
+            self._graph.removeEdge(*self._edge(other))
+
+    discard = remove
+
+    def copy(self):
+        """Return a set of the publications currently exposed.
+        """
+        return set(self)
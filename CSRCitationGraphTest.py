@@ -0,0 +1,64 @@
+"""Unit Test for CSRCitationGraph
+
+..:: moduleauthors:: Wang Bo <wangbomicro@gmail.com>
+"""
+from CSRCitationGraph import CSRCitationGraph
+import unittest
+
+class CSRCitationGraphTest(unittest.TestCase):
+    """Unit Test for CSRCitationGraph"""
+
+    def setUp(self):
+        self.graph = CSRCitationGraph(minCompactionSize=4)
+        self.graph.addEdge(1003, 1001)
+        self.graph.addEdge(1003, 1002)
+        self.graph.addEdge(1002, 1001)
+
+    def testEdges(self):
+        self.assertTrue(self.graph.hasEdge(1003, 1001))
+        self.assertFalse(self.graph.hasEdge(1001, 1003))
+        self.assertFalse(self.graph.addEdge(1003, 1001))
+        self.assertEqual([1001, 1002], sorted(self.graph.successors(1003)))
+        self.assertEqual([1002, 1003], sorted(self.graph.predecessors(1001)))
+        self.assertEqual(3, self.graph.getEdgeCount())
+
+    def testCompaction(self):
+        self.graph.addEdge(1004, 1001)
+        self.assertEqual(0, len(self.graph._addedForward))
+        self.assertEqual(4, len(self.graph._forwardIds))
+        self.assertTrue(self.graph.removeEdge(1003, 1001))
+        self.assertFalse(self.graph.removeEdge(1003, 1001))
+        self.assertEqual([1002, 1004], sorted(self.graph.predecessors(1001)))
+        self.assertTrue(self.graph.addEdge(1003, 1001))
+        self.assertEqual([1002, 1003, 1004],
+                         sorted(self.graph.predecessors(1001)))
+        self.graph.removeEdge(1004, 1001)
+        self.graph.compact()
+        self.assertEqual(3, self.graph.getEdgeCount())
+        self.assertEqual([1002, 1003], sorted(self.graph.predecessors(1001)))
+        self.assertEqual([], self.graph.successors(1004))
+
+    def testLargeIds(self):
+        large = 2 ** 40
+        self.graph.addEdge(large + 1, large)
+        self.graph.compact()
+        self.assertTrue(self.graph.hasEdge(large + 1, large))
+        self.assertEqual([large], self.graph.successors(large + 1))
+        self.assertEqual([large + 1], self.graph.predecessors(large))
+
+    def testRemoveNodes(self):
+        self.graph.compact()
+        self.graph.addEdge(1004, 1002)
+        self.assertEqual(3, self.graph.removeNodes([1002, 1004],
+                                                   deferCompaction=True))
+        self.assertEqual([1001], self.graph.successors(1003))
+        self.assertEqual([], self.graph.predecessors(1002))
+        self.assertEqual(1, self.graph.getEdgeCount())
+        self.assertEqual(4, self.graph.getPendingChangeCount())
+        self.graph.compact()
+        self.assertEqual(0, self.graph.getPendingChangeCount())
+        self.assertEqual(1, len(self.graph._forwardIds))
+        self.assertEqual([1003], self.graph.predecessors(1001))
+
+if __name__ == "__main__":
+    unittest.main()
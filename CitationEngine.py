@@ -0,0 +1,225 @@
+"""An iterative, memoized engine for transitive citation queries.
+
+..:: moduleauthor: Wang Bo <wangbomicro@gmail.com>
+..:: invar: Every cached result equals the set of publications that directly
+    or indirectly cite the publication it is cached for.
+"""
+from Exceptions import QueryCancelledException
+from collections import OrderedDict
+import itertools
+import threading
+
+class CitationEngine(object):
+    """Engine answering "which publications directly or indirectly cite this
+    publication" by an iterative breadth-first search over the citedBy sets.
+
+    Full (unbounded) results are memoized per publication in a bounded
+    least-recently-used cache. The ReferenceDataBase reports every citation
+    change through citationChanged, which drops exactly the cached results
+    the change can affect, found through a reverse map from each publication
+    to the cached results it is part of or is cached for. Citations between publications that are both
+    outside the database are not reported and thus not accounted for.
+    """
+
+    # The number of publications visited between checks of the cancel event.
+    _cancelCheckInterval = 1024
+
+    def __init__(self, maxCacheSize=10000, instrumentation=None):
+        """Initialize this new CitationEngine with an empty cache.
+
+        Args:
+            maxCacheSize (int): The maximum number of cached results.
+            instrumentation (Instrumentation): The statistics to report the
+                cache lookups and visited publications to, if enabled.
+        Post:
+            No results are cached by this engine.
+        """
+        self._cache = OrderedDict()
+        self._containing = dict()
+        self._maxCacheSize = maxCacheSize
+        self._instrumentation = instrumentation
+        # Queries run concurrently, so cache updates are serialized.
+        self._lock = threading.Lock()
+
+    def findCiting(self, publication, maxDepth=None, cancelEvent=None):
+        """Return all publications that directly or indirectly cite the given
+        publication.
+
+        Args:
+            publication (Publication): The publication to be searched.
+            maxDepth (int): The maximum length of the citation chains to be
+                followed, 1 for direct citations only. None for no limit.
+            cancelEvent (threading.Event): An event that stops the search
+                once set.
+        Returns:
+            (frozenset) The publications citing the given publication.
+        Throws:
+            QueryCancelledException: The cancel event was set before the
+            search finished.
+        """
+        if maxDepth is None:
+            return self._closure(publication, cancelEvent)
+        return frozenset(self._boundedSearch(publication, maxDepth,
+                                             cancelEvent))
+
+    def iterCiting(self, publication, maxDepth=None):
+        """Yield the publications that directly or indirectly cite the given
+        publication, in breadth-first order, searching only as far as the
+        caller consumes. The cache is not used, so the order only depends
+        on the citations.
+
+        Args:
+            publication (Publication): The publication to be searched.
+            maxDepth (int): The maximum length of the citation chains to be
+                followed, 1 for direct citations only. None for no limit.
+        """
+        reached = set()
+        frontier = [publication]
+        depth = 0
+        while frontier and (maxDepth is None or depth < maxDepth):
+            nextFrontier = []
+            for current in frontier:
+                # Copied, as the citations may change between two steps.
+                for citing in current.getCitedBySnapshot():
+                    if citing not in reached:
+                        reached.add(citing)
+                        nextFrontier.append(citing)
+                        yield citing
+            frontier = nextFrontier
+            depth += 1
+
+    def countCiting(self, publication, maxDepth=None, cancelEvent=None):
+        """Return the number of publications that directly or indirectly cite
+        the given publication.
+
+        Args:
+            publication (Publication): The publication to be searched.
+            maxDepth (int): The maximum length of the citation chains to be
+                followed, 1 for direct citations only. None for no limit.
+            cancelEvent (threading.Event): An event that stops the search
+                once set.
+        Returns:
+            (int) The number of publications citing the given publication.
+        Throws:
+            QueryCancelledException: The cancel event was set before the
+            search finished.
+        """
+        return len(self.findCiting(publication, maxDepth, cancelEvent))
+
+    def citationChanged(self, citing, cited):
+        """Drop the cached results affected by adding or removing a citation.
+
+        A result cached for a publication changes if and only if the cited
+        publication is that publication or already reaches it.
+
+        Args:
+            citing (Publication): The citing end of the changed citation.
+            cited (Publication): The cited end of the changed citation.
+        """
+        with self._lock:
+            for publication in list(self._containing.get(cited, ())):
+                self._drop(publication)
+
+    def citationsChanged(self, citedPublications):
+        """Drop the cached results affected by adding or removing citations
+        to any of the given publications.
+
+        Args:
+            citedPublications (set): The cited ends of the changed citations.
+        """
+        if not citedPublications:
+            return
+        with self._lock:
+            stale = set()
+            for cited in citedPublications:
+                stale.update(self._containing.get(cited, ()))
+            for publication in stale:
+                self._drop(publication)
+
+    def clear(self):
+        """Remove all cached results.
+        """
+        with self._lock:
+            self._cache.clear()
+            self._containing.clear()
+
+    def getCacheSize(self):
+        """Return the number of cached results.
+        """
+        return len(self._cache)
+
+    def _closure(self, publication, cancelEvent=None):
+        instrumentation = self._instrumentation
+        isInstrumented = instrumentation is not None and \
+            instrumentation.isEnabled()
+        with self._lock:
+            result = self._cache.get(publication)
+            if result is not None:
+                self._cache.move_to_end(publication)
+        if isInstrumented:
+            instrumentation.countLookup('citationCache', result is not None)
+        if result is not None:
+            return result
+
+        reached = set()
+        queue = [publication]
+        steps = 0
+        while queue:
+            steps += 1
+            if cancelEvent is not None and steps % self._cancelCheckInterval == 0 \
+                    and cancelEvent.is_set():
+                raise QueryCancelledException()
+            current = queue.pop()
+            cached = self._cache.get(current) if current is not publication \
+                else None
+            if cached is not None:
+                reached.update(cached)
+                continue
+            for citing in current.citedBy:
+                if citing not in reached:
+                    reached.add(citing)
+                    queue.append(citing)
+
+        if isInstrumented:
+            instrumentation.addVisited(steps)
+        result = frozenset(reached)
+        with self._lock:
+            if publication not in self._cache:
+                self._cache[publication] = result
+                for member in itertools.chain((publication,), result):
+                    self._containing.setdefault(member, set()).add(publication)
+                if len(self._cache) > self._maxCacheSize:
+                    self._drop(next(iter(self._cache)))
+        return result
+
+    def _drop(self, publication):
+        """Remove the result cached for the given publication, and its
+        entries in the reverse map; the lock must be held."""
+        result = self._cache.pop(publication)
+        for member in itertools.chain((publication,), result):
+            keys = self._containing[member]
+            keys.discard(publication)
+            if not keys:
+                del self._containing[member]
+
+    def _boundedSearch(self, publication, maxDepth, cancelEvent=None):
+        reached = set()
+        frontier = [publication]
+        depth = 0
+        visited = 0
+        while frontier and depth < maxDepth:
+            if cancelEvent is not None and cancelEvent.is_set():
+                raise QueryCancelledException()
+            visited += len(frontier)
+            nextFrontier = []
+            for current in frontier:
+                for citing in current.citedBy:
+                    if citing not in reached:
+                        reached.add(citing)
+                        nextFrontier.append(citing)
+            frontier = nextFrontier
+            depth += 1
+        if self._instrumentation is not None and \
+                self._instrumentation.isEnabled():
+            self._instrumentation.addVisited(visited)
+        return reached
@@ -0,0 +1,66 @@
+"""Unit Test for CitationEngine
+
+..:: moduleauthors:: Wang Bo <wangbomicro@gmail.com>
+"""
+from CitationEngine import CitationEngine
+from Publication import Publication
+import unittest
+
+class CitationEngineTest(unittest.TestCase):
+    """Unit Test for CitationEngine"""
+
+    _authors = ["Wang, Bo"]
+
+    def setUp(self):
+        self.engine = CitationEngine(maxCacheSize=2)
+        self.root = Publication("root", self._authors, 2000)
+        self.left = Publication("left", self._authors, 2001)
+        self.right = Publication("right", self._authors, 2001)
+        self.top = Publication("top", self._authors, 2002)
+        self.left.addAsCite(self.root)
+        self.right.addAsCite(self.root)
+        self.top.addAsCite(self.left)
+        self.top.addAsCite(self.right)
+
+    def testFindCiting(self):
+        self.assertEqual(frozenset([self.left, self.right, self.top]),
+                         self.engine.findCiting(self.root))
+        self.assertEqual(frozenset([self.left, self.right]),
+                         self.engine.findCiting(self.root, maxDepth=1))
+        self.assertEqual(3, self.engine.countCiting(self.root))
+        self.assertEqual(0, self.engine.countCiting(self.top))
+
+    def testCitationChanged(self):
+        self.engine.findCiting(self.root)
+        self.engine.findCiting(self.top)
+        self.assertEqual(2, self.engine.getCacheSize())
+        self.engine.citationChanged(self.top, self.left)
+        self.assertEqual(1, self.engine.getCacheSize())
+        self.engine.findCiting(self.left)
+        self.engine.findCiting(self.right)
+        self.assertEqual(2, self.engine.getCacheSize())
+
+    def testCitationsChanged(self):
+        self.engine.findCiting(self.left)
+        self.engine.findCiting(self.right)
+        self.engine.citationsChanged(set([self.right, self.root]))
+        self.assertEqual(1, self.engine.getCacheSize())
+        self.assertEqual(frozenset([self.top]),
+                         self.engine.findCiting(self.left))
+        self.engine.citationsChanged(set([self.top]))
+        self.assertEqual(0, self.engine.getCacheSize())
+
+    def testEvictionUpdatesReverseMap(self):
+        self.engine.findCiting(self.root)
+        self.engine.findCiting(self.left)
+        self.engine.findCiting(self.top)
+        self.assertEqual(2, self.engine.getCacheSize())
+        self.assertEqual(set([self.left, self.top]),
+                         set(self.engine._containing))
+        self.engine.citationChanged(self.right, self.root)
+        self.assertEqual(2, self.engine.getCacheSize())
+        self.engine.clear()
+        self.assertEqual({}, self.engine._containing)
+
+if __name__ == "__main__":
+    unittest.main()
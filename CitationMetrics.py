@@ -0,0 +1,174 @@
+"""Graph-wide ranking metrics over the citation graph of a reference
+database: PageRank, citation counts and h-index.
+
+..:: moduleauthor: Wang Bo <wangbomicro@gmail.com>
+"""
+from array import array
+import heapq
+
+
+class CitationMetrics(object):
+    """Ranking metrics over a snapshot of the citation graph of a database.
+
+    The graph is read once into flat arrays: the publication IDs in sorted
+    order, and for every publication the positions of the publications
+    citing it, in compressed sparse row form. Power iteration then runs over
+    those arrays. Create a new CitationMetrics to see later changes of the
+    database.
+    """
+
+    def __init__(self, dataBase):
+        """Initialize this new CitationMetrics with the current citation
+        graph of the given database.
+
+        Args:
+            dataBase (ReferenceDataBase): The database to be measured.
+        """
+        publications = sorted(dataBase.getAllPublications(),
+                              key=lambda publication: publication.id)
+        self._ids = array('q', (publication.id for publication in publications))
+        positions = dict((id, position)
+                         for position, id in enumerate(self._ids))
+        self._outDegrees = array('l', [0]) * len(publications)
+        citing = [[] for publication in publications]
+        for position, publication in enumerate(publications):
+            for cited in publication.getAllCites():
+                citedPosition = positions.get(cited.id)
+                if citedPosition is not None:
+                    citing[citedPosition].append(position)
+                    self._outDegrees[position] += 1
+        self._pointers = array('l', [0])
+        self._citing = array('l')
+        for positionsCiting in citing:
+            self._citing.extend(positionsCiting)
+            self._pointers.append(len(self._citing))
+        self._authors = [publication.getAuthorsName()
+                         for publication in publications]
+        self._iterationCount = 0
+
+    def getPublicationCount(self):
+        """Return the number of publications in the measured graph.
+        """
+        return len(self._ids)
+
+    def getIterationCount(self):
+        """Return the number of iterations of the last pageRank call.
+        """
+        return self._iterationCount
+
+    def inDegrees(self):
+        """Return the number of citations of every publication.
+
+        Returns:
+            (dict) The number of publications citing each publication ID.
+        """
+        pointers = self._pointers
+        return dict((id, pointers[position + 1] - pointers[position])
+                    for position, id in enumerate(self._ids))
+
+    def rankByInDegree(self, k=10):
+        """Return the most cited publications.
+
+        Args:
+            k (int): The number of results to be returned.
+        Returns:
+            (list) At most k (ID, number of citations) pairs, most cited
+            first, ties broken by lowest ID.
+        """
+        return heapq.nsmallest(k, self.inDegrees().items(),
+                               key=lambda item: (-item[1], item[0]))
+
+    def pageRank(self, damping=0.85, tolerance=1.0e-6, maxIterations=100,
+                 start=None):
+        """Compute the PageRank of every publication by power iteration,
+        citations passing rank from the citing to the cited publication.
+
+        The rank of publications citing nothing is spread over all
+        publications, so the ranks always sum to 1.
+
+        Args:
+            damping (float): The probability of following a citation.
+            tolerance (float): The L1 change of the ranks below which the
+                iteration stops.
+            maxIterations (int): The maximum number of iterations.
+            start (dict): Ranks by publication ID to start from, e.g. the
+                result of an earlier call; publications missing from it
+                start at 1/n.
+        Returns:
+            (dict) The PageRank of each publication ID.
+        """
+        count = len(self._ids)
+        self._iterationCount = 0
+        if count == 0:
+            return dict()
+        ranks = self._startRanks(start)
+        inverseOutDegrees = [1.0 / degree if degree else 0.0
+                             for degree in self._outDegrees]
+        dangling = [position for position, degree in
+                    enumerate(self._outDegrees) if degree == 0]
+        pointers, citing = self._pointers, self._citing
+        spans = [(pointers[position], pointers[position + 1])
+                 for position in range(count)]
+        for iteration in range(maxIterations):
+            contributions = list(map(float.__mul__, ranks, inverseOutDegrees))
+            danglingRank = sum(map(ranks.__getitem__, dangling))
+            base = (1.0 - damping + damping * danglingRank) / count
+            getContribution = contributions.__getitem__
+            newRanks = [base + damping * sum(map(getContribution,
+                                                 citing[begin:end]))
+                        for begin, end in spans]
+            change = sum(abs(new - old) for new, old in zip(newRanks, ranks))
+            ranks = newRanks
+            self._iterationCount = iteration + 1
+            if change < tolerance:
+                break
+        return dict(zip(self._ids, ranks))
+
+    def authorPageRanks(self, ranks):
+        """Sum the given publication ranks over the publications of every
+        author.
+
+        Args:
+            ranks (dict): The rank of each publication ID, e.g. the result of
+                pageRank.
+        Returns:
+            (dict) The summed rank of each author name.
+        """
+        authorRanks = dict()
+        for id, names in zip(self._ids, self._authors):
+            rank = ranks.get(id, 0.0)
+            for name in set(names):
+                authorRanks[name] = authorRanks.get(name, 0.0) + rank
+        return authorRanks
+
+    def hIndices(self):
+        """Compute the h-index of every author: the largest h such that h of
+        the author's publications are cited at least h times each.
+
+        Returns:
+            (dict) The h-index of each author name.
+        """
+        pointers = self._pointers
+        counts = dict()
+        for position, names in enumerate(self._authors):
+            citations = pointers[position + 1] - pointers[position]
+            for name in set(names):
+                counts.setdefault(name, []).append(citations)
+        hIndices = dict()
+        for name, citations in counts.items():
+            citations.sort(reverse=True)
+            h = 0
+            while h < len(citations) and citations[h] > h:
+                h += 1
+            hIndices[name] = h
+        return hIndices
+
+    def _startRanks(self, start):
+        count = len(self._ids)
+        if not start:
+            return [1.0 / count] * count
+        ranks = [start.get(id, 1.0 / count) for id in self._ids]
+        total = sum(ranks)
+        if total <= 0:
+            return [1.0 / count] * count
+        return [rank / total for rank in ranks]
@@ -0,0 +1,66 @@
+"""Unit Test for CitationMetrics
+
+..:: moduleauthors:: Wang Bo <wangbomicro@gmail.com>
+"""
+from CitationMetrics import CitationMetrics
+from Publication import Publication
+from ReferenceDataBase import ReferenceDataBase
+import unittest
+
+class CitationMetricsTest(unittest.TestCase):
+    """Unit Test for CitationMetrics"""
+
+    def setUp(self):
+        self.dataBase = ReferenceDataBase()
+        self.first = Publication("Gas leak rate study of MEMS",
+                                 ["Wang, Bo", "Wevers, Martine"], 1990)
+        self.second = Publication("Packaging of MEMS", ["Wang, Bo"], 2000)
+        self.third = Publication("Thin film getters", ["Mao, Shengping"], 2010)
+        self.fourth = Publication("Bonding", ["Mao, Shengping"], 2012)
+        self.dataBase.addPublications([self.first, self.second, self.third,
+                                       self.fourth])
+        self.dataBase.addCitations([(self.second.id, self.first.id),
+                                    (self.third.id, self.first.id),
+                                    (self.third.id, self.second.id),
+                                    (self.fourth.id, self.first.id),
+                                    (self.fourth.id, self.second.id)])
+        self.metrics = CitationMetrics(self.dataBase)
+
+    def testInDegrees(self):
+        self.assertEqual({self.first.id: 3, self.second.id: 2,
+                          self.third.id: 0, self.fourth.id: 0},
+                         self.metrics.inDegrees())
+        self.assertEqual([(self.first.id, 3), (self.second.id, 2),
+                          (self.third.id, 0)], self.metrics.rankByInDegree(3))
+
+    def testPageRank(self):
+        ranks = self.metrics.pageRank(tolerance=1.0e-10)
+        self.assertAlmostEqual(1.0, sum(ranks.values()))
+        self.assertEqual(ranks[self.third.id], ranks[self.fourth.id])
+        self.assertTrue(ranks[self.first.id] > ranks[self.second.id] >
+                        ranks[self.third.id])
+        # Every rank satisfies the PageRank equation.
+        dangling = ranks[self.first.id]
+        self.assertAlmostEqual(
+            0.15 / 4 + 0.85 * (dangling / 4 + ranks[self.second.id] +
+                               ranks[self.third.id] / 2 +
+                               ranks[self.fourth.id] / 2),
+            ranks[self.first.id])
+        coldIterations = self.metrics.getIterationCount()
+        self.metrics.pageRank(tolerance=1.0e-10, start=ranks)
+        self.assertTrue(self.metrics.getIterationCount() < coldIterations)
+        authorRanks = self.metrics.authorPageRanks(ranks)
+        self.assertAlmostEqual(ranks[self.first.id] + ranks[self.second.id],
+                               authorRanks["B. Wang"])
+
+    def testHIndices(self):
+        self.assertEqual({"B. Wang": 2, "M. Wevers": 1, "S. Mao": 0},
+                         self.metrics.hIndices())
+
+    def testEmptyDataBase(self):
+        metrics = CitationMetrics(ReferenceDataBase(compactGraph=True))
+        self.assertEqual({}, metrics.pageRank())
+        self.assertEqual({}, metrics.hIndices())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+"""A read-only view of the citations of a publication.
+
+..:: moduleauthor: Wang Bo <wangbomicro@gmail.com>
+"""
+from collections.abc import Set
+
+class CitationView(Set):
+    """Read-only view of the cited or the citing publications of a
+    publication.
+
+    The view reads the citations of the publication on every use, so it
+    follows later changes without copying them. It can be sized, iterated,
+    tested for membership, and compared and combined like a set; combining
+    gives a new set. As with a set, the citations must not change while the
+    view is iterated; iterate over a copy instead.
+    """
+
+    __slots__ = ('_publication', '_attribute')
+
+    def __init__(self, publication, forward):
+        """Initialize this new CitationView.
+
+        Args:
+            publication (Publication): The publication whose citations are
+                viewed.
+            forward (bool): True to view the cited publications, False to
+                view the citing publications.
+        """
+        self._publication = publication
+        self._attribute = 'cites' if forward else 'citedBy'
+
+    def __contains__(self, other):
+        return other in getattr(self._publication, self._attribute)
+
+    def __iter__(self):
+        return iter(getattr(self._publication, self._attribute))
+
+    def __len__(self):
+        return len(getattr(self._publication, self._attribute))
+
+    def __repr__(self):
+        return "{}({!r})".format(type(self).__name__, self.copy())
+
+    @classmethod
+    def _from_iterable(cls, iterable):
+        return set(iterable)
+
+    def copy(self):
+        """Return a set of the publications currently viewed.
+        """
+        return set(getattr(self._publication, self._attribute))
@@ -0,0 +1,58 @@
+"""Unit Test for CitationView
+
+..:: moduleauthors:: Wang Bo <wangbomicro@gmail.com>
+"""
+from CitationView import CitationView
+from Publication import Publication
+from ReferenceDataBase import ReferenceDataBase
+import unittest
+
+class CitationViewTest(unittest.TestCase):
+    """Unit Test for CitationView"""
+
+    _authors = ["Wang, Bo"]
+
+    def setUp(self):
+        self.cited = Publication("Gas leak rate study of MEMS", self._authors,
+                                 1990)
+        self.citing = Publication("Packaging of MEMS", self._authors, 2012)
+        self.other = Publication("Thin film getters", self._authors, 2014)
+
+    def testView(self):
+        cites = self.citing.getAllCites()
+        citedBy = self.cited.getAllCitedBy()
+        self.assertIsInstance(cites, CitationView)
+        self.assertEqual(0, len(cites))
+        self.citing.addAsCite(self.cited)
+        self.other.addAsCite(self.cited)
+        self.assertEqual(1, len(cites))
+        self.assertIn(self.cited, cites)
+        self.assertNotIn(self.other, cites)
+        self.assertEqual(set([self.citing, self.other]), citedBy)
+        self.assertEqual(set([self.citing]),
+                         citedBy & set([self.citing, self.cited]))
+        self.assertFalse(hasattr(cites, 'add'))
+        self.other.removeAsCite(self.cited)
+        self.assertEqual([self.citing], list(citedBy))
+
+    def testSnapshot(self):
+        self.citing.addAsCite(self.cited)
+        snapshot = self.cited.getCitedBySnapshot()
+        copy = self.cited.getAllCitedBy().copy()
+        self.other.addAsCite(self.cited)
+        self.assertEqual(set([self.citing]), snapshot)
+        self.assertEqual(set([self.citing]), copy)
+        self.assertEqual(set([self.cited]), self.other.getCitesSnapshot())
+
+    def testCompactGraph(self):
+        dataBase = ReferenceDataBase(compactGraph=True)
+        dataBase.addPublications([self.cited, self.citing, self.other])
+        citedBy = self.cited.getAllCitedBy()
+        dataBase.addCitations([(self.citing.id, self.cited.id),
+                               (self.other.id, self.cited.id)])
+        self.assertEqual(2, len(citedBy))
+        self.assertIn(self.other, citedBy)
+        self.assertEqual(set([self.citing, self.other]), citedBy)
+
+if __name__ == "__main__":
+    unittest.main()
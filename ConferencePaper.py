@@ -4,7 +4,7 @@ title, year, authors, the ConferencePaper also have a conference.
 ..:: moduleauthor: WangBo <wangbomicro@gmail.com> 
 """
 from Exceptions import IllegalStateException
-import Publication
+from Publication import Publication
 
 class ConferencePaper(Publication):
     """A class of conference paper as a special kind of publication. 
@@ -23,12 +23,14 @@ class ConferencePaper(Publication):
         IllegalAuthorException: if the given author is invalid
         IllegalYearException: if the given year is invalid
     """
+    __slots__ = ('_conference',)
+    
     _weight = 1.0
     
     def __init__(self, title, authors, year, conference):
         super(ConferencePaper, self).__init__(title = title, authors = authors, 
                                               year = year)
-        self._conference = conference
+        self._conference = self._strings.intern(conference)
 
     @property
     def conference(self):
@@ -48,4 +50,22 @@ class ConferencePaper(Publication):
         """
         if self.isTerminated():
             raise IllegalStateException("The instance already terminated.")
-        self._conference = val
\ No newline at end of file
+        with self._changeLocked():
+            self._checkChangeable('conference')
+            oldConference = self._conference
+            self._conference = self._strings.intern(val)
+            self._notifyDatabase('conference', oldConference)
+    
+    def __repr__(self):
+        """The internal representation of the ConferencePaper
+        """
+        return "ConferencePaper({title},{authors},{year},{conference})".\
+            format(title = self.title, authors = self.authors, year = self.year,
+                   conference = self.conference)
+    
+    def __str__(self):
+        """The string representation of the ConferencePaper
+        """
+        return "{authors}, {title}, {conference}, {year}".\
+            format(authors = ', '.join(self.getAuthorsName()), title = self.title, 
+                   conference = self.conference, year = self.year)
\ No newline at end of file
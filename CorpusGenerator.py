@@ -0,0 +1,177 @@
+"""A seeded generator of synthetic publication corpora, for benchmarks.
+
+..:: moduleauthor: Wang Bo <wangbomicro@gmail.com>
+"""
+from Book import Book
+from ConferencePaper import ConferencePaper
+from JournalArticle import JournalArticle
+import itertools
+import random
+import string
+
+class CorpusGenerator(object):
+    """Generator of publications and citations with the skew of real
+    bibliographies.
+
+    Authors are drawn with Zipf-distributed productivity: the author of rank
+    r writes a share of the publications proportional to 1 / r ** s. Title
+    words are drawn the same way from a vocabulary of made-up words. The
+    publications are ordered by year, and every publication cites earlier
+    ones: with the preferential share, the cited end of a random earlier
+    citation, otherwise a uniformly chosen publication. Publications are
+    thus cited with a probability growing with their citations, which gives
+    a power-law in-degree.
+
+    The same seed and parameters always give the same corpus.
+    """
+
+    _types = ('article', 'paper', 'book')
+    _typeWeights = (0.6, 0.3, 0.1)
+
+    def __init__(self, seed=1001, authorShare=0.5, zipfExponent=1.1,
+                 vocabularySize=5000, meanAuthors=3, meanCitations=5,
+                 preferentialShare=0.8, firstYear=1960, lastYear=2016):
+        """Initialize this new CorpusGenerator.
+
+        Args:
+            seed (int): The seed of the random numbers.
+            authorShare (float): The number of distinct authors, as a share
+                of the number of publications.
+            zipfExponent (float): The exponent s of the author and title
+                word distributions.
+            vocabularySize (int): The number of distinct title words.
+            meanAuthors (float): The mean number of authors per publication.
+            meanCitations (float): The mean number of publications cited by
+                a publication.
+            preferentialShare (float): The share of the citations going to a
+                publication chosen in proportion to its citations.
+            firstYear (int): The year of the first publication.
+            lastYear (int): The year of the last publication.
+        """
+        self._seed = seed
+        self._authorShare = authorShare
+        self._zipfExponent = zipfExponent
+        self._vocabularySize = vocabularySize
+        self._meanAuthors = meanAuthors
+        self._meanCitations = meanCitations
+        self._preferentialShare = preferentialShare
+        self._firstYear = firstYear
+        self._lastYear = lastYear
+
+    def generatePublications(self, count):
+        """Return the given number of new publications, in increasing order
+        of year; journal articles, conference papers and books.
+
+        Args:
+            count (int): The number of publications.
+        Returns:
+            (list) The publications, attached to no database.
+        """
+        generator = random.Random(self._seed)
+        words = self._vocabulary(generator)
+        wordWeights = self._zipfWeights(len(words))
+        authorCount = max(1, int(count * self._authorShare))
+        authorWeights = self._zipfWeights(authorCount)
+        venues = ["Venue " + self._word(generator, 6) for number in range(50)]
+        span = self._lastYear - self._firstYear + 1
+        publications = []
+        for position in range(count):
+            year = self._firstYear + position * span // count
+            title = " ".join(generator.choices(
+                words, cum_weights=wordWeights,
+                k=generator.randint(3, 10))).capitalize()
+            ranks = set(generator.choices(
+                range(authorCount), cum_weights=authorWeights,
+                k=self._geometric(generator, self._meanAuthors)))
+            authors = [self._authorName(rank) for rank in sorted(ranks)]
+            type = generator.choices(self._types, self._typeWeights)[0]
+            venue = generator.choice(venues)
+            if type == 'article':
+                publications.append(JournalArticle(
+                    title, authors, venue, generator.randint(1, 12), year))
+            elif type == 'paper':
+                publications.append(ConferencePaper(title, authors, year,
+                                                    venue))
+            else:
+                publications.append(Book(title, authors, year, venue))
+        return publications
+
+    def generateCitations(self, count):
+        """Return the citations between the given number of publications, as
+        given by generatePublications.
+
+        Args:
+            count (int): The number of publications.
+        Returns:
+            (list) The (citing position, cited position) pairs, positions in
+            the list of publications; the cited position is always lower.
+        """
+        generator = random.Random(self._seed + 1)
+        citedPositions = []
+        pairs = []
+        for position in range(1, count):
+            cited = set()
+            for citation in range(self._geometric(
+                    generator, self._meanCitations + 1) - 1):
+                if citedPositions and \
+                        generator.random() < self._preferentialShare:
+                    cited.add(generator.choice(citedPositions))
+                else:
+                    cited.add(generator.randrange(position))
+            for citedPosition in sorted(cited):
+                pairs.append((position, citedPosition))
+                citedPositions.append(citedPosition)
+        return pairs
+
+    def populate(self, dataBase, count):
+        """Add the given number of generated publications and the citations
+        between them to the given database.
+
+        Args:
+            dataBase (ReferenceDataBase): The database to be filled.
+            count (int): The number of publications.
+        Returns:
+            (list) The added publications, in increasing order of year.
+        """
+        publications = self.generatePublications(count)
+        ids = dataBase.addPublications(publications)
+        dataBase.addCitations(
+            (ids[citing], ids[cited])
+            for citing, cited in self.generateCitations(count)
+            if publications[citing].canCites(publications[cited]))
+        return publications
+
+    @staticmethod
+    def _authorName(rank):
+        """Return the "Last, First" name of the author of the given rank."""
+        letters = []
+        rank += 1
+        while rank:
+            rank, digit = divmod(rank - 1, 26)
+            letters.append(string.ascii_lowercase[digit])
+        return "Author" + "".join(reversed(letters)) + ", Bo"
+
+    def _zipfWeights(self, count):
+        """Return the cumulative Zipf weights of the ranks below count."""
+        return list(itertools.accumulate(
+            1.0 / rank ** self._zipfExponent for rank in range(1, count + 1)))
+
+    def _vocabulary(self, generator):
+        words = set()
+        while len(words) < self._vocabularySize:
+            words.add(self._word(generator, generator.randint(3, 10)))
+        return sorted(words)
+
+    @staticmethod
+    def _word(generator, length):
+        return "".join(generator.choice(string.ascii_lowercase)
+                       for letter in range(length))
+
+    @staticmethod
+    def _geometric(generator, mean):
+        """Return a geometrically distributed number of at least 1 with the
+        given mean."""
+        count = 1
+        while generator.random() > 1.0 / mean:
+            count += 1
+        return count
@@ -0,0 +1,63 @@
+"""Unit Test for CorpusGenerator
+
+..:: moduleauthors:: Wang Bo <wangbomicro@gmail.com>
+"""
+from Book import Book
+from ConferencePaper import ConferencePaper
+from CorpusGenerator import CorpusGenerator
+from JournalArticle import JournalArticle
+from ReferenceDataBase import ReferenceDataBase
+import collections
+import unittest
+
+class CorpusGeneratorTest(unittest.TestCase):
+    """Unit Test for CorpusGenerator"""
+
+    def setUp(self):
+        self.generator = CorpusGenerator(seed=7)
+
+    def testReproducible(self):
+        first = self.generator.generatePublications(300)
+        second = CorpusGenerator(seed=7).generatePublications(300)
+        self.assertEqual([repr(publication) for publication in first],
+                         [repr(publication) for publication in second])
+        self.assertEqual(self.generator.generateCitations(300),
+                         CorpusGenerator(seed=7).generateCitations(300))
+        self.assertNotEqual(self.generator.generateCitations(300),
+                            CorpusGenerator(seed=8).generateCitations(300))
+
+    def testPublications(self):
+        publications = self.generator.generatePublications(2000)
+        types = collections.Counter(type(publication)
+                                    for publication in publications)
+        self.assertEqual(set([JournalArticle, ConferencePaper, Book]),
+                         set(types))
+        years = [publication.year for publication in publications]
+        self.assertEqual(sorted(years), years)
+        productivity = collections.Counter(
+            name for publication in publications
+            for name in publication.getAuthorsName())
+        counts = sorted(productivity.values(), reverse=True)
+        # Zipf: a few prolific authors, most with a single publication.
+        self.assertTrue(counts[0] > 20 * counts[len(counts) // 2])
+
+    def testCitations(self):
+        pairs = self.generator.generateCitations(5000)
+        self.assertTrue(all(cited < citing for citing, cited in pairs))
+        self.assertEqual(len(pairs), len(set(pairs)))
+        inDegrees = sorted(collections.Counter(
+            cited for citing, cited in pairs).values(), reverse=True)
+        mean = len(pairs) / 5000.0
+        self.assertTrue(3 < mean < 7)
+        # Power law: the most cited publications are cited far above the mean.
+        self.assertTrue(inDegrees[0] > 50 * mean)
+
+    def testPopulate(self):
+        dataBase = ReferenceDataBase()
+        publications = self.generator.populate(dataBase, 500)
+        self.assertEqual(500, len(dataBase.getAllPublications()))
+        self.assertTrue(sum(len(publication.cites)
+                            for publication in publications) > 1000)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+"""A hash index from the canonical key of a publication to the IDs of the
+publications having that key.
+
+..:: moduleauthor: Wang Bo <wangbomicro@gmail.com>
+..:: invar: Every key of the index has at least one ID, and the duplicate
+    keys are exactly the keys with more than one ID.
+"""
+from TitleIndex import TitleIndex
+
+class DuplicateIndex(object):
+    """Index filing every publication under its canonical key: its type, its
+    title as lowercase words, its authors with case and spacing normalized,
+    and its year.
+
+    Publications with the same key are duplicates. Looking up the duplicate
+    of a new publication is a single dictionary lookup, and the keys with
+    more than one publication are kept apart, so reporting the duplicates
+    does not sweep the whole index.
+    """
+
+    def __init__(self):
+        """Initialize this new DuplicateIndex with no entries.
+
+        Post:
+            No publication is filed in this index.
+        """
+        self._ids = dict()
+        self._duplicateKeys = set()
+
+    @staticmethod
+    def canonicalKey(publication, attribute=None, value=None):
+        """Return the canonical key of the given publication.
+
+        Args:
+            publication (Publication): The publication.
+            attribute (str): 'title', 'authors' or 'year' to take the given
+                value instead of that attribute of the publication, e.g. its
+                value before a change; None for the current attributes.
+            value: The value taken for the given attribute.
+        Returns:
+            (tuple) The type, normalized title, authors and year.
+        """
+        title = value if attribute == 'title' else publication.title
+        authors = value if attribute == 'authors' else publication.authors
+        year = value if attribute == 'year' else publication.year
+        return (type(publication), " ".join(TitleIndex.tokenize(title)),
+                tuple(" ".join(author.lower().split()) for author in authors),
+                year)
+
+    def add(self, publication):
+        """File the given publication under its canonical key.
+
+        Args:
+            publication (Publication): The publication to be indexed.
+        """
+        self._addKey(publication.id, self.canonicalKey(publication))
+
+    def addAll(self, publications):
+        """File each of the given publications under its canonical key.
+
+        Args:
+            publications (iterable): The publications to be indexed.
+        """
+        for publication in publications:
+            self.add(publication)
+
+    def remove(self, publication):
+        """Remove the given publication from the entry of its canonical key.
+
+        Args:
+            publication (Publication): The publication to be removed.
+        """
+        self._removeKey(publication.id, self.canonicalKey(publication))
+
+    def removeAll(self, publications):
+        """Remove each of the given publications from the entry of its
+        canonical key.
+
+        Args:
+            publications (iterable): The publications to be removed.
+        """
+        for publication in publications:
+            self.remove(publication)
+
+    def update(self, publication, attribute, oldValue):
+        """Move the given publication to its new canonical key after its
+        title, authors or year changed.
+
+        Args:
+            publication (Publication): The changed publication.
+            attribute (str): The name of the changed attribute.
+            oldValue: The value of the attribute before the change.
+        """
+        if attribute not in ('title', 'authors', 'year'):
+            return
+        self._removeKey(publication.id,
+                        self.canonicalKey(publication, attribute, oldValue))
+        self.add(publication)
+
+    def clear(self):
+        """Remove all entries of this index.
+        """
+        self._ids.clear()
+        self._duplicateKeys.clear()
+
+    def findFirst(self, key):
+        """Return the ID of the first publication filed under the given
+        canonical key.
+
+        Args:
+            key (tuple): The canonical key, as given by canonicalKey.
+        Returns:
+            (int) The ID, or None if no publication has the key.
+        """
+        ids = self._ids.get(key)
+        return ids[0] if ids else None
+
+    def getDuplicateGroups(self):
+        """Return the IDs of the publications sharing a canonical key.
+
+        Returns:
+            (list) One list of IDs per shared key, each in increasing order;
+            the groups are ordered by their first ID.
+        """
+        return sorted(sorted(self._ids[key]) for key in self._duplicateKeys)
+
+    def _addKey(self, id, key):
+        ids = self._ids.setdefault(key, [])
+        ids.append(id)
+        if len(ids) == 2:
+            self._duplicateKeys.add(key)
+
+    def _removeKey(self, id, key):
+        ids = self._ids.get(key)
+        if ids is None or id not in ids:
+            return
+        ids.remove(id)
+        if len(ids) < 2:
+            self._duplicateKeys.discard(key)
+        if not ids:
+            del self._ids[key]
@@ -0,0 +1,49 @@
+"""Unit Test for DuplicateIndex
+
+..:: moduleauthors:: Wang Bo <wangbomicro@gmail.com>
+"""
+from Book import Book
+from DuplicateIndex import DuplicateIndex
+from Publication import Publication
+import unittest
+
+class DuplicateIndexTest(unittest.TestCase):
+    """Unit Test for DuplicateIndex"""
+
+    def setUp(self):
+        self.index = DuplicateIndex()
+        self.publications = [
+            Publication("Packaging of MEMS", ["Wang, Bo"], 2012),
+            Publication("packaging of  MEMS.", ["wang, bo"], 2012),
+            Publication("Packaging of MEMS", ["Wang, Bo"], 2013),
+            Book("Packaging of MEMS", ["Wang, Bo"], 2012, "Springer")]
+        for id, publication in enumerate(self.publications, 1001):
+            publication.id = id
+        self.index.addAll(self.publications)
+
+    def testCanonicalKey(self):
+        key = DuplicateIndex.canonicalKey(self.publications[0])
+        self.assertEqual(key, DuplicateIndex.canonicalKey(self.publications[1]))
+        self.assertNotEqual(key,
+                            DuplicateIndex.canonicalKey(self.publications[3]))
+        self.assertEqual(1001, self.index.findFirst(key))
+        self.assertEqual(None, self.index.findFirst(
+            DuplicateIndex.canonicalKey(Publication("Getters",
+                                                    ["Wang, Bo"], 2012))))
+
+    def testDuplicateGroups(self):
+        self.assertEqual([[1001, 1002]], self.index.getDuplicateGroups())
+        self.index.remove(self.publications[0])
+        self.assertEqual([], self.index.getDuplicateGroups())
+
+    def testUpdate(self):
+        publication = self.publications[2]
+        publication.year = 2012
+        self.index.update(publication, 'year', 2013)
+        self.assertEqual([[1001, 1002, 1003]], self.index.getDuplicateGroups())
+        publication.title = "Thin film getters"
+        self.index.update(publication, 'title', "Packaging of MEMS")
+        self.assertEqual([[1001, 1002]], self.index.getDuplicateGroups())
+
+if __name__ == "__main__":
+    unittest.main()
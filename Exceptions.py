@@ -69,6 +69,20 @@ class IllegalPublicationIdException(IllegalValueException):
                "ID given is: {}, which is not in the database".format(arg))
         self.code = 1004
         super(IllegalPublicationIdException, self).__init__(''.join(msg))
+class DuplicatePublicationException(IllegalValueException):
+    """A publication duplicates one already given
+    
+    Args:
+        -arg: the publication it duplicates.
+    """
+    def __init__(self, arg):
+        # Call the base class constructor with the parameters it needs
+        msg = ("Duplicate publication given. "
+               "It has the type, title, authors and year of: {!r}".format(arg))
+        self.code = 1007
+        self.original = arg
+        super(DuplicatePublicationException, self).__init__(''.join(msg))
+
 class IllegalWeightException(IllegalValueException):
     """Wrong weight
     
@@ -94,3 +108,11 @@ class IllegalStateException(Exception):
         return "%s: %d - %s" % (self.__class__, self.code, self.message)
     
     
+
+class QueryCancelledException(Exception):
+    """A query was cancelled before it finished.
+    """
+    def __init__(self):
+        self.code = 1006
+        super(QueryCancelledException, self).__init__(
+            "The query was cancelled before it finished.")
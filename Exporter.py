@@ -0,0 +1,172 @@
+"""A streaming exporter of a reference database to BibTeX, JSONL and a
+citation edge list.
+
+..:: moduleauthor: Wang Bo <wangbomicro@gmail.com>
+"""
+from Book import Book
+from ConferencePaper import ConferencePaper
+from Exceptions import IllegalValueException
+from JournalArticle import JournalArticle
+import io
+import json
+import os
+
+
+class Exporter(object):
+    """Exporter writing the publications of a database, or the citations
+    between them, one record at a time, so the output is never held in
+    memory as a whole.
+
+    Every export can be split into shards for parallel consumers; a
+    publication goes to shard ID modulo the number of shards, and a citation
+    to the shard of the citing publication.
+    """
+
+    _extensions = {'bibtex': '.bib', 'jsonl': '.jsonl', 'edges': '.tsv'}
+
+    def __init__(self, dataBase):
+        """Initialize this new Exporter.
+
+        Args:
+            dataBase (ReferenceDataBase): The database to be exported.
+        """
+        self._dataBase = dataBase
+
+    def writeBibTeX(self, outputs):
+        """Write a BibTeX entry per publication, keyed "pub<ID>".
+
+        Args:
+            outputs (file or list): The text stream to write to, or a list of
+                streams, one per shard.
+        """
+        self._write(outputs, self._publications(), self.formatBibTeX)
+
+    def writeJSONL(self, outputs):
+        """Write a JSON object per line for each publication.
+
+        Args:
+            outputs (file or list): The text stream to write to, or a list of
+                streams, one per shard.
+        """
+        self._write(outputs, self._publications(), self.formatJSONL)
+
+    def writeEdgeList(self, outputs):
+        """Write a "citing ID<tab>cited ID" line for each citation.
+
+        Args:
+            outputs (file or list): The text stream to write to, or a list of
+                streams, one per shard.
+        """
+        self._write(outputs, self._citations(), self.formatEdge)
+
+    def exportFile(self, path, format, shards=1):
+        """Export to the given file, or to the given number of shard files
+        named like "dump-0-of-4.bib" after the given path.
+
+        Args:
+            path (str): The path of the file.
+            format (str): 'bibtex', 'jsonl' or 'edges'.
+            shards (int): The number of shards.
+        Returns:
+            (list) The paths of the written files.
+        Throws:
+            IllegalValueException: The format is not supported, or the number
+            of shards is not positive.
+        """
+        if format not in self._extensions:
+            raise IllegalValueException("Unsupported format: {}".format(format))
+        if shards < 1:
+            raise IllegalValueException("The number of shards must be positive.")
+        if shards == 1:
+            paths = [path]
+        else:
+            root, extension = os.path.splitext(path)
+            extension = extension or self._extensions[format]
+            paths = ["{}-{}-of-{}{}".format(root, shard, shards, extension)
+                     for shard in range(shards)]
+        outputs = []
+        try:
+            for shardPath in paths:
+                outputs.append(io.open(shardPath, 'w', encoding='utf-8'))
+            write = {'bibtex': self.writeBibTeX, 'jsonl': self.writeJSONL,
+                     'edges': self.writeEdgeList}[format]
+            write(outputs)
+        finally:
+            for output in outputs:
+                output.close()
+        return paths
+
+    @staticmethod
+    def formatBibTeX(publication):
+        """Return the BibTeX entry of the given publication.
+        """
+        if isinstance(publication, JournalArticle):
+            type, venue = 'article', [('journal', publication.journal),
+                                      ('number', publication.issueNumber)]
+        elif isinstance(publication, Book):
+            type, venue = 'book', [('publisher', publication.publisher)]
+        elif isinstance(publication, ConferencePaper):
+            type, venue = 'inproceedings', [('booktitle',
+                                             publication.conference)]
+        else:
+            type, venue = 'misc', []
+        fields = [('title', publication.title),
+                  ('author', ' and '.join(publication.authors))]
+        fields.extend(field for field in venue if field[1] is not None)
+        fields.append(('year', publication.year))
+        lines = ["@{}{{pub{},\n".format(type, publication.id)]
+        lines.append(",\n".join("  {} = {{{}}}".format(
+            name, _escapeBibTeX(u"{}".format(value))) for name, value in fields))
+        lines.append("\n}\n")
+        return u"".join(lines)
+
+    @staticmethod
+    def formatJSONL(publication):
+        """Return the JSONL line of the given publication.
+        """
+        record = {'id': publication.id, 'type': type(publication).__name__,
+                  'title': publication.title, 'authors': publication.authors,
+                  'year': publication.year}
+        if isinstance(publication, JournalArticle):
+            record['journal'] = publication.journal
+            record['issueNumber'] = publication.issueNumber
+        elif isinstance(publication, Book):
+            record['publisher'] = publication.publisher
+        elif isinstance(publication, ConferencePaper):
+            record['conference'] = publication.conference
+        return json.dumps(record, sort_keys=True) + u"\n"
+
+    @staticmethod
+    def formatEdge(citation):
+        """Return the edge list line of the given (citing, cited) pair.
+        """
+        return u"{}\t{}\n".format(citation[0].id, citation[1].id)
+
+    def _publications(self):
+        for publication in self._dataBase.getAllPublications():
+            yield publication.id, publication
+
+    def _citations(self):
+        for citing in self._dataBase.getAllPublications():
+            for cited in sorted(citing.getAllCites(), key=lambda cited: cited.id):
+                yield citing.id, (citing, cited)
+
+    @staticmethod
+    def _write(outputs, records, format):
+        if not isinstance(outputs, (list, tuple)):
+            outputs = [outputs]
+        shards = len(outputs)
+        for id, record in records:
+            outputs[id % shards].write(format(record))
+
+
+def _escapeBibTeX(value):
+    # Braces delimit values, so unbalanced ones can not be written as is.
+    depth = 0
+    for character in value:
+        depth += {'{': 1, '}': -1}.get(character, 0)
+        if depth < 0:
+            break
+    if depth != 0:
+        value = value.replace('{', '(').replace('}', ')')
+    return value
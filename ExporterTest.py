@@ -0,0 +1,127 @@
+"""Unit Test for Exporter
+
+..:: moduleauthors:: Wang Bo <wangbomicro@gmail.com>
+"""
+from Book import Book
+from ConferencePaper import ConferencePaper
+from Exceptions import IllegalValueException
+from Exporter import Exporter
+from Importer import Importer
+from JournalArticle import JournalArticle
+from Publication import Publication
+from ReferenceDataBase import ReferenceDataBase
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+class ExporterTest(unittest.TestCase):
+    """Unit Test for Exporter"""
+
+    def setUp(self):
+        self.dataBase = ReferenceDataBase()
+        self.article = JournalArticle("Gas leak rate study of MEMS",
+                                      ["Wang, Bo", "Wevers, Martine"],
+                                      "Sensors", 3, 1990)
+        self.book = Book("Packaging of MEMS", ["Wang, Bo"], 2012, "Springer")
+        self.paper = ConferencePaper("Thin film getters", ["Mao, Shengping"],
+                                     2014, "Transducers")
+        self.dataBase.addPublications([self.article, self.book, self.paper])
+        self.dataBase.addCitation(self.paper.id, self.article.id)
+        self.dataBase.addCitation(self.paper.id, self.book.id)
+        self.dataBase.addCitation(self.book.id, self.article.id)
+        self.exporter = Exporter(self.dataBase)
+
+    def testFormatBibTeX(self):
+        self.assertEqual(u"@book{{pub{},\n"
+                         u"  title = {{Packaging of MEMS}},\n"
+                         u"  author = {{Wang, Bo}},\n"
+                         u"  publisher = {{Springer}},\n"
+                         u"  year = {{2012}}\n}}\n".format(self.book.id),
+                         Exporter.formatBibTeX(self.book))
+        self.assertTrue(u"number = {3}" in Exporter.formatBibTeX(self.article))
+        self.assertTrue(u"booktitle = {Transducers}" in
+                        Exporter.formatBibTeX(self.paper))
+
+    def testBibTeXRoundTrip(self):
+        output = io.StringIO()
+        self.exporter.writeBibTeX(output)
+        copy = ReferenceDataBase()
+        report = Importer(copy).importLines(io.StringIO(output.getvalue()),
+                                            'bibtex')
+        self.assertEqual(3, report.getImportedCount())
+        self.assertEqual(sorted(str(publication) for publication in
+                                self.dataBase.getAllPublications()),
+                         sorted(str(publication) for publication in
+                                copy.getAllPublications()))
+
+    def testJSONLRoundTrip(self):
+        output = io.StringIO()
+        self.exporter.writeJSONL(output)
+        records = [json.loads(line) for line in
+                   output.getvalue().splitlines()]
+        self.assertEqual(set(["JournalArticle", "Book", "ConferencePaper"]),
+                         set(record['type'] for record in records))
+        copy = ReferenceDataBase()
+        report = Importer(copy).importLines(io.StringIO(output.getvalue()),
+                                            'jsonl')
+        self.assertEqual(3, report.getImportedCount())
+        self.assertEqual(sorted(repr(publication) for publication in
+                                self.dataBase.getAllPublications()),
+                         sorted(repr(publication) for publication in
+                                copy.getAllPublications()))
+
+    def testEdgeList(self):
+        output = io.StringIO()
+        self.exporter.writeEdgeList(output)
+        edges = set(tuple(int(id) for id in line.split("\t"))
+                    for line in output.getvalue().splitlines())
+        self.assertEqual(set([(self.paper.id, self.article.id),
+                              (self.paper.id, self.book.id),
+                              (self.book.id, self.article.id)]), edges)
+
+    def testShards(self):
+        outputs = [io.StringIO(), io.StringIO()]
+        self.exporter.writeEdgeList(outputs)
+        for shard, output in enumerate(outputs):
+            for line in output.getvalue().splitlines():
+                self.assertEqual(shard, int(line.split("\t")[0]) % 2)
+        self.assertEqual(3, sum(len(output.getvalue().splitlines())
+                                for output in outputs))
+
+    def testExportFile(self):
+        directory = tempfile.mkdtemp()
+        try:
+            paths = self.exporter.exportFile(
+                os.path.join(directory, "dump.jsonl"), 'jsonl', shards=3)
+            self.assertEqual([os.path.join(directory,
+                                           "dump-{}-of-3.jsonl".format(shard))
+                              for shard in range(3)], paths)
+            ids = []
+            for shard, path in enumerate(paths):
+                with io.open(path, encoding='utf-8') as lines:
+                    for line in lines:
+                        id = json.loads(line)['id']
+                        self.assertEqual(shard, id % 3)
+                        ids.append(id)
+            self.assertEqual(sorted([self.article.id, self.book.id,
+                                     self.paper.id]), sorted(ids))
+        finally:
+            shutil.rmtree(directory)
+        self.assertRaises(IllegalValueException, self.exporter.exportFile,
+                          "dump.xml", 'xml')
+        self.assertRaises(IllegalValueException, self.exporter.exportFile,
+                          "dump.bib", 'bibtex', 0)
+
+    def testStrAndRepr(self):
+        self.assertEqual("B. Wang, Packaging of MEMS, Springer, 2012",
+                         str(self.book))
+        self.assertEqual("S. Mao, Thin film getters, Transducers, 2014",
+                         str(self.paper))
+        self.assertEqual("Publication(Getters,['Mao, Shengping'],2014)",
+                         repr(Publication("Getters", ["Mao, Shengping"], 2014)))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+"""A thread-safe allocator of consecutive publication IDs.
+
+..:: moduleauthor: Wang Bo <wangbomicro@gmail.com>
+..:: invar: No ID is handed out twice, unless the next ID is set back.
+"""
+import threading
+
+class IDAllocator(object):
+    """Allocator handing out IDs, or blocks of consecutive IDs, in increasing
+    order, atomically, so concurrent callers never get the same ID.
+    """
+
+    def __init__(self, nextId=1001):
+        """Initialize this new IDAllocator.
+
+        Args:
+            nextId (int): The first ID to be handed out.
+        """
+        self._nextId = nextId
+        self._lock = threading.Lock()
+
+    def allocate(self, count=1):
+        """Reserve the given number of consecutive IDs.
+
+        Args:
+            count (int): The number of IDs to be reserved.
+        Returns:
+            (int) The first reserved ID.
+        """
+        with self._lock:
+            firstId = self._nextId
+            self._nextId += count
+        return firstId
+
+    def getNextId(self):
+        """Return the ID the next allocation starts at.
+        """
+        return self._nextId
+
+    def setNextId(self, nextId):
+        """Let the next allocation start at the given ID.
+
+        Args:
+            nextId (int): The next ID to be handed out.
+        """
+        with self._lock:
+            self._nextId = nextId
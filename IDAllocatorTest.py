@@ -0,0 +1,37 @@
+"""Unit Test for IDAllocator
+
+..:: moduleauthors:: Wang Bo <wangbomicro@gmail.com>
+"""
+from IDAllocator import IDAllocator
+import threading
+import unittest
+
+class IDAllocatorTest(unittest.TestCase):
+    """Unit Test for IDAllocator"""
+
+    def testAllocate(self):
+        allocator = IDAllocator()
+        self.assertEqual(1001, allocator.allocate())
+        self.assertEqual(1002, allocator.allocate(10))
+        self.assertEqual(1012, allocator.getNextId())
+        allocator.setNextId(2000)
+        self.assertEqual(2000, allocator.allocate())
+
+    def testConcurrentAllocate(self):
+        allocator = IDAllocator(0)
+        ids = [[] for number in range(4)]
+
+        def allocate(allocated):
+            for number in range(1000):
+                allocated.append(allocator.allocate())
+
+        threads = [threading.Thread(target=allocate, args=(allocated,))
+                   for allocated in ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(list(range(4000)), sorted(sum(ids, [])))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,530 @@
+"""A streaming importer of bibliography dumps in BibTeX, RIS, CSV and JSONL
+format into a reference database.
+
+..:: moduleauthor: Wang Bo <wangbomicro@gmail.com>
+"""
+from Book import Book
+from ConferencePaper import ConferencePaper
+from Exceptions import IllegalValueException
+from JournalArticle import JournalArticle
+from Publication import Publication
+from concurrent.futures import ProcessPoolExecutor
+import csv
+import io
+import json
+import os
+import re
+
+# Entry types of the supported formats, mapped onto the publication classes.
+_TYPES = {
+    'article': JournalArticle, 'journalarticle': JournalArticle,
+    'jour': JournalArticle, 'jfull': JournalArticle, 'mgzn': JournalArticle,
+    'book': Book, 'inbook': Book, 'booklet': Book, 'chap': Book,
+    'ebook': Book,
+    'inproceedings': ConferencePaper, 'conference': ConferencePaper,
+    'conferencepaper': ConferencePaper, 'proceedings': ConferencePaper,
+    'conf': ConferencePaper, 'cpaper': ConferencePaper,
+}
+
+_RIS_FIELDS = {
+    'TI': 'title', 'T1': 'title', 'PY': 'year', 'Y1': 'year', 'DA': 'year',
+    'JO': 'journal', 'JF': 'journal', 'JA': 'journal', 'IS': 'number',
+    'PB': 'publisher', 'T2': 'secondaryTitle', 'ID': 'key',
+}
+
+_SKIPPED_BIBTEX = re.compile(r'\s*@(comment|string|preamble)\b', re.I)
+
+_FORMATS = {'.bib': 'bibtex', '.ris': 'ris', '.csv': 'csv',
+            '.jsonl': 'jsonl', '.json': 'jsonl'}
+
+
+class ImportReport(object):
+    """Report of an import: the number of records read and imported, the IDs
+    given to keyed records, and an error for every record that was skipped.
+    """
+
+    def __init__(self):
+        """Initialize this new ImportReport with no records.
+        """
+        self._recordCount = 0
+        self._importedCount = 0
+        self._errors = []
+        self._ids = dict()
+
+    def getRecordCount(self):
+        """Return the number of records read.
+        """
+        return self._recordCount
+
+    def getImportedCount(self):
+        """Return the number of records added to the database.
+        """
+        return self._importedCount
+
+    def getErrors(self):
+        """Return the skipped records as (record number, key, message)
+        tuples, record numbers counting from 1.
+        """
+        return list(self._errors)
+
+    def getIds(self):
+        """Return a dictionary from the keys of the imported records, where
+        the format has them, to the IDs of their publications.
+        """
+        return dict(self._ids)
+
+    def addError(self, recordNumber, key, message):
+        """Record that the given record was skipped for the given reason.
+        """
+        self._errors.append((recordNumber, key, message))
+
+    def __str__(self):
+        """The summary and the errors of the import.
+        """
+        lines = ["{} records read, {} imported, {} skipped".format(
+            self._recordCount, self._importedCount, len(self._errors))]
+        for recordNumber, key, message in self._errors:
+            lines.append("record {} ({}): {}".format(recordNumber, key or "-",
+                                                     message))
+        return "\n".join(lines)
+
+
+class Importer(object):
+    """Importer reading bibliography records as a stream, parsing and
+    validating them in chunks, optionally in a pool of processes, and adding
+    the valid ones to a database in batches with addPublications.
+
+    Memory stays bounded by the number of chunks in flight and the batch
+    size, whatever the size of the input. A record that can not be parsed or
+    is not a valid publication is reported and skipped instead of aborting
+    the import.
+    """
+
+    def __init__(self, dataBase, batchSize=10000, chunkSize=1000,
+                 processes=1):
+        """Initialize this new Importer.
+
+        Args:
+            dataBase (ReferenceDataBase): The database to import into.
+            batchSize (int): The number of publications added per call of
+                addPublications.
+            chunkSize (int): The number of records parsed per task.
+            processes (int): The number of parsing processes; 1 parses in
+                the current process.
+        """
+        self._dataBase = dataBase
+        self._batchSize = batchSize
+        self._chunkSize = chunkSize
+        self._processes = processes
+
+    def importFile(self, path, format=None):
+        """Import all records of the given file.
+
+        Args:
+            path (str): The path of the file.
+            format (str): 'bibtex', 'ris', 'csv' or 'jsonl'; by default
+                derived from the file extension.
+        Returns:
+            (ImportReport) The report of the import.
+        """
+        if format is None:
+            format = _FORMATS.get(os.path.splitext(path)[1].lower())
+        with io.open(path, encoding='utf-8', newline='') as lines:
+            return self.importLines(lines, format)
+
+    def importLines(self, lines, format):
+        """Import all records read from the given lines.
+
+        Args:
+            lines (iterable): The lines of the input, e.g. an open file.
+            format (str): 'bibtex', 'ris', 'csv' or 'jsonl'.
+        Returns:
+            (ImportReport) The report of the import.
+        Throws:
+            IllegalValueException: The format is not supported.
+        """
+        if format not in _READERS:
+            raise IllegalValueException("Unsupported format: {}".format(format))
+        report = ImportReport()
+        batch = []
+        for recordNumber, key, entry, error in \
+                self._parse(format, _READERS[format](lines)):
+            report._recordCount += 1
+            if error is None:
+                try:
+                    batch.append((recordNumber, key, createPublication(entry)))
+                except IllegalValueException as exception:
+                    error = _describe(exception)
+            if error is not None:
+                report.addError(recordNumber, key, error)
+            if len(batch) >= self._batchSize:
+                self._addBatch(batch, report)
+                batch = []
+        self._addBatch(batch, report)
+        return report
+
+    def _parse(self, format, records):
+        chunks = _chunks(records, self._chunkSize)
+        if self._processes <= 1:
+            for chunk in chunks:
+                for result in _parseChunk(format, chunk):
+                    yield result
+            return
+        # Keep a bounded number of chunks in flight, in input order.
+        with ProcessPoolExecutor(self._processes) as executor:
+            pending = []
+            for chunk in chunks:
+                pending.append(executor.submit(_parseChunk, format, chunk))
+                if len(pending) >= 2 * self._processes:
+                    for result in pending.pop(0).result():
+                        yield result
+            for future in pending:
+                for result in future.result():
+                    yield result
+
+    def _addBatch(self, batch, report):
+        if not batch:
+            return
+        publications = [publication for recordNumber, key, publication in batch]
+        try:
+            ids = self._dataBase.addPublications(publications)
+            added = [(key, id) for (recordNumber, key, publication), id
+                     in zip(batch, ids)]
+        except IllegalValueException:
+            # Find the offending records one by one.
+            added = []
+            for recordNumber, key, publication in batch:
+                try:
+                    id = self._dataBase.addAsPublication(publication)
+                    added.append((key, id))
+                except IllegalValueException as exception:
+                    report.addError(recordNumber, key, _describe(exception))
+        report._importedCount += len(added)
+        for key, id in added:
+            if key:
+                report._ids[key] = id
+
+
+def createPublication(entry):
+    """Create the publication described by a parsed entry.
+
+    Args:
+        entry (dict): The entry, with a 'type' of 'Book', 'ConferencePaper' or
+            'JournalArticle', a 'title', a list of 'authors', an int 'year'
+            and the 'publisher', 'conference' or 'journal' and 'issueNumber'
+            its type needs.
+    Returns:
+        (Publication) The new publication.
+    Throws:
+        IllegalValueException: The entry does not describe a valid
+        publication.
+    """
+    cls = _TYPES[entry['type'].lower()]
+    if cls is JournalArticle:
+        return JournalArticle(entry['title'], entry['authors'],
+                              entry.get('journal'), entry['issueNumber'],
+                              entry['year'])
+    if cls is Book:
+        return Book(entry['title'], entry['authors'], entry['year'],
+                    entry.get('publisher'))
+    return ConferencePaper(entry['title'], entry['authors'], entry['year'],
+                           entry.get('conference'))
+
+
+def parseEntry(fields):
+    """Turn the raw fields of a record into an entry for createPublication,
+    checking it with the validity checks of Publication.
+
+    Args:
+        fields (dict): The raw fields, with lowercase names as in BibTeX:
+            'type', 'title', 'author' (a string with "and" between the
+            names, or a list), 'year', 'journal', 'number', 'publisher',
+            'booktitle' or 'conference'.
+    Returns:
+        (dict) The entry.
+    Throws:
+        IllegalValueException: The record does not describe a valid
+        publication.
+    """
+    type = _text(fields, 'type').strip().lower()
+    cls = _TYPES.get(type)
+    if cls is None:
+        raise IllegalValueException("Unsupported entry type: {}".format(type))
+    title = _clean(_text(fields, 'title'))
+    if not title:
+        raise IllegalValueException("Missing title")
+    authors = fields.get('author') or fields.get('authors') or []
+    if isinstance(authors, str):
+        authors = re.split(r'\s+and\s+|;', authors)
+    if not isinstance(authors, list) or \
+            not all(isinstance(author, str) for author in authors):
+        raise IllegalValueException("Invalid authors: {!r}".format(authors))
+    authors = [_normalizeAuthor(author) for author in authors
+               if author.strip()]
+    if not authors or not Publication.isValidAuthors(authors):
+        raise IllegalValueException("Invalid authors: {}".format(authors))
+    match = re.search(r'\d{4}', _number(fields, 'year'))
+    if match is None or not Publication.isValidYear(int(match.group())):
+        raise IllegalValueException("Invalid year: {}".format(
+            fields.get('year')))
+    entry = {'type': cls.__name__, 'title': title, 'authors': authors,
+             'year': int(match.group())}
+    if cls is JournalArticle:
+        entry['journal'] = _clean(_text(fields, 'journal')) or None
+        match = re.match(r'\s*(\d+)', _number(fields, 'number',
+                                               'issuenumber'))
+        if match is None or int(match.group(1)) <= 0:
+            raise IllegalValueException("Invalid issue number: {}".format(
+                fields.get('number')))
+        entry['issueNumber'] = int(match.group(1))
+    elif cls is Book:
+        entry['publisher'] = _clean(_text(fields, 'publisher')) or None
+    else:
+        entry['conference'] = _clean(_text(fields, 'booktitle',
+                                           'conference')) or None
+    return entry
+
+
+def _text(fields, *names):
+    """Return the first of the given fields that is set, or '' if none is.
+
+    Throws:
+        IllegalValueException: The field is not a string.
+    """
+    for name in names:
+        value = fields.get(name)
+        if value:
+            if not isinstance(value, str):
+                raise IllegalValueException("Invalid {}: {!r}".format(
+                    name, value))
+            return value
+    return ''
+
+
+def _number(fields, *names):
+    """Return the first of the given fields that is set as a string, or ''
+    if none is; numbers are accepted next to strings.
+
+    Throws:
+        IllegalValueException: The field is neither a string nor a number.
+    """
+    for name in names:
+        value = fields.get(name)
+        if value:
+            if isinstance(value, bool) or \
+                    not isinstance(value, (str, int)):
+                raise IllegalValueException("Invalid {}: {!r}".format(
+                    name, value))
+            return str(value)
+    return ''
+
+
+def _describe(exception):
+    return exception.args[0] if exception.args else type(exception).__name__
+
+
+def _clean(text):
+    return re.sub(r'\s+', ' ', text.replace('{', '').replace('}', '')).strip()
+
+
+def _normalizeAuthor(author):
+    """Return the given author name as "Last, First"."""
+    author = _clean(author)
+    if ',' in author:
+        last, first = author.split(',', 1)
+        return "{}, {}".format(last.strip(), first.strip())
+    words = author.split(' ')
+    if len(words) < 2:
+        return author
+    return "{}, {}".format(words[-1], ' '.join(words[:-1]))
+
+
+def _chunks(records, size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _parseChunk(format, chunk):
+    """Parse and validate a chunk of (record number, raw record) pairs.
+
+    Runs in the parsing processes, so it only returns plain data: a
+    (record number, key, entry, error message) tuple per record.
+    """
+    parse = _PARSERS[format]
+    results = []
+    for recordNumber, record in chunk:
+        key = None
+        try:
+            fields = parse(record)
+            if not isinstance(fields.get('key'), (str, type(None))):
+                raise IllegalValueException("Invalid key: {!r}".format(
+                    fields['key']))
+            key = fields.get('key')
+            results.append((recordNumber, key, parseEntry(fields), None))
+        except (IllegalValueException, ValueError, KeyError) as exception:
+            results.append((recordNumber, key, None, _describe(exception)))
+    return results
+
+
+def _readBibTeX(lines):
+    """Yield (record number, text) for each @entry of a BibTeX stream,
+    skipping @comment, @string and @preamble entries."""
+    recordNumber = 0
+    text = []
+    depth = 0
+    for line in lines:
+        if not text and not line.lstrip().startswith('@'):
+            continue
+        text.append(line)
+        depth += line.count('{') - line.count('}')
+        if depth <= 0 and '{' in ''.join(text):
+            entry = ''.join(text)
+            text = []
+            depth = 0
+            if not _SKIPPED_BIBTEX.match(entry):
+                recordNumber += 1
+                yield recordNumber, entry
+    if text and not _SKIPPED_BIBTEX.match(''.join(text)):
+        recordNumber += 1
+        yield recordNumber, ''.join(text)
+
+
+def _parseBibTeX(text):
+    match = re.match(r'\s*@(\w+)\s*\{\s*([^,\s]*)\s*,', text)
+    if match is None:
+        raise IllegalValueException("Malformed BibTeX entry")
+    fields = {'type': match.group(1), 'key': match.group(2) or None}
+    position = match.end()
+    fieldPattern = re.compile(r'\s*(\w[\w-]*)\s*=\s*')
+    while True:
+        field = fieldPattern.match(text, position)
+        if field is None:
+            break
+        value, position = _readBibTeXValue(text, field.end())
+        fields[field.group(1).lower()] = value
+        separator = re.compile(r'\s*,').match(text, position)
+        if separator is None:
+            break
+        position = separator.end()
+    return fields
+
+
+def _readBibTeXValue(text, position):
+    parts = []
+    while True:
+        while position < len(text) and text[position].isspace():
+            position += 1
+        if position >= len(text):
+            raise IllegalValueException("Unterminated BibTeX value")
+        if text[position] == '{':
+            depth, start = 0, position
+            while True:
+                if position >= len(text):
+                    raise IllegalValueException("Unbalanced braces")
+                if text[position] == '{':
+                    depth += 1
+                elif text[position] == '}':
+                    depth -= 1
+                    if depth == 0:
+                        break
+                position += 1
+            parts.append(text[start + 1:position])
+            position += 1
+        elif text[position] == '"':
+            end = text.find('"', position + 1)
+            if end < 0:
+                raise IllegalValueException("Unterminated quoted value")
+            parts.append(text[position + 1:end])
+            position = end + 1
+        else:
+            match = re.compile(r'[\w.-]+').match(text, position)
+            if match is None:
+                raise IllegalValueException("Malformed BibTeX value")
+            parts.append(match.group())
+            position = match.end()
+        concatenation = re.compile(r'\s*#').match(text, position)
+        if concatenation is None:
+            return ''.join(parts), position
+        position = concatenation.end()
+
+
+def _readRIS(lines):
+    """Yield (record number, lines) for each TY ... ER record of an RIS
+    stream."""
+    recordNumber = 0
+    record = []
+    for line in lines:
+        line = line.rstrip('\r\n')
+        tag = line[:2]
+        if tag == 'TY':
+            record = [line]
+        elif tag == 'ER' and record:
+            recordNumber += 1
+            yield recordNumber, record
+            record = []
+        elif record and line.strip():
+            record.append(line)
+    if record:
+        recordNumber += 1
+        yield recordNumber, record
+
+
+def _parseRIS(record):
+    fields = {'author': []}
+    for line in record:
+        match = re.match(r'([A-Z][A-Z0-9])  -\s?(.*)$', line)
+        if match is None:
+            continue
+        tag, value = match.group(1), match.group(2).strip()
+        if tag == 'TY':
+            fields['type'] = value
+        elif tag in ('AU', 'A1'):
+            fields['author'].append(value)
+        elif tag in _RIS_FIELDS:
+            fields.setdefault(_RIS_FIELDS[tag], value)
+    secondaryTitle = fields.pop('secondaryTitle', None)
+    if secondaryTitle is not None:
+        fields.setdefault('booktitle', secondaryTitle)
+        fields.setdefault('journal', secondaryTitle)
+    return fields
+
+
+def _readCSV(lines):
+    """Yield (record number, row) for each row of a CSV stream with a
+    header line."""
+    for recordNumber, row in enumerate(csv.DictReader(lines), 1):
+        yield recordNumber, row
+
+
+def _parseCSV(row):
+    return dict((name.strip().lower(), value)
+                for name, value in row.items() if name is not None)
+
+
+def _readJSONL(lines):
+    """Yield (record number, line) for each non-empty line of a JSONL
+    stream."""
+    recordNumber = 0
+    for line in lines:
+        if line.strip():
+            recordNumber += 1
+            yield recordNumber, line
+
+
+def _parseJSONL(line):
+    fields = json.loads(line)
+    if not isinstance(fields, dict):
+        raise IllegalValueException("A JSONL record must be an object")
+    return dict((name.lower(), value) for name, value in fields.items())
+
+
+_READERS = {'bibtex': _readBibTeX, 'ris': _readRIS, 'csv': _readCSV,
+            'jsonl': _readJSONL}
+_PARSERS = {'bibtex': _parseBibTeX, 'ris': _parseRIS, 'csv': _parseCSV,
+            'jsonl': _parseJSONL}
@@ -0,0 +1,199 @@
+"""Unit Test for Importer
+
+..:: moduleauthors:: Wang Bo <wangbomicro@gmail.com>
+"""
+from Book import Book
+from ConferencePaper import ConferencePaper
+from Exceptions import IllegalValueException
+from Importer import Importer
+from JournalArticle import JournalArticle
+from ReferenceDataBase import ReferenceDataBase
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+_BIBTEX = u"""% A comment line
+@string{mems =
+  "Journal of MEMS"}
+@article{wang1990,
+  title = {Gas leak rate study of {MEMS}},
+  author = {Wang, Bo and Jeroen De Coster},
+  journal = "Journal of MEMS" # " Letters",
+  number = 3,
+  year = 1990
+}
+@inproceedings{mao2014,
+  title = "Thin film getters",
+  author = "Mao, Shengping",
+  booktitle = {Transducers},
+  year = {2014}}
+@book{bad, title = {No authors}, year = 2000}
+@misc{other, title = {Unsupported}, author = {Wang, Bo}, year = 2000}
+"""
+
+_RIS = u"""TY  - BOOK
+TI  - Packaging of MEMS
+AU  - Wang, Bo
+AU  - Witvrouw, Ann
+PY  - 2012/01/01
+PB  - Springer
+ER  -
+
+TY  - JOUR
+TI  - Getters
+AU  - Mao, Shengping
+PY  - 2014
+JO  - Sensors
+ER  -
+"""
+
+_CSV = u"""type,title,authors,year,journal,number,publisher,conference
+article,Gas leak rate study,"Wang, Bo;Wevers, Martine",1990,Sensors,2,,
+Book,Packaging of MEMS,"Wang, Bo",1200,,,Springer,
+"""
+
+_JSONL = u"""{"type": "ConferencePaper", "title": "Thin film getters", \
+"authors": ["Mao, Shengping"], "year": 2014, "conference": "Transducers"}
+
+not json
+{"type": "book", "title": "Packaging", "author": "Bo Wang", "year": 2012}
+"""
+
+
+class ImporterTest(unittest.TestCase):
+    """Unit Test for Importer"""
+
+    def setUp(self):
+        self.dataBase = ReferenceDataBase()
+
+    def importText(self, text, format, **options):
+        importer = Importer(self.dataBase, **options)
+        return importer.importLines(io.StringIO(text), format)
+
+    def testImportBibTeX(self):
+        report = self.importText(_BIBTEX, 'bibtex')
+        self.assertEqual(4, report.getRecordCount())
+        self.assertEqual(2, report.getImportedCount())
+        ids = report.getIds()
+        article = self.dataBase.getPublicationWithID(ids['wang1990'])
+        self.assertTrue(isinstance(article, JournalArticle))
+        self.assertEqual("Gas leak rate study of MEMS", article.title)
+        self.assertEqual(["Wang, Bo", "Coster, Jeroen De"], article.authors)
+        self.assertEqual("Journal of MEMS Letters", article.journal)
+        self.assertEqual(3, article.issueNumber)
+        paper = self.dataBase.getPublicationWithID(ids['mao2014'])
+        self.assertTrue(isinstance(paper, ConferencePaper))
+        self.assertEqual("Transducers", paper.conference)
+        self.assertEqual(2014, paper.year)
+        self.assertEqual([3, 4], [error[0] for error in report.getErrors()])
+        self.assertEqual(['bad', 'other'],
+                         [error[1] for error in report.getErrors()])
+
+    def testImportRIS(self):
+        report = self.importText(_RIS, 'ris')
+        self.assertEqual(2, report.getRecordCount())
+        self.assertEqual(1, report.getImportedCount())
+        book, = self.dataBase.findByAuthor("A. Witvrouw")
+        self.assertTrue(isinstance(book, Book))
+        self.assertEqual("Springer", book.publisher)
+        self.assertEqual(2012, book.year)
+        (recordNumber, key, message), = report.getErrors()
+        self.assertEqual(2, recordNumber)
+        self.assertTrue(message.startswith("Invalid issue number"))
+
+    def testImportCSV(self):
+        report = self.importText(_CSV, 'csv')
+        self.assertEqual(2, report.getRecordCount())
+        self.assertEqual(1, report.getImportedCount())
+        article, = self.dataBase.findByAuthor("M. Wevers")
+        self.assertEqual(2, article.issueNumber)
+        self.assertEqual(2, report.getErrors()[0][0])
+
+    def testImportJSONL(self):
+        report = self.importText(_JSONL, 'jsonl')
+        self.assertEqual(3, report.getRecordCount())
+        self.assertEqual(2, report.getImportedCount())
+        self.assertEqual([2], [error[0] for error in report.getErrors()])
+        self.assertEqual(1, len(self.dataBase.findByAuthor("B. Wang")))
+
+    def testImportMistypedJSONL(self):
+        lines = u"".join(u'{{"type": "book", "title": {}, "authors": {}, '
+                         u'"year": {}, "publisher": {}}}\n'
+                         .format(title, authors, year, publisher)
+                         for title, authors, year, publisher in
+                         [('"Packaging"', '[1]', '2012', '"Springer"'),
+                          ('3', '["Wang, Bo"]', '2012', '"Springer"'),
+                          ('"Packaging"', '["Wang, Bo"]', '[2012]', 'null'),
+                          ('"Packaging"', '["Wang, Bo"]', '2012', '["A"]'),
+                          ('"Packaging"', '"Wang, Bo"', '"2012"', '"A"')])
+        report = self.importText(lines, 'jsonl')
+        self.assertEqual(5, report.getRecordCount())
+        self.assertEqual(1, report.getImportedCount())
+        self.assertEqual([1, 2, 3, 4],
+                         [error[0] for error in report.getErrors()])
+        self.assertTrue(report.getErrors()[0][2].startswith(
+            "Invalid authors"))
+
+    def testImportMistypedKey(self):
+        lines = u"".join(u'{{"type": "book", "title": "Packaging", '
+                         u'"authors": "Wang, Bo", "year": 2012, '
+                         u'"publisher": "Springer", "key": {}}}\n'.format(key)
+                         for key in ['"a"', '["k"]', '{"k": 1}', '"b"'])
+        report = self.importText(lines, 'jsonl')
+        self.assertEqual(4, report.getRecordCount())
+        self.assertEqual(2, report.getImportedCount())
+        self.assertEqual([(2, None), (3, None)],
+                         [error[:2] for error in report.getErrors()])
+        self.assertTrue(report.getErrors()[0][2].startswith("Invalid key"))
+        self.assertEqual(set(["a", "b"]), set(report.getIds()))
+
+    def testDuplicates(self):
+        lines = u"".join(u'{{"type": "book", "title": "{}", "key": "{}", '
+                         u'"authors": ["Wang, Bo"], "year": 2000}}\n'
+                         .format(title, key) for title, key in
+                         [("Packaging", "a"), ("Bonding", "b"),
+                          ("packaging.", "c")])
+        self.dataBase.setDuplicatePolicy(ReferenceDataBase.MERGE_DUPLICATES)
+        report = self.importText(lines, 'jsonl')
+        self.assertEqual(2, len(self.dataBase.getAllPublications()))
+        self.assertEqual(report.getIds()["a"], report.getIds()["c"])
+        self.dataBase.setDuplicatePolicy(ReferenceDataBase.REJECT_DUPLICATES)
+        report = self.importText(lines, 'jsonl')
+        self.assertEqual(0, report.getImportedCount())
+        self.assertEqual([1, 2, 3],
+                         [error[0] for error in report.getErrors()])
+
+    def testBatches(self):
+        lines = u"".join(u'{{"type": "book", "title": "Book {}", '
+                         u'"authors": ["Wang, Bo"], "year": 2000}}\n'
+                         .format(number) for number in range(25))
+        report = self.importText(lines, 'jsonl', batchSize=10, chunkSize=4)
+        self.assertEqual(25, report.getImportedCount())
+        titles = [publication.title for publication in
+                  sorted(self.dataBase.findByAuthor("B. Wang"),
+                         key=lambda publication: publication.id)]
+        self.assertEqual(["Book {}".format(number) for number in range(25)],
+                         titles)
+
+    def testImportFileInProcessPool(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "dump.bib")
+            with io.open(path, 'w', encoding='utf-8') as output:
+                output.write(_BIBTEX * 3)
+            report = Importer(self.dataBase, chunkSize=2,
+                              processes=2).importFile(path)
+        finally:
+            shutil.rmtree(directory)
+        self.assertEqual(12, report.getRecordCount())
+        self.assertEqual(6, report.getImportedCount())
+        self.assertEqual([3, 4, 7, 8, 11, 12],
+                         [error[0] for error in report.getErrors()])
+
+    def testUnsupportedFormat(self):
+        self.assertRaises(IllegalValueException, self.importText, u"", 'xml')
+
+if __name__ == "__main__":
+    unittest.main()
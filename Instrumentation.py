@@ -0,0 +1,299 @@
+"""Counters and latency histograms of the calls of a reference database.
+
+..:: moduleauthor: Wang Bo <wangbomicro@gmail.com>
+"""
+import functools
+import os
+import threading
+import time
+
+class Instrumentation(object):
+    """Statistics of the instrumented methods of an object: per method the
+    number of calls and errors, a histogram of the latencies, the rows
+    scanned and returned, and the citation graph nodes visited; next to the
+    hits and misses of the lookups of each index.
+
+    While disabled, the instrumented object runs its own methods, so the only
+    cost is the check of isEnabled before reporting rows, nodes or lookups.
+    When enabled, the methods are replaced on the object by wrappers timing
+    them; rows, nodes and lookups are attributed to the innermost method
+    running in the reporting thread. The rows of a method returning an
+    iterator, e.g. a ResultStream, are counted as the iterator is consumed,
+    and the rows scanned meanwhile are attributed to that method; its latency
+    only covers the call itself.
+    """
+
+    # The upper bounds, in seconds, of the buckets of the latency histograms;
+    # the last bucket has no bound.
+    latencyBounds = (1.0e-6, 1.0e-5, 1.0e-4, 1.0e-3, 1.0e-2, 1.0e-1, 1.0,
+                     10.0)
+
+    def __init__(self, prefix='referencedatabase'):
+        """Initialize this new, disabled Instrumentation with no statistics.
+
+        Args:
+            prefix (str): The prefix of the Prometheus metric names.
+        """
+        self._prefix = prefix
+        self._isEnabled = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._methods = dict()
+        self._lookups = dict()
+        self._wrapped = []
+
+    def isEnabled(self):
+        """Check whether the statistics are collected.
+        """
+        return self._isEnabled
+
+    def enable(self, target, names):
+        """Start collecting statistics of the given methods of the target.
+
+        Args:
+            target (object): The instrumented object.
+            names (iterable): The names of the methods to be timed.
+        """
+        with self._lock:
+            if self._isEnabled:
+                return
+            for name in names:
+                setattr(target, name, self._wrap(name, getattr(target, name)))
+                self._wrapped.append((target, name))
+            self._isEnabled = True
+
+    def disable(self):
+        """Stop collecting statistics, restoring the methods of the target.
+        The statistics collected so far are kept.
+        """
+        with self._lock:
+            for target, name in self._wrapped:
+                delattr(target, name)
+            self._wrapped = []
+            self._isEnabled = False
+
+    def reset(self):
+        """Remove all statistics collected so far.
+        """
+        with self._lock:
+            self._methods.clear()
+            self._lookups.clear()
+
+    def addScanned(self, count):
+        """Count rows scanned by the running method, e.g. candidates checked
+        against a query.
+        """
+        self._add('rowsScanned', count)
+
+    def addVisited(self, count):
+        """Count citation graph nodes visited by the running method."""
+        self._add('nodesVisited', count)
+
+    def countLookup(self, index, isHit):
+        """Count a lookup of the given index, a hit if it found an entry.
+
+        Args:
+            index (str): The name of the index, e.g. 'author'.
+            isHit (bool): True if the lookup found an entry.
+        """
+        with self._lock:
+            counts = self._lookups.get(index)
+            if counts is None:
+                counts = self._lookups[index] = [0, 0]
+            counts[0 if isHit else 1] += 1
+
+    def getSnapshot(self):
+        """Return a copy of the statistics collected so far.
+
+        Returns:
+            (dict) 'enabled', and per method name under 'methods' a dict of
+            'calls', 'errors', 'seconds', 'buckets' (the calls per latency
+            bucket, as (upper bound, count) pairs with None for no bound),
+            'rowsScanned', 'rowsReturned' and 'nodesVisited'; per index name
+            under 'lookups' a dict of 'hits' and 'misses'.
+        """
+        with self._lock:
+            methods = dict()
+            for name, statistics in self._methods.items():
+                methods[name] = {
+                    'calls': statistics.calls,
+                    'errors': statistics.errors,
+                    'seconds': statistics.seconds,
+                    'buckets': list(zip(self.latencyBounds + (None,),
+                                        statistics.buckets)),
+                    'rowsScanned': statistics.rowsScanned,
+                    'rowsReturned': statistics.rowsReturned,
+                    'nodesVisited': statistics.nodesVisited}
+            lookups = dict((index, {'hits': hits, 'misses': misses})
+                           for index, (hits, misses) in self._lookups.items())
+        return {'enabled': self._isEnabled, 'methods': methods,
+                'lookups': lookups}
+
+    def toPrometheus(self):
+        """Return the statistics in the Prometheus text exposition format.
+        """
+        snapshot = self.getSnapshot()
+        methods = sorted(snapshot['methods'].items())
+        prefix = self._prefix
+        lines = []
+
+        def family(name, type, help, samples):
+            lines.append("# HELP {}_{} {}".format(prefix, name, help))
+            lines.append("# TYPE {}_{} {}".format(prefix, name, type))
+            for suffix, labels, value in samples:
+                lines.append("{}_{}{}{{{}}} {}".format(
+                    prefix, name, suffix, ",".join(
+                        '{}="{}"'.format(label, labelValue)
+                        for label, labelValue in labels), value))
+
+        family('calls_total', 'counter', "Calls of each method.",
+               [('', [('method', name)], statistics['calls'])
+                for name, statistics in methods])
+        family('errors_total', 'counter', "Calls of each method that raised.",
+               [('', [('method', name)], statistics['errors'])
+                for name, statistics in methods])
+        samples = []
+        for name, statistics in methods:
+            cumulative = 0
+            for bound, count in statistics['buckets']:
+                cumulative += count
+                samples.append(('_bucket', [('method', name), (
+                    'le', '+Inf' if bound is None else repr(bound))],
+                    cumulative))
+            samples.append(('_sum', [('method', name)],
+                            repr(statistics['seconds'])))
+            samples.append(('_count', [('method', name)],
+                            statistics['calls']))
+        family('call_seconds', 'histogram', "Latency of each method.",
+               samples)
+        for key, name, help in (
+                ('rowsScanned', 'rows_scanned_total',
+                 "Rows scanned by each method."),
+                ('rowsReturned', 'rows_returned_total',
+                 "Rows returned by each method."),
+                ('nodesVisited', 'traversal_nodes_total',
+                 "Citation graph nodes visited by each method.")):
+            family(name, 'counter', help,
+                   [('', [('method', methodName)], statistics[key])
+                    for methodName, statistics in methods])
+        family('index_lookups_total', 'counter',
+               "Lookups of each index, by result.",
+               [('', [('index', index), ('result', result)], counts[key])
+                for index, counts in sorted(snapshot['lookups'].items())
+                for result, key in (('hit', 'hits'), ('miss', 'misses'))])
+        return "\n".join(lines) + "\n"
+
+    def writePrometheus(self, path):
+        """Write the statistics in the Prometheus text format to the given
+        file, replacing it at once, e.g. for the textfile collector of the
+        node exporter.
+
+        Args:
+            path (str): The path of the file.
+        """
+        temporaryPath = "{}.{}.tmp".format(path, os.getpid())
+        with open(temporaryPath, 'w') as output:
+            output.write(self.toPrometheus())
+        os.replace(temporaryPath, path)
+
+    def _wrap(self, name, method):
+        local = self._local
+
+        @functools.wraps(method)
+        def wrapper(*args, **options):
+            statistics = self._getStatistics(name)
+            outer = getattr(local, 'statistics', None)
+            local.statistics = statistics
+            isError = True
+            start = time.perf_counter()
+            try:
+                result = method(*args, **options)
+                isError = False
+            finally:
+                seconds = time.perf_counter() - start
+                local.statistics = outer
+                if isError:
+                    self._record(statistics, seconds, True, None)
+            returned = None
+            if isinstance(result, (set, frozenset, list, dict, tuple)):
+                returned = len(result)
+            elif hasattr(result, '__next__'):
+                result = _CountingIterator(self, statistics, result)
+            self._record(statistics, seconds, False, returned)
+            return result
+        return wrapper
+
+    def _getStatistics(self, name):
+        statistics = self._methods.get(name)
+        if statistics is None:
+            with self._lock:
+                statistics = self._methods.setdefault(
+                    name, _MethodStatistics(len(self.latencyBounds) + 1))
+        return statistics
+
+    def _record(self, statistics, seconds, isError, returned):
+        bucket = 0
+        bounds = self.latencyBounds
+        while bucket < len(bounds) and seconds > bounds[bucket]:
+            bucket += 1
+        with self._lock:
+            statistics.calls += 1
+            statistics.seconds += seconds
+            statistics.buckets[bucket] += 1
+            if isError:
+                statistics.errors += 1
+            if returned is not None:
+                statistics.rowsReturned += returned
+
+    def _add(self, attribute, count):
+        statistics = getattr(self._local, 'statistics', None)
+        if statistics is None:
+            return
+        with self._lock:
+            setattr(statistics, attribute,
+                    getattr(statistics, attribute) + count)
+
+
+class _CountingIterator(object):
+    """An iterator returned by an instrumented method, counting the rows it
+    returns as rows returned by that method. Other attributes, such as the
+    cursor of a ResultStream, are those of the wrapped iterator."""
+
+    def __init__(self, instrumentation, statistics, iterator):
+        self._instrumentation = instrumentation
+        self._statistics = statistics
+        self._iterator = iterator
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        local = self._instrumentation._local
+        outer = getattr(local, 'statistics', None)
+        local.statistics = self._statistics
+        try:
+            row = next(self._iterator)
+        finally:
+            local.statistics = outer
+        with self._instrumentation._lock:
+            self._statistics.rowsReturned += 1
+        return row
+
+    def __getattr__(self, name):
+        return getattr(self._iterator, name)
+
+
+class _MethodStatistics(object):
+    """The statistics of one method."""
+
+    __slots__ = ('calls', 'errors', 'seconds', 'buckets', 'rowsScanned',
+                 'rowsReturned', 'nodesVisited')
+
+    def __init__(self, bucketCount):
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.buckets = [0] * bucketCount
+        self.rowsScanned = 0
+        self.rowsReturned = 0
+        self.nodesVisited = 0
@@ -0,0 +1,121 @@
+"""Unit Test for Instrumentation
+
+..:: moduleauthors:: Wang Bo <wangbomicro@gmail.com>
+"""
+from Instrumentation import Instrumentation
+import os
+import shutil
+import tempfile
+import unittest
+
+class Target(object):
+    """An object with methods to be instrumented."""
+
+    def __init__(self, instrumentation):
+        self.instrumentation = instrumentation
+
+    def scan(self, count):
+        if self.instrumentation.isEnabled():
+            self.instrumentation.addScanned(count)
+            self.instrumentation.countLookup('rows', count > 0)
+        return list(range(count // 2))
+
+    def visit(self, count):
+        self.instrumentation.addVisited(count)
+        return self.scan(count)
+
+    def stream(self, count):
+        for row in range(count):
+            self.instrumentation.addScanned(2)
+            yield row
+
+    def fail(self):
+        raise ValueError()
+
+
+class InstrumentationTest(unittest.TestCase):
+    """Unit Test for Instrumentation"""
+
+    def setUp(self):
+        self.instrumentation = Instrumentation(prefix='test')
+        self.target = Target(self.instrumentation)
+        self.instrumentation.enable(self.target, ['scan', 'visit', 'stream',
+                                                  'fail'])
+
+    def testSnapshot(self):
+        self.target.scan(10)
+        self.target.scan(0)
+        self.target.visit(4)
+        self.assertRaises(ValueError, self.target.fail)
+        snapshot = self.instrumentation.getSnapshot()
+        self.assertTrue(snapshot['enabled'])
+        scan = snapshot['methods']['scan']
+        self.assertEqual(3, scan['calls'])
+        self.assertEqual(0, scan['errors'])
+        self.assertEqual(14, scan['rowsScanned'])
+        self.assertEqual(7, scan['rowsReturned'])
+        self.assertEqual(3, sum(count for bound, count in scan['buckets']))
+        self.assertEqual(None, scan['buckets'][-1][0])
+        visit = snapshot['methods']['visit']
+        self.assertEqual(4, visit['nodesVisited'])
+        self.assertEqual(0, visit['rowsScanned'])
+        self.assertEqual(2, visit['rowsReturned'])
+        self.assertEqual(1, snapshot['methods']['fail']['errors'])
+        self.assertEqual({'rows': {'hits': 2, 'misses': 1}},
+                         snapshot['lookups'])
+
+    def testIterator(self):
+        rows = self.target.stream(5)
+        self.assertEqual([0, 1], [next(rows), next(rows)])
+        stream = self.instrumentation.getSnapshot()['methods']['stream']
+        self.assertEqual(1, stream['calls'])
+        self.assertEqual(2, stream['rowsReturned'])
+        self.assertEqual(4, stream['rowsScanned'])
+        self.assertEqual([2, 3, 4], list(rows))
+        stream = self.instrumentation.getSnapshot()['methods']['stream']
+        self.assertEqual(5, stream['rowsReturned'])
+        self.assertEqual(10, stream['rowsScanned'])
+
+    def testDisable(self):
+        self.target.scan(2)
+        self.instrumentation.disable()
+        self.assertNotIn('scan', vars(self.target))
+        self.target.scan(2)
+        self.target.visit(2)
+        snapshot = self.instrumentation.getSnapshot()
+        self.assertFalse(snapshot['enabled'])
+        self.assertEqual(1, snapshot['methods']['scan']['calls'])
+        self.assertNotIn('visit', snapshot['methods'])
+        self.instrumentation.reset()
+        self.assertEqual({}, self.instrumentation.getSnapshot()['methods'])
+
+    def testPrometheus(self):
+        self.target.scan(4)
+        self.target.scan(4)
+        text = self.instrumentation.toPrometheus()
+        self.assertIn("# TYPE test_call_seconds histogram\n", text)
+        self.assertIn('test_calls_total{method="scan"} 2\n', text)
+        self.assertIn('test_call_seconds_bucket{method="scan",le="+Inf"} 2\n',
+                      text)
+        self.assertIn('test_call_seconds_count{method="scan"} 2\n', text)
+        self.assertIn('test_rows_scanned_total{method="scan"} 8\n', text)
+        self.assertIn('test_rows_returned_total{method="scan"} 4\n', text)
+        self.assertIn('test_index_lookups_total{index="rows",result="hit"} 2\n',
+                      text)
+
+    def testWritePrometheus(self):
+        self.target.scan(4)
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "referencedatabase.prom")
+            self.instrumentation.writePrometheus(path)
+            with open(path) as input:
+                self.assertEqual(self.instrumentation.toPrometheus(),
+                                 input.read())
+            self.assertEqual(["referencedatabase.prom"],
+                             os.listdir(directory))
+        finally:
+            shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,7 +5,7 @@ title, authors, year, JournalArtical have a journalName and a issueNumber.
 ..:: invar:  The issueNumber must be a valid issueNumber.
 """
 from Exceptions import IllegalIssueNumberException, IllegalWeightException
-import Publication
+from Publication import Publication
 
 class JournalArticle(Publication):
     """Initialize this new journalArticle with given title, authors, journal,
@@ -31,6 +31,8 @@ class JournalArticle(Publication):
          IllegalIssueNumberException if the given issueNumber is invalid
          IllegalYearException if the given year is invalid
      """
+    __slots__ = ('_journal', '_issueNumber')
+    
     _weight = 1.0
     
     def __init__(self, title, authors, journal, issueNumber, year):
@@ -39,7 +41,7 @@ class JournalArticle(Publication):
             raise IllegalIssueNumberException(issueNumber)
         self._issueNumber = issueNumber
         
-        self._journal = journal
+        self._journal = self._strings.intern(journal)
     
     @property
     def journal(self):
@@ -48,7 +50,7 @@ class JournalArticle(Publication):
         Returns:
             str: The journal name of this Publication.
         """
-        return self.__journal
+        return self._journal
     
     @journal.setter
     def journal(self, journal):
@@ -57,8 +59,11 @@ class JournalArticle(Publication):
         Args:
             journal (str): The journal name of this Publication
         """
-        if not self.isValidIssueNumber(journal):
-            self.__journal = journal
+        with self._changeLocked():
+            self._checkChangeable('journal')
+            oldJournal = self._journal
+            self._journal = self._strings.intern(journal)
+            self._notifyDatabase('journal', oldJournal)
     
     @property
     def issueNumber(self):
@@ -67,7 +72,7 @@ class JournalArticle(Publication):
         Returns:
             int: The issueNumber of the Publication.
         """
-        return self.__issueNumber
+        return self._issueNumber
     
     @issueNumber.setter
     def issueNumber(self, issueNumber):
@@ -80,7 +85,11 @@ class JournalArticle(Publication):
         if not self.isValidIssueNumber(issueNumber):
             raise IllegalIssueNumberException(issueNumber)
         else:
-            self.__issueNumber = issueNumber
+            with self._changeLocked():
+                self._checkChangeable('issueNumber')
+                oldIssueNumber = self._issueNumber
+                self._issueNumber = issueNumber
+                self._notifyDatabase('issueNumber', oldIssueNumber)
     
     def isValidIssueNumber(self, issueNumber):
         """Check whether the given issueNumber is a valid issue number.
@@ -94,6 +103,22 @@ class JournalArticle(Publication):
         """
         return issueNumber > 0
     
+    def __repr__(self):
+        """The internal representation of the JournalArticle
+        """
+        return "JournalArticle({title},{authors},{journal},{issueNumber},{year})".\
+            format(title = self.title, authors = self.authors, 
+                   journal = self.journal, issueNumber = self.issueNumber,
+                   year = self.year)
+    
+    def __str__(self):
+        """The string representation of the JournalArticle
+        """
+        return "{authors}, {title}, {journal}, {issueNumber}, {year}".\
+            format(authors = ', '.join(self.getAuthorsName()), title = self.title, 
+                   journal = self.journal, issueNumber = self.issueNumber,
+                   year = self.year)
+    
 
      
  
@@ -0,0 +1,137 @@
+"""A report of the memory used per publication record.
+
+..:: moduleauthor: Wang Bo <wangbomicro@gmail.com>
+"""
+from Publication import Publication
+import sys
+
+class MemoryReport(object):
+    """Report of the bytes used by a collection of publications, per
+    publication type.
+
+    A record is measured as the publication object itself plus everything
+    it owns: its title, author list and names, venue, year and citation
+    containers. Objects shared between records, such as strings from the
+    shared string table, are counted once, for the first record using them.
+    Cited and citing publications and the database are not counted.
+    """
+
+    def __init__(self, publications):
+        """Initialize this new MemoryReport by measuring the given
+        publications.
+
+        Args:
+            publications (iterable): The publications to be measured.
+        """
+        self._counts = dict()
+        self._bytes = dict()
+        seen = set()
+        for publication in publications:
+            name = type(publication).__name__
+            self._counts[name] = self._counts.get(name, 0) + 1
+            self._bytes[name] = self._bytes.get(name, 0) + \
+                self.getRecordSize(publication, seen)
+
+    @classmethod
+    def getRecordSize(cls, publication, seen=None):
+        """Return the number of bytes used by the given publication.
+
+        Args:
+            publication (Publication): The publication to be measured.
+            seen (set): The ids of the objects already counted, which are
+                skipped and extended with the objects counted now.
+        Returns:
+            (int) The size of the publication record in bytes.
+        """
+        if seen is None:
+            seen = set()
+        size = sys.getsizeof(publication)
+        for value in cls._getAttributeValues(publication):
+            size += cls._getValueSize(value, seen)
+        return size
+
+    def getRecordCount(self, typeName=None):
+        """Return the number of measured records.
+
+        Args:
+            typeName (str): The publication type to count, None for all.
+        """
+        if typeName is None:
+            return sum(self._counts.values())
+        return self._counts.get(typeName, 0)
+
+    def getTotalBytes(self, typeName=None):
+        """Return the number of bytes used by the measured records.
+
+        Args:
+            typeName (str): The publication type to count, None for all.
+        """
+        if typeName is None:
+            return sum(self._bytes.values())
+        return self._bytes.get(typeName, 0)
+
+    def getBytesPerRecord(self, typeName=None):
+        """Return the average number of bytes per measured record.
+
+        Args:
+            typeName (str): The publication type to count, None for all.
+        """
+        count = self.getRecordCount(typeName)
+        if count == 0:
+            return 0.0
+        return float(self.getTotalBytes(typeName)) / count
+
+    def __str__(self):
+        """The table of records, bytes and bytes per record per type.
+        """
+        lines = ["{:<16} {:>10} {:>14} {:>10}".format(
+            "type", "records", "bytes", "per record")]
+        for name in sorted(self._counts) + [None]:
+            lines.append("{:<16} {:>10} {:>14} {:>10.1f}".format(
+                name or "total", self.getRecordCount(name),
+                self.getTotalBytes(name), self.getBytesPerRecord(name)))
+        return "\n".join(lines)
+
+    @staticmethod
+    def _getAttributeValues(publication):
+        values = []
+        for cls in type(publication).__mro__:
+            for name in cls.__dict__.get('__slots__', ()):
+                if name.startswith('__') and not name.endswith('__'):
+                    name = '_' + cls.__name__.lstrip('_') + name
+                if hasattr(publication, name):
+                    values.append(getattr(publication, name))
+        if hasattr(publication, '__dict__'):
+            values.append(publication.__dict__)
+            values.extend(publication.__dict__.values())
+        return values
+
+    @classmethod
+    def _getValueSize(cls, value, seen):
+        if value is None or id(value) in seen or \
+                isinstance(value, Publication) or \
+                type(value).__name__ == 'ReferenceDataBase':
+            return 0
+        seen.add(id(value))
+        size = sys.getsizeof(value)
+        if isinstance(value, (list, tuple, set, frozenset)):
+            for element in value:
+                size += cls._getValueSize(element, seen)
+        return size
+
+
+if __name__ == "__main__":
+    from Book import Book
+    from ConferencePaper import ConferencePaper
+    from JournalArticle import JournalArticle
+    publications = []
+    for number in range(10000):
+        authors = ["Wang, Bo", "De Coster, Jeroen", "Author, Number %s" %
+                   "abcdefghij"[number % 10]]
+        publications.append(JournalArticle("Article %d" % number, authors,
+                                           "journal of MEMS", 1, 2010))
+        publications.append(Book("Book %d" % number, authors, 2010,
+                                 "Springer"))
+        publications.append(ConferencePaper("Paper %d" % number, authors, 2010,
+                                            "Transducers"))
+    print(MemoryReport(publications))
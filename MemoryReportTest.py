@@ -0,0 +1,39 @@
+"""Unit Test for MemoryReport
+
+..:: moduleauthors:: Wang Bo <wangbomicro@gmail.com>
+"""
+from Book import Book
+from JournalArticle import JournalArticle
+from MemoryReport import MemoryReport
+import unittest
+
+class MemoryReportTest(unittest.TestCase):
+    """Unit Test for MemoryReport"""
+
+    def setUp(self):
+        self.book1 = Book("Book one", ["Steegmans, Eric"], 2014, "acco")
+        self.book2 = Book("Book two", ["".join(["Steeg", "mans, Eric"])],
+                          2014, "".join(["ac", "co"]))
+        self.article = JournalArticle("Article", ["Wang, Bo"],
+                                      "journal of MEMS", 123, 2010)
+
+    def testSharedStringsCountedOnce(self):
+        seen = set()
+        first = MemoryReport.getRecordSize(self.book1, seen)
+        second = MemoryReport.getRecordSize(self.book2, seen)
+        self.assertTrue(second < first)
+
+    def testNoInstanceDictionary(self):
+        for publication in (self.book1, self.article):
+            self.assertFalse(hasattr(publication, '__dict__'))
+
+    def testReport(self):
+        report = MemoryReport([self.book1, self.book2, self.article])
+        self.assertEqual(3, report.getRecordCount())
+        self.assertEqual(2, report.getRecordCount("Book"))
+        self.assertEqual(report.getTotalBytes("Book") / 2.0,
+                         report.getBytesPerRecord("Book"))
+        self.assertTrue("JournalArticle" in str(report))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""Unit Test for NearDuplicateIndex
+
+..:: moduleauthors:: Wang Bo <wangbomicro@gmail.com>
+"""
+from NearDuplicateIndex import NearDuplicateIndex
+from Publication import Publication
+import unittest
+
+class NearDuplicateIndexTest(unittest.TestCase):
+    """Unit Test for NearDuplicateIndex"""
+
+    def setUp(self):
+        self.index = NearDuplicateIndex()
+        self.publications = [
+            Publication("Gas leak rate study of MEMS packages",
+                        ["Wang, Bo", "Wevers, Martine"], 1990),
+            Publication("Gas leak-rate study of MEMS packges",
+                        ["Wevers, Martine", "Wang, Bo"], 1990),
+            Publication("Thin film getters", ["Mao, Shengping"], 2014),
+            Publication("Thin film getters for MEMS packages",
+                        ["Mao, Shengping"], 2014)]
+        for id, publication in enumerate(self.publications, 1001):
+            publication.id = id
+        self.index.addAll(self.publications)
+
+    def testFeatures(self):
+        features = NearDuplicateIndex.features("MEMS!", ["Wang, Bo"])
+        self.assertEqual(set(["t:mem", "t:ems", "a:b. wang"]), features)
+        self.assertEqual(NearDuplicateIndex.features("Gas leak",
+                                                     ["Wang, Bo", "Mao, S"]),
+                         NearDuplicateIndex.features("gas  leak.",
+                                                     ["Mao, S", "Wang, Bo"]))
+
+    def testSimilarity(self):
+        signature = self.index.signature("Thin film getters", ["Mao, S"])
+        self.assertEqual(1.0, NearDuplicateIndex.similarity(signature,
+                                                            signature))
+        other = self.index.signature("Packaging of MEMS", ["Wang, Bo"])
+        self.assertTrue(NearDuplicateIndex.similarity(signature, other) < 0.2)
+
+    def testSimilarityEstimate(self):
+        index = NearDuplicateIndex(bands=250)
+        titles = ["Gas leak rate study of MEMS packages",
+                  "Gas leak rate of hermetic MEMS packages",
+                  "Leak rate study of wafer level packages",
+                  "Thin film getters for MEMS packages",
+                  "Thin film getters for vacuum packaging",
+                  "Study of thin film getters"]
+        errors = []
+        for first in titles:
+            for second in titles:
+                if first < second:
+                    features = NearDuplicateIndex.features(first, [])
+                    other = NearDuplicateIndex.features(second, [])
+                    exact = len(features & other) / float(len(features |
+                                                              other))
+                    estimate = NearDuplicateIndex.similarity(
+                        index.signature(first, []),
+                        index.signature(second, []))
+                    errors.append(abs(estimate - exact))
+        self.assertTrue(max(errors) < 0.06)
+        self.assertTrue(sum(errors) / len(errors) < 0.025)
+
+    def testFind(self):
+        matches = self.index.find(self.publications[0], 0.6)
+        self.assertEqual([1001, 1002], sorted(id for id, similarity in matches))
+        self.assertEqual((1001, 1.0), matches[0])
+        self.assertEqual([], self.index.find(Publication(
+            "Wafer bonding", ["Witvrouw, Ann"], 2000), 0.5))
+
+    def testCluster(self):
+        self.assertEqual([[1001, 1002]], self.index.cluster(0.6))
+
+    def testUpdateAndRemove(self):
+        publication = self.publications[3]
+        publication.title = "Thin film getter"
+        self.index.update(publication, 'title',
+                          "Thin film getters for MEMS packages")
+        self.assertEqual([[1001, 1002], [1003, 1004]], self.index.cluster(0.6))
+        self.index.remove(self.publications[0])
+        self.assertEqual([[1003, 1004]], self.index.cluster(0.6))
+
+    def testAddAllInProcessPool(self):
+        index = NearDuplicateIndex()
+        index.addAll(self.publications, processes=2, chunkSize=1)
+        self.assertEqual(self.index.cluster(0.6), index.cluster(0.6))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,9 +3,13 @@ year of publication and a ID number.
 
 .. moduleauthor:: Wang Bo <wangbomicro@gmail.com>
 """
+from CitationView import CitationView
 from Exceptions import *
+from StringTable import StringTable
+import contextlib
 import datetime
 import re
+import weakref
 
 class Publication(object):
     """Class of Publication to refer to an publication in a scientific journal.
@@ -20,6 +24,25 @@ class Publication(object):
             The publication must has a proper cites and proper citedBy property. 
     """
     
+    __slots__ = ('__title', '__authors', '__year', '__terminate', '__id', 
+                 '__database', 'cites', 'citedBy', '__weakref__')
+    
+    # Shared by all publications, so equal author and venue names are stored 
+    # only once.
+    _strings = StringTable()
+    
+    # Placeholder for the cites and citedBy of publications without 
+    # citations, replaced by a set of their own on the first citation.
+    _noCitations = frozenset()
+    
+    _weight = 1.0
+    
+    # The databases to tell when the weight of a publication type changes.
+    _weightListeners = weakref.WeakSet()
+    
+    # The lock of citation changes between publications outside databases.
+    _unlocked = contextlib.nullcontext()
+    
     def __init__(self, title, authors, year):
         """Initialize this new Publication with given title, authors, journal, 
         issueNumber and year.
@@ -46,7 +69,7 @@ class Publication(object):
         if not self.isValidAuthors(authors):
             raise IllegalAuthorsException(authors)
         else:
-            self.__authors = authors
+            self.__authors = self._internAuthors(authors)
         
         if not self.isValidYear(year):
             raise IllegalYearException(year)
@@ -54,11 +77,12 @@ class Publication(object):
             self.__year = year
         
         #Initialize this publication with empty cites and citedBy property. 
-        self.cites = set()
-        self.citedBy = set()
+        self.cites = self._noCitations
+        self.citedBy = self._noCitations
         
         self.__terminate = False
         self.__id = -1
+        self.__database = None
         
     @property
     def authors(self):
@@ -80,8 +104,19 @@ class Publication(object):
         if not self.isValidAuthors(authors):
             raise IllegalAuthorsException(authors)
         else:
-            self.__authors = authors
+            with self._changeLocked():
+                self._checkChangeable('authors')
+                oldAuthors = self.__authors
+                self.__authors = self._internAuthors(authors)
+                self._notifyDatabase('authors', oldAuthors)
         
+    @classmethod
+    def _internAuthors(cls, authors):
+        """Return a list of the given authors names taken from the shared 
+        string table.
+        """
+        return [cls._strings.intern(author) for author in authors]
+    
     @property
     def title(self):
         """The title of the publication
@@ -95,7 +130,11 @@ class Publication(object):
         Args:
             title (str): The title of this publication
         """
-        self.__title = title
+        with self._changeLocked():
+            self._checkChangeable('title')
+            oldTitle = self.__title
+            self.__title = title
+            self._notifyDatabase('title', oldTitle)
         
     
     @property
@@ -116,7 +155,11 @@ class Publication(object):
         if not self.isValidYear(year):
             raise IllegalYearException(year)
         else:
-            self.__year = year
+            with self._changeLocked():
+                self._checkChangeable('year')
+                oldYear = self.__year
+                self.__year = year
+                self._notifyDatabase('year', oldYear)
     
     @property
     def id(self):
@@ -132,6 +175,88 @@ class Publication(object):
         """
         self.__id = val
     
+    @property
+    def database(self):
+        """The ReferenceDataBase this publication is attached to, or None.
+        
+        """
+        return self.__database
+    
+    @database.setter
+    def database(self, database):
+        """Attach this publication to the given ReferenceDataBase.
+        
+        Only the ReferenceDataBase itself is supposed to set this.
+        """
+        self.__database = database
+    
+    def _notifyCitation(self, cited):
+        """Tell the databases of both ends that the citation from this 
+        publication to the given publication was added or removed.
+        
+        Args:
+            cited (Publication): The cited end of the changed citation.
+        """
+        if self.__database is not None:
+            self.__database.citationChanged(self, cited)
+        if cited.database is not None and cited.database is not self.__database:
+            cited.database.citationChanged(self, cited)
+    
+    def _citationLocked(self, other):
+        """Return a context manager holding the write locks of the databases 
+        of this and the given publication, taken in a fixed order, while the 
+        enclosed statements change the citation between them.
+        
+        Args:
+            other (Publication): The other end of the citation.
+        """
+        database, otherDatabase = self.__database, other.database
+        if otherDatabase is None or otherDatabase is database:
+            return self._unlocked if database is None else \
+                database.writeLocked()
+        if database is None:
+            return otherDatabase.writeLocked()
+        return self._bothLocked(*sorted((database, otherDatabase), key=id))
+    
+    @staticmethod
+    @contextlib.contextmanager
+    def _bothLocked(first, second):
+        with first.writeLocked():
+            with second.writeLocked():
+                yield
+    
+    def _changeLocked(self):
+        """Return a context manager holding the write lock of the database 
+        this publication is attached to, if any, while the enclosed 
+        statements change an attribute and update the indexes, so readers 
+        never see one without the other.
+        """
+        database = self.__database
+        return self._unlocked if database is None else database.writeLocked()
+    
+    def _checkChangeable(self, attribute):
+        """Ask the database this publication is attached to whether the given 
+        attribute may change, before it is changed.
+        
+        Args:
+            attribute (str): The name of the attribute to be changed.
+        Throws:
+            IllegalStateException: The database is read-only.
+        """
+        if self.__database is not None:
+            self.__database.publicationChanging(self, attribute)
+    
+    def _notifyDatabase(self, attribute, oldValue):
+        """Tell the database this publication is attached to that the given 
+        attribute changed, so it can keep its indexes up to date.
+        
+        Args:
+            attribute (str): The name of the changed attribute.
+            oldValue: The value of the attribute before the change.
+        """
+        if self.__database is not None:
+            self.__database.publicationChanged(self, attribute, oldValue)
+    
     def isTheSameAs(self, Other):
         """Check if the given publication is the same as this.
         
@@ -158,14 +283,24 @@ class Publication(object):
         return Other in self.cites
     
     def getAllCites(self):
+        """Return a read-only view of all publications that this publication 
+        cites, following later changes without copying them.
+        
+        Returns:
+            (CitationView) the publications that this publication cited.
+     
+        """
+        return CitationView(self, True)
+    
+    def getCitesSnapshot(self):
         """Return a set collecting shallow copy of all publications that 
-        this publication has been cited.
+        this publication cites, for callers that change the citations while 
+        going through them.
         
         Returns:
             (set) the set of publications that this publication cited.
-     
         """
-        return self.cites.copy()
+        return set(self.cites)
     
     def canCites(self, Other):
         """Check if this can cites the other publication.
@@ -200,12 +335,41 @@ class Publication(object):
             IllegalArgumentException: This publication cannot have the given 
             publication as one of its cites publication. 
         """
-        if (not self.canCites(other)):
-            raise IllegalValueException("This Publication can not cites the given\
-            Exception.")
-
-        self.cites.add(other)
-        other.citedBy.add(self)
+        with self._citationLocked(other):
+            if (not self.canCites(other)):
+                raise IllegalValueException("This Publication can not cites the \
+                given Exception.")
+            self.linkAsCite(other)
+    
+    def linkAsCite(self, other):
+        """Add the given publication as cited publication of this publication 
+        without checking whether this publication can cite it.
+        
+        Only meant for callers that already checked canCites and hold the 
+        write locks of the databases involved, such as the bulk operations of 
+        ReferenceDataBase.
+        
+        Args:
+            other (Publication): The publication to be add as cited publication. 
+        """
+        self._getMutableCites().add(other)
+        other._getMutableCitedBy().add(self)
+        self._notifyCitation(other)
+    
+    def unlinkAsCite(self, other):
+        """Remove the given publication from the cited publications of this 
+        publication, and this from the citing publications of the given one, 
+        whichever of both is present; undoes a linkAsCite, even one that 
+        failed half way.
+        
+        Only meant for the same callers as linkAsCite.
+        
+        Args:
+            other (Publication): The publication to be removed.
+        """
+        self._getMutableCites().discard(other)
+        other._getMutableCitedBy().discard(self)
+        self._notifyCitation(other)
     
     def removeAsCite(self, other):
         """Remove the given publication from the cites set attached to 
@@ -222,10 +386,28 @@ class Publication(object):
              publication, the given publication remove this publication from 
              its citedBy set.
         """
-        if (self.alreadyCites(other)):
-            self.cites.remove(other)
-            other.citedBy.remove(self)
+        with self._citationLocked(other):
+            if (self.alreadyCites(other)):
+                self.cites.remove(other)
+                other.citedBy.remove(self)
+                self._notifyCitation(other)
         
+    def _getMutableCites(self):
+        """Return the cites set of this publication, giving it a set of its 
+        own first if it still has the shared empty placeholder.
+        """
+        if self.cites is self._noCitations:
+            self.cites = set()
+        return self.cites
+    
+    def _getMutableCitedBy(self):
+        """Return the citedBy set of this publication, giving it a set of its 
+        own first if it still has the shared empty placeholder.
+        """
+        if self.citedBy is self._noCitations:
+            self.citedBy = set()
+        return self.citedBy
+    
     def haveProperCites(self):
         """Check whether this publication has proper cites attached to it.
         
@@ -254,13 +436,23 @@ class Publication(object):
         return other in self.citedBy
     
     def getAllCitedBy(self):
+        """Return a read-only view of all publications that cite this 
+        publication, following later changes without copying them.
+        
+        Returns:
+            (CitationView) the publications that cited this.
+        """
+        return CitationView(self, False)
+    
+    def getCitedBySnapshot(self):
         """Return a set collecting shallow copy of all publication that cites 
-        this publication.
+        this publication, for callers that change the citations while going 
+        through them.
         
         Returns:
             (set) the set of publications that cited this.
         """
-        return self.citedBy.copy() 
+        return set(self.citedBy)
     
     
     def canBeCitedBy(self, Other):
@@ -273,7 +465,7 @@ class Publication(object):
             this publication and the given publication is not yet terminated.
         """
         return (Other is not None) and (not self.isTheSameAs(Other)) \
-            and (self.year >= Other.year) and (not self.isTerminated()) \
+            and (Other.year >= self.year) and (not self.isTerminated()) \
             and (not Other.isTerminated())
         
     def addAsCiteBy(self, other):
@@ -292,12 +484,13 @@ class Publication(object):
             IllegalArgumentException This publication cannot have the given 
             publication as one of its citedBy publication.
         """
-        if (not self.canBeCitedBy(other)):
-            raise IllegalValueException("This Publication can not be cited by the \
-            given Exception.")
-
-        self.citedBy.add(other)
-        other.cites.add(self)
+        with self._citationLocked(other):
+            if (not self.canBeCitedBy(other)):
+                raise IllegalValueException("This Publication can not be cited \
+                by the given Exception.")
+            self._getMutableCitedBy().add(other)
+            other._getMutableCites().add(self)
+            other._notifyCitation(self)
 
     def removeAsCitedBy(self, other):
         """Remove the given publication from the citedBy set attached to this.
@@ -313,11 +506,13 @@ class Publication(object):
             publication, the given publication remove this publication from its 
             cites Set.
         """
-        if (self.alreadyCitedBy(other)):
-            self.citedBy.remove(other)
-            other.cites.remove(self)
+        with self._citationLocked(other):
+            if (self.alreadyCitedBy(other)):
+                self.citedBy.remove(other)
+                other.cites.remove(self)
+                other._notifyCitation(self)
     
-    def isTerminated(self, other):
+    def isTerminated(self):
         """Check whether this publication is already terminated.
         """
         return self.__terminate
@@ -332,13 +527,14 @@ class Publication(object):
             set of this Publication. The cites and citeBy set of those 
             publications also removed this publication.
         """
-        for citedPublication in self.getAllCites():
+        for citedPublication in self.getCitesSnapshot():
             if not citedPublication.isTerminated():
-                self.removeAsCites(citedPublication)
-        for publicationCitedThis in self.getAllCitedBy():
+                self.removeAsCite(citedPublication)
+        for publicationCitedThis in self.getCitedBySnapshot():
             if not publicationCitedThis.isTerminated():
                 self.removeAsCitedBy(publicationCitedThis)
-        self.isTerminated = True
+        self.__terminate = True
+        self._notifyDatabase('terminated', False)
         
     def haveProperCitedBy(self):
         """ Check whether this publication has proper citedBy publication 
@@ -386,7 +582,7 @@ class Publication(object):
         Returns:
             bool: True if the name is valid, false if the name are invalid.
         """
-        return re.match('^[a-zA-Z ]{1,20}, [a-zA-Z][a-zA-Z ]{1,20}$', author) is not None
+        return re.match(r'^[a-zA-Z ]{1,20}, [a-zA-Z][a-zA-Z ]{1,20}$', author) is not None
     
     
     @classmethod
@@ -421,11 +617,20 @@ class Publication(object):
         Returns:
             str: the authors names.
         """
-        authorNameList = []
-        for author in self.authors:
-            last, first = author.split(", ")
-            authorNameList.append(first[0].upper() + ". " + last)
-        return authorNameList            
+        return [self.getAuthorName(author) for author in self.authors]
+    
+    @classmethod
+    def getAuthorName(cls, author):
+        """Returns the given author name in the "A. Einstein" form.
+        
+        Args:
+            author (str): The author name given as "Einstein, Albert".
+        
+        Returns:
+            str: the author's initial and the last name.
+        """
+        last, first = author.split(", ")
+        return first[0].upper() + ". " + last
     
     def captializeTitle(self):
         """Set the first letter of each word of given string to uppercase.
@@ -445,10 +650,9 @@ class Publication(object):
     def __repr__(self):
         """The internal representation of the Publication
         """
-        return "Publication({title},{authors},{journal},{issueNumber},{year})".\
-            format(title = self.title, authors = self.authors, 
-                   journal = self.journal, issueNumber = self.issueNumber,
-                   year = self.year)
+        return "{cls}({title},{authors},{year})".\
+            format(cls = type(self).__name__, title = self.title, 
+                   authors = self.authors, year = self.year)
     
     def __str__(self):
         """The string representation of the Publication
@@ -456,9 +660,8 @@ class Publication(object):
         Returns:
             str: The String representation of the Publication
         """
-        return "{authors}, {title}, {journal}, {issueNumber}, {year}".\
+        return "{authors}, {title}, {year}".\
             format(authors = ', '.join(self.getAuthorsName()), title = self.title, 
-                   journal = self.journal, issueNumber = self.issueNumber,
                    year = self.year)
     
     @classmethod
@@ -480,6 +683,18 @@ class Publication(object):
         if not cls.isValidWeight(val):
             raise IllegalWeightException(val)
         cls._weight = val;
+        for listener in list(Publication._weightListeners):
+            listener.weightChanged(cls)
+    
+    @staticmethod
+    def addWeightListener(listener):
+        """Tell the given listener, e.g. a database, about every weight change 
+        of a publication type, for as long as it exists.
+        
+        Args:
+            listener: An object with a weightChanged(cls) method.
+        """
+        Publication._weightListeners.add(listener)
     
     @classmethod    
     def getWeight(cls):
@@ -492,5 +707,5 @@ class Publication(object):
 
 if __name__ == "__main__":
     R1 = Publication("title", "Bo Wang", "MEMS", 12222, 1986)
-    print dir(R1.authors)
-    print R1.authors.__doc__
+    print(dir(R1.authors))
+    print(R1.authors.__doc__)
@@ -0,0 +1,329 @@
+"""Composable query predicates over publications, and the planner that
+evaluates them with the indexes of a reference database.
+
+..:: moduleauthor: Wang Bo <wangbomicro@gmail.com>
+
+Predicates are combined with & and |, e.g.
+
+    (AuthorIs("B. Wang") | AuthorIs("S. Mao")) & YearBetween(2000, 2010) &
+    TypeIs(JournalArticle)
+
+and evaluated by ReferenceDataBase.find. A predicate with an index behind it
+looks up its IDs; the others are checked per candidate publication.
+"""
+from Exceptions import IllegalValueException
+from TitleIndex import TitleIndex
+
+
+class Query(object):
+    """A predicate over publications.
+
+    A predicate estimates the number of publications it selects from the
+    indexes, or returns None from estimate if no index answers it; then it
+    can only be checked with matches, one publication at a time.
+    """
+
+    __slots__ = ()
+
+    def __and__(self, other):
+        return AllOf(self, other)
+
+    def __or__(self, other):
+        return AnyOf(self, other)
+
+    def estimate(self, context):
+        """Return an upper bound of the number of publications selected by
+        this predicate, from the indexes of the given context, or None if
+        this predicate has no index.
+
+        Args:
+            context (QueryContext): The indexes and publications to be
+                queried.
+        """
+        return None
+
+    def select(self, context):
+        """Return the IDs of the publications selected by this predicate.
+
+        Args:
+            context (QueryContext): The indexes and publications to be
+                queried.
+        Returns:
+            (set) The IDs of the selected publications.
+        """
+        context.addStep("scan {!r}".format(self))
+        context.scannedCount += len(context.publications)
+        return set(id for id, publication in context.publications.items()
+                   if self.matches(publication))
+
+    def matches(self, publication):
+        """Check whether the given publication satisfies this predicate.
+
+        Args:
+            publication (Publication): The publication to be checked.
+        """
+        raise NotImplementedError
+
+    def __repr__(self):
+        return "{}({})".format(type(self).__name__, ", ".join(
+            repr(getattr(self, name)) for name in self.__slots__))
+
+
+class QueryContext(object):
+    """The indexes and publications a query is evaluated over, the steps
+    taken, for explaining the plan, and the number of rows scanned: index
+    entries read and publications checked.
+    """
+
+    def __init__(self, publications, indexes):
+        """Initialize this new QueryContext.
+
+        Args:
+            publications (dict): The publications by ID.
+            indexes (dict): The indexes by name: 'author', 'title' and
+                'year'; predicates without their index check publications
+                one by one.
+        """
+        self.publications = publications
+        self.indexes = indexes
+        self.steps = []
+        self.scannedCount = 0
+
+    def addStep(self, step):
+        """Record a step of the evaluation.
+        """
+        self.steps.append(step)
+
+
+class AuthorIs(Query):
+    """Publications written by the given author, e.g. "A. Einstein"."""
+
+    __slots__ = ('authorName',)
+
+    def __init__(self, authorName):
+        self.authorName = authorName
+
+    def estimate(self, context):
+        return context.indexes['author'].count(self.authorName)
+
+    def select(self, context):
+        context.addStep("index {!r}".format(self))
+        ids = context.indexes['author'].find(self.authorName)
+        context.scannedCount += len(ids)
+        return ids
+
+    def matches(self, publication):
+        return self.authorName in publication.getAuthorsName()
+
+
+class TitleHas(Query):
+    """Publications whose title has all words of the given text, matched
+    case-insensitively and, with prefix, as word prefixes."""
+
+    __slots__ = ('words', 'prefix')
+
+    def __init__(self, words, prefix=False):
+        if not TitleIndex.tokenize(words):
+            raise IllegalValueException("A title query needs a word.")
+        self.words = words
+        self.prefix = prefix
+
+    def estimate(self, context):
+        index = context.indexes['title']
+        count = index.countPrefix if self.prefix else index.countToken
+        return min(count(token) for token in TitleIndex.tokenize(self.words))
+
+    def select(self, context):
+        context.addStep("index {!r}".format(self))
+        ids = context.indexes['title'].search(self.words, True, self.prefix)
+        context.scannedCount += len(ids)
+        return ids
+
+    def matches(self, publication):
+        titleTokens = TitleIndex.tokenize(publication.title)
+        for token in TitleIndex.tokenize(self.words):
+            if self.prefix:
+                if not any(titleToken.startswith(token)
+                           for titleToken in titleTokens):
+                    return False
+            elif token not in titleTokens:
+                return False
+        return True
+
+
+class YearBetween(Query):
+    """Publications published from the first to the last given year, both
+    included; None leaves that end open."""
+
+    __slots__ = ('first', 'last')
+
+    def __init__(self, first=None, last=None):
+        self.first = first
+        self.last = last
+
+    def estimate(self, context):
+        index = context.indexes.get('year')
+        return None if index is None else index.countRange(self.first,
+                                                           self.last)
+
+    def select(self, context):
+        if 'year' not in context.indexes:
+            return Query.select(self, context)
+        context.addStep("index {!r}".format(self))
+        ids = context.indexes['year'].findRange(self.first, self.last)
+        context.scannedCount += len(ids)
+        return ids
+
+    def matches(self, publication):
+        return (self.first is None or publication.year >= self.first) and \
+            (self.last is None or publication.year <= self.last)
+
+
+class TypeIs(Query):
+    """Publications of the given type, e.g. Book, or one of its subtypes."""
+
+    __slots__ = ('type',)
+
+    def __init__(self, type):
+        self.type = type
+
+    def matches(self, publication):
+        return isinstance(publication, self.type)
+
+
+class VenueIs(Query):
+    """Publications with the given publisher, conference or journal."""
+
+    __slots__ = ('venue',)
+
+    _venueAttributes = ('publisher', 'conference', 'journal')
+
+    def __init__(self, venue):
+        self.venue = venue
+
+    def matches(self, publication):
+        return any(getattr(publication, attribute, None) == self.venue
+                   for attribute in self._venueAttributes)
+
+
+class CitedBetween(Query):
+    """Publications cited directly by at least minimum and, unless it is
+    None, at most maximum publications."""
+
+    __slots__ = ('minimum', 'maximum')
+
+    def __init__(self, minimum=0, maximum=None):
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def matches(self, publication):
+        count = len(publication.getAllCitedBy())
+        return count >= self.minimum and \
+            (self.maximum is None or count <= self.maximum)
+
+
+class AllOf(Query):
+    """Publications satisfying every given predicate.
+
+    The indexed predicates are taken from the most to the least selective:
+    the first one gives the candidates, and each next one is intersected
+    while its estimate is within a small factor of the candidates left;
+    the rest is checked per candidate. The cost is thereby proportional to
+    the smallest indexed result.
+    """
+
+    __slots__ = ('queries',)
+
+    # An index result is intersected when it is at most this many times
+    # larger than the candidates; otherwise checking them is cheaper.
+    _intersectionFactor = 4
+
+    def __init__(self, *queries):
+        self.queries = _flatten(AllOf, queries)
+
+    def __and__(self, other):
+        return AllOf(*(self.queries + (other,)))
+
+    def estimate(self, context):
+        estimates = [estimate for estimate in
+                     (query.estimate(context) for query in self.queries)
+                     if estimate is not None]
+        return min(estimates) if estimates else None
+
+    def select(self, context):
+        indexed = []
+        checked = []
+        for query in self.queries:
+            estimate = query.estimate(context)
+            if estimate is None:
+                checked.append(query)
+            else:
+                indexed.append((estimate, query))
+        indexed.sort(key=lambda item: item[0])
+        if not indexed:
+            return Query.select(self, context)
+        ids = indexed[0][1].select(context)
+        for estimate, query in indexed[1:]:
+            if not ids:
+                break
+            if estimate <= self._intersectionFactor * len(ids):
+                ids &= query.select(context)
+            else:
+                checked.append(query)
+        if checked and ids:
+            context.addStep("check {}".format(", ".join(
+                repr(query) for query in checked)))
+            publications = context.publications
+            context.scannedCount += len(ids)
+            ids = set(id for id in ids if all(
+                query.matches(publications[id]) for query in checked))
+        return ids
+
+    def matches(self, publication):
+        return all(query.matches(publication) for query in self.queries)
+
+
+class AnyOf(Query):
+    """Publications satisfying at least one of the given predicates.
+
+    The union of the index results when every predicate has an index, and a
+    single scan otherwise.
+    """
+
+    __slots__ = ('queries',)
+
+    def __init__(self, *queries):
+        self.queries = _flatten(AnyOf, queries)
+
+    def __or__(self, other):
+        return AnyOf(*(self.queries + (other,)))
+
+    def estimate(self, context):
+        total = 0
+        for query in self.queries:
+            estimate = query.estimate(context)
+            if estimate is None:
+                return None
+            total += estimate
+        return total
+
+    def select(self, context):
+        if self.estimate(context) is None:
+            return Query.select(self, context)
+        ids = set()
+        for query in self.queries:
+            ids |= query.select(context)
+        return ids
+
+    def matches(self, publication):
+        return any(query.matches(publication) for query in self.queries)
+
+
+def _flatten(cls, queries):
+    flattened = []
+    for query in queries:
+        if type(query) is cls:
+            flattened.extend(query.queries)
+        else:
+            flattened.append(query)
+    return tuple(flattened)
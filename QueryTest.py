@@ -0,0 +1,111 @@
+"""Unit Test for Query
+
+..:: moduleauthors:: Wang Bo <wangbomicro@gmail.com>
+"""
+from Book import Book
+from ConferencePaper import ConferencePaper
+from Exceptions import IllegalValueException
+from JournalArticle import JournalArticle
+from Publication import Publication
+from Query import AllOf, AnyOf, AuthorIs, CitedBetween, TitleHas, TypeIs, \
+    VenueIs, YearBetween
+from ReferenceDataBase import ReferenceDataBase
+import random
+import unittest
+
+class QueryTest(unittest.TestCase):
+    """Unit Test for Query"""
+
+    def setUp(self):
+        self.dataBase = ReferenceDataBase()
+        self.article = JournalArticle("Gas leak rate study of MEMS",
+                                      ["Wang, Bo", "Wevers, Martine"],
+                                      "Sensors", 3, 1990)
+        self.book = Book("Packaging of MEMS", ["Wang, Bo"], 2012, "Springer")
+        self.paper = ConferencePaper("Thin film getters", ["Mao, Shengping"],
+                                     2014, "Transducers")
+        self.dataBase.addPublications([self.article, self.book, self.paper])
+        self.dataBase.addCitation(self.book.id, self.article.id)
+        self.dataBase.addCitation(self.paper.id, self.article.id)
+
+    def testPredicates(self):
+        find = self.dataBase.find
+        self.assertEqual(set([self.article, self.book]),
+                         find(AuthorIs("B. Wang")))
+        self.assertEqual(set([self.book]),
+                         find(AuthorIs("B. Wang") & TitleHas("packaging")))
+        self.assertEqual(set([self.article, self.book]),
+                         find(TitleHas("mem", prefix=True)))
+        self.assertEqual(set(), find(TitleHas("mem")))
+        self.assertEqual(set([self.book, self.paper]),
+                         find(YearBetween(2000)))
+        self.assertEqual(set([self.paper]),
+                         find(TypeIs(ConferencePaper)))
+        self.assertEqual(set([self.article, self.book, self.paper]),
+                         find(TypeIs(Publication)))
+        self.assertEqual(set([self.book]), find(VenueIs("Springer")))
+        self.assertEqual(set([self.article]), find(CitedBetween(2)))
+        self.assertEqual(set([self.book, self.paper]),
+                         find(AuthorIs("S. Mao") | TypeIs(Book)))
+        self.assertEqual(set([self.article, self.paper]),
+                         find((AuthorIs("S. Mao") | AuthorIs("M. Wevers")) &
+                              YearBetween(1990, 2014)))
+        self.assertRaises(IllegalValueException, TitleHas, "--")
+
+    def testPlan(self):
+        query = AuthorIs("B. Wang") & TitleHas("getters") & \
+            YearBetween(2000, 2010)
+        self.assertTrue(isinstance(query, AllOf))
+        self.assertEqual(3, len(query.queries))
+        self.assertEqual(["index YearBetween(2000, 2010)"],
+                         self.dataBase.explain(query))
+        query = AuthorIs("B. Wang") & YearBetween(2000, 2013) & \
+            TypeIs(Book)
+        self.assertEqual(["index YearBetween(2000, 2013)",
+                          "index AuthorIs('B. Wang')",
+                          "check TypeIs(<class 'Book.Book'>)"],
+                         self.dataBase.explain(query))
+        query = AuthorIs("B. Wang") & TitleHas("getters")
+        self.assertEqual(["index TitleHas('getters', False)",
+                          "index AuthorIs('B. Wang')"],
+                         self.dataBase.explain(query))
+        self.assertEqual(["scan AnyOf((AuthorIs('S. Mao'), TypeIs(<class "
+                          "'Book.Book'>)))"],
+                         self.dataBase.explain(AuthorIs("S. Mao") |
+                                               TypeIs(Book)))
+
+    def testLargeResultCheckedInsteadOfIntersected(self):
+        publications = [Publication("Getter {}".format(number),
+                                    ["Mao, Shengping"], 2015)
+                        for number in range(20)]
+        self.dataBase.addPublications(publications)
+        query = AuthorIs("M. Wevers") & AuthorIs("S. Mao")
+        self.assertEqual(["index AuthorIs('M. Wevers')",
+                          "check AuthorIs('S. Mao')"],
+                         self.dataBase.explain(query))
+        self.assertEqual(set(), self.dataBase.find(query))
+
+    def testSameAsScan(self):
+        generator = random.Random(7)
+        names = ["Wang, Bo", "Mao, Shengping", "Wevers, Martine",
+                 "Witvrouw, Ann"]
+        words = ["mems", "getter", "packaging", "bonding", "film"]
+        for number in range(200):
+            self.dataBase.addAsPublication(Book(
+                "{} {} {}".format(generator.choice(words),
+                                  generator.choice(words), number),
+                generator.sample(names, 2), generator.randint(1990, 2020),
+                generator.choice(["Springer", "Wiley"])))
+        queries = [AuthorIs("B. Wang") & TitleHas("film") & YearBetween(2000),
+                   (AuthorIs("A. Witvrouw") | TitleHas("bond", True)) &
+                   VenueIs("Wiley"),
+                   AnyOf(AuthorIs("S. Mao"), TitleHas("mems getter")),
+                   AllOf(TypeIs(Book), YearBetween(1995, 2005))]
+        publications = self.dataBase.getAllPublications()
+        for query in queries:
+            self.assertEqual(set(publication for publication in publications
+                                 if query.matches(publication)),
+                             self.dataBase.find(query))
+
+if __name__ == "__main__":
+    unittest.main()
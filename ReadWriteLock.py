@@ -0,0 +1,117 @@
+"""A reentrant reader-writer lock.
+
+..:: moduleauthor: Wang Bo <wangbomicro@gmail.com>
+..:: invar: Either no thread writes, or exactly one thread writes and no
+    other thread reads.
+"""
+from Exceptions import IllegalStateException
+import threading
+
+class ReadWriteLock(object):
+    """Lock letting any number of threads read at the same time, or a single
+    thread write.
+
+    A waiting writer keeps new readers out, so a steady stream of readers can
+    not starve it. Both sides are reentrant, and the writing thread may also
+    read, but a reading thread can not start writing: two readers upgrading
+    at the same time would deadlock.
+    """
+
+    def __init__(self):
+        """Initialize this new ReadWriteLock, held by no thread.
+        """
+        self._condition = threading.Condition(threading.Lock())
+        self._readerCount = 0
+        self._waitingWriterCount = 0
+        self._writer = None
+        self._writeDepth = 0
+        self._local = threading.local()
+        self._readSide = _LockSide(self.acquireRead, self.releaseRead)
+        self._writeSide = _LockSide(self.acquireWrite, self.releaseWrite)
+
+    def acquireRead(self):
+        """Block until the current thread may read.
+        """
+        local = self._local
+        if self._writer == threading.get_ident():
+            local.readsInWrite = getattr(local, 'readsInWrite', 0) + 1
+            return
+        depth = getattr(local, 'readDepth', 0)
+        if depth == 0:
+            with self._condition:
+                while self._writer is not None or self._waitingWriterCount:
+                    self._condition.wait()
+                self._readerCount += 1
+        local.readDepth = depth + 1
+
+    def releaseRead(self):
+        """Release one read acquired by the current thread.
+        """
+        local = self._local
+        if getattr(local, 'readsInWrite', 0):
+            local.readsInWrite -= 1
+            return
+        local.readDepth -= 1
+        if local.readDepth == 0:
+            with self._condition:
+                self._readerCount -= 1
+                if self._readerCount == 0:
+                    self._condition.notify_all()
+
+    def acquireWrite(self):
+        """Block until the current thread may write.
+
+        Throws:
+            IllegalStateException: The current thread is reading.
+        """
+        me = threading.get_ident()
+        if self._writer == me:
+            self._writeDepth += 1
+            return
+        if getattr(self._local, 'readDepth', 0):
+            raise IllegalStateException("A reading thread can not start \
+            writing.")
+        with self._condition:
+            self._waitingWriterCount += 1
+            while self._writer is not None or self._readerCount:
+                self._condition.wait()
+            self._waitingWriterCount -= 1
+            self._writer = me
+            self._writeDepth = 1
+
+    def releaseWrite(self):
+        """Release one write acquired by the current thread.
+        """
+        self._writeDepth -= 1
+        if self._writeDepth == 0:
+            with self._condition:
+                self._writer = None
+                self._condition.notify_all()
+
+    def readLocked(self):
+        """Return a context manager holding a read for the enclosed
+        statements.
+        """
+        return self._readSide
+
+    def writeLocked(self):
+        """Return a context manager holding a write for the enclosed
+        statements.
+        """
+        return self._writeSide
+
+
+class _LockSide(object):
+    """One side of a ReadWriteLock as a reusable context manager."""
+
+    __slots__ = ('_acquire', '_release')
+
+    def __init__(self, acquire, release):
+        self._acquire = acquire
+        self._release = release
+
+    def __enter__(self):
+        self._acquire()
+
+    def __exit__(self, *exception):
+        self._release()
@@ -0,0 +1,67 @@
+"""Unit Test for ReadWriteLock
+
+..:: moduleauthors:: Wang Bo <wangbomicro@gmail.com>
+"""
+from Exceptions import IllegalStateException
+from ReadWriteLock import ReadWriteLock
+import threading
+import time
+import unittest
+
+class ReadWriteLockTest(unittest.TestCase):
+    """Unit Test for ReadWriteLock"""
+
+    def setUp(self):
+        self.lock = ReadWriteLock()
+
+    def testReentrant(self):
+        with self.lock.writeLocked():
+            with self.lock.writeLocked():
+                with self.lock.readLocked():
+                    pass
+        with self.lock.readLocked():
+            with self.lock.readLocked():
+                self.assertRaises(IllegalStateException,
+                                  self.lock.acquireWrite)
+
+    def testConcurrentReaders(self):
+        inside = threading.Barrier(3, timeout=5)
+
+        def read():
+            with self.lock.readLocked():
+                inside.wait()
+
+        threads = [threading.Thread(target=read) for number in range(2)]
+        for thread in threads:
+            thread.start()
+        with self.lock.readLocked():
+            inside.wait()
+        for thread in threads:
+            thread.join()
+
+    def testWriterExcludesReaders(self):
+        events = []
+        self.lock.acquireRead()
+        writer = threading.Thread(target=self._write, args=(events,))
+        writer.start()
+        while not self.lock._waitingWriterCount:
+            time.sleep(0.001)
+        reader = threading.Thread(target=self._read, args=(events,))
+        reader.start()
+        time.sleep(0.05)
+        events.append('read released')
+        self.lock.releaseRead()
+        writer.join()
+        reader.join()
+        self.assertEqual(['read released', 'write', 'read'], events)
+
+    def _write(self, events):
+        with self.lock.writeLocked():
+            events.append('write')
+
+    def _read(self, events):
+        with self.lock.readLocked():
+            events.append('read')
+
+if __name__ == "__main__":
+    unittest.main()
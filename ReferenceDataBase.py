@@ -4,24 +4,92 @@
 ..:: invar: The ReferenceDataBase must have proper publications.
 """
 from Exceptions import IllegalValueException, IllegalAuthorsException, \
-    IllegalPublicationIdException
+    IllegalPublicationIdException, DuplicatePublicationException
+from AuthorIndex import AuthorIndex
+from AuthorScoreIndex import AuthorScoreIndex
+from CitationEngine import CitationEngine
+from CSRCitationGraph import CSRCitationGraph, CitationSet
+from DuplicateIndex import DuplicateIndex
+from IDAllocator import IDAllocator
+from Instrumentation import Instrumentation
+from NearDuplicateIndex import NearDuplicateIndex
+from Publication import Publication
+from Query import QueryContext
+from ReadWriteLock import ReadWriteLock
+from ResultStream import ResultStream
+from TitleIndex import TitleIndex
+from YearIndex import YearIndex
+import heapq
+import itertools
+import operator
 import re
+import threading
 
 class ReferenceDataBase(object):
+    """A collection of publications and the citations between them.
     
-    incrementID = 1001
+    A DataBase can be shared between threads: any number of threads may 
+    query it while one thread changes it. Queries hold the read side of a 
+    reader-writer lock, and changes made through the DataBase or through its 
+    publications hold the write side.
     
-    def __init__(self):
+    Publications with the same type, title, authors and year are duplicates. 
+    By default they are all kept; a DataBase can instead reject a new 
+    duplicate or merge it into the publication it duplicates.
+    """
+    
+    KEEP_DUPLICATES = 'keep'
+    REJECT_DUPLICATES = 'reject'
+    MERGE_DUPLICATES = 'merge'
+    
+    # The methods timed while the instrumentation is enabled.
+    _instrumentedMethods = (
+        'getPublicationWithID', 'getPublicationsWithIDs', 
+        'hasProperPublication', 'addAsPublication', 'addPublications', 
+        'removePublication', 'removePublications', 'getAllPublications', 'findByAuthor', 
+        'iterByAuthor', 'findByTitleWord', 'iterByTitleWord', 
+        'findByTitleWords', 'findByYearRange', 'countByYear', 'findOlderThan', 
+        'findDuplicates', 'buildNearDuplicateIndex', 'findNearDuplicates', 
+        'clusterNearDuplicates', 'find', 'iterFind', 'explain', 'rankByTitle', 
+        'addCitation', 'addCitations', 'saveSnapshot', 'authorCitationIndex', 
+        'authorCitationIndices', 'findDirIndirCites', 'iterDirIndirCites', 
+        'countDirIndirCites')
+    
+    def __init__(self, compactGraph=False, duplicatePolicy=KEEP_DUPLICATES):
         """Initialize this new ReferenceDatabase with no publications attached 
-        to it. Only set its incrementID to 1001 so all the ID of new added 
+        to it. Its own ID allocator starts at 1001 so all the ID of new added 
         publications start counting from 1001.
+        
+        Args:
+            compactGraph (bool): True to store the citations between the 
+                publications of this DataBase in a CSRCitationGraph instead 
+                of in the cites and citedBy sets of the publications.
+            duplicatePolicy (str): What to do with a new publication that 
+                duplicates one of this DataBase, see setDuplicatePolicy.
      
         Post: 
             No publications are attached to this ReferenceDataBase.
         """
-        ReferenceDataBase.incrementID = 1001
+        self.setDuplicatePolicy(duplicatePolicy)
+        self._ids = IDAllocator(1001)
+        self._lock = ReadWriteLock()
         self._isTerminated = False
-        self._publications = dict()        
+        self._publications = dict()
+        self._authorIndex = AuthorIndex()
+        self._titleIndex = TitleIndex()
+        self._scoreIndex = AuthorScoreIndex()
+        self._yearIndex = YearIndex()
+        self._duplicateIndex = DuplicateIndex()
+        self._indexes = [self._authorIndex, self._titleIndex, self._scoreIndex, 
+                         self._yearIndex, self._duplicateIndex]
+        self._nearDuplicateIndex = None
+        self._instrumentation = Instrumentation()
+        self._citationEngine = CitationEngine(
+            instrumentation=self._instrumentation)
+        self._graph = CSRCitationGraph() if compactGraph else None
+        self._changedCitedPublications = None
+        self._detachedPublications = None
+        Publication.addWeightListener(self)
     
     def isTerminated(self):
         """Check whether this DataBase is already terminated.
@@ -33,9 +101,22 @@ class ReferenceDataBase(object):
          Post: This DataBase is terminated.
          Post: All publication belonging to this DataBase have been Removed.
         """
-        if not self.isTerminated():
-            self._publications.clear()
-        self._isTerminated = True
+        with self._lock.writeLocked():
+            if not self.isTerminated():
+                if self._graph is not None:
+                    edges = [(publication, publication.getCitesSnapshot(), 
+                              publication.getCitedBySnapshot()) 
+                             for publication in self._publications.values()]
+                    for publication, cites, citedBy in edges:
+                        publication.cites, publication.citedBy = cites, citedBy
+                    self._graph.clear()
+                for publication in self._publications.values():
+                    publication.database = None
+                self._publications.clear()
+                for index in self._indexes:
+                    index.clear()
+                self._citationEngine.clear()
+            self._isTerminated = True
     
     def hasPublication(self, publication):
         """Check whether this DataBase has the given publication as one of the 
@@ -44,7 +125,7 @@ class ReferenceDataBase(object):
         Args:
             publication (publication): The publication to check.
         """
-        return publication.getId() in self._publications
+        return self._publications.get(publication.id) is publication
     
     def hasPublicationID(self, id):
         """Check whether publication with the given ID in the database.
@@ -56,9 +137,7 @@ class ReferenceDataBase(object):
             (boolean): True if the publication with given in the dataBase, 
             otherwise return false.    
         """
-        if not self.hasPublicationID(id):
-            raise IllegalPublicationIdException(id)
-        return self._publications[id];
+        return id in self._publications
         
     def getPublicationWithID(self, id):
         """Get the publication in the database by the given ID.
@@ -73,11 +152,28 @@ class ReferenceDataBase(object):
             IllegalPublicationIdException: If the given ID do not exist in 
             the publication DataBase.
         """
-        if not self.hasPublicationID(id):
-            raise IllegalPublicationIdException("The given publicationID is not \
-            valid")
+        with self._lock.readLocked():
+            if not self.hasPublicationID(id):
+                raise IllegalPublicationIdException("The given publicationID \
+                is not valid")
+            return self._publications[id];
+    
+    def getPublicationsWithIDs(self, ids):
+        """Get the publications in the database with the given IDs.
         
-        return self._publications[id];
+        Args:
+            ids (iterable): The publication IDs.
+        Returns: 
+            (list) The publications, in the order of the given IDs.
+        throws: 
+            IllegalPublicationIdException: If one of the given IDs does not 
+            exist in the publication DataBase.
+        """
+        with self._lock.readLocked():
+            try:
+                return [self._publications[id] for id in ids]
+            except KeyError as error:
+                raise IllegalPublicationIdException(error.args[0])
     
     def hasProperPublication(self):
         """Check whether this DataBase has proper publications associated 
@@ -87,10 +183,13 @@ class ReferenceDataBase(object):
             (boolean): True if and only if this DataBase can have each of its 
             publications as a element of its publications set.
         """
-        for publication in self.getAllPublications():
-            if not self.canHaveAsPublication(publication):
-                return False
-        return True
+        with self._lock.readLocked():
+            if self._instrumentation.isEnabled():
+                self._instrumentation.addScanned(len(self._publications))
+            for publication in self.getAllPublications():
+                if not self.canHaveAsPublication(publication):
+                    return False
+            return True
     
     def canHaveAsPublication(self, publication):
         """Check whether this Database can have the given publication as one 
@@ -104,27 +203,155 @@ class ReferenceDataBase(object):
         """
         return publication != None and not publication.isTerminated()
     
+    def getDuplicatePolicy(self):
+        """Return what this DataBase does with a new duplicate publication: 
+        KEEP_DUPLICATES, REJECT_DUPLICATES or MERGE_DUPLICATES.
+        """
+        return self._duplicatePolicy
+    
+    def setDuplicatePolicy(self, duplicatePolicy):
+        """Set what this DataBase does with a new publication that has the 
+        type, title, authors and year of one of its publications, titles and 
+        authors compared regardless of case and punctuation.
+        
+        Args:
+            duplicatePolicy (str): KEEP_DUPLICATES to add it anyway, 
+                REJECT_DUPLICATES to raise a DuplicatePublicationException, or 
+                MERGE_DUPLICATES to leave it out and use the ID of the 
+                publication it duplicates instead.
+        throws:
+            IllegalValueException: The given policy is none of these.
+        """
+        if duplicatePolicy not in (self.KEEP_DUPLICATES, self.REJECT_DUPLICATES, 
+                                   self.MERGE_DUPLICATES):
+            raise IllegalValueException("Unknown duplicate policy.")
+        self._duplicatePolicy = duplicatePolicy
+    
     def addAsPublication(self, publication):
         """Add the given publication to the set of publications attached to 
         this Database.
          
         Args:
             publication (Publication): The publication to be added.
+        Returns:
+            (int) The ID of the given publication or, if it was merged, of the 
+            publication it duplicates.
         Post:
-            This Database has the given publication as one of its publications.
+            This Database has the given publication as one of its publications, 
+            unless it was merged into its duplicate.
         throws:
             IllegalArgumentException: The given publication is already attached 
             to the DataBase. The given publication can not be attached to the 
-            DataBase.
+            DataBase. The DataBase has a compact citation graph and the given 
+            publication already has citations.
+            DuplicatePublicationException: Duplicates are rejected and the 
+            given publication duplicates one of this DataBase.
+        """
+        with self._lock.writeLocked():
+            self._checkNewPublication(publication)
+            original = self._findOriginals([publication])[0]
+            if original is not None:
+                return original.id
+            publication.id = self._ids.allocate()
+            self._attach(publication)
+            for index in self._indexes:
+                index.add(publication)
+            return publication.id
+    
+    def addPublications(self, publications):
+        """Add all given publications to the set of publications attached to 
+        this Database, or none of them.
+        
+        The whole batch is validated before anything changes, and the 
+        publications get consecutive IDs from a block reserved up front.
+        
+        Args:
+            publications (iterable): The publications to be added.
+        Returns:
+            (list) The IDs given to the publications, in the given order; a 
+            merged publication has the ID of the publication it duplicates, 
+            in this DataBase or earlier in the batch.
+        Post:
+            This Database has each given publication as one of its 
+            publications, unless it was merged into its duplicate.
+        throws:
+            IllegalArgumentException: One of the given publications can not be 
+            added by addAsPublication, or it occurs more than once in the batch. 
+            No publication has been added.
+        """
+        with self._lock.writeLocked():
+            publications = list(publications)
+            batch = set()
+            for publication in publications:
+                self._checkNewPublication(publication)
+                if id(publication) in batch:
+                    raise IllegalValueException("The publication occurs more than \
+                    once in the batch.")
+                batch.add(id(publication))
+        
+            originals = self._findOriginals(publications)
+            added = [publication for publication, original in 
+                     zip(publications, originals) if original is None]
+            firstId = self._ids.allocate(len(added))
+            for offset, publication in enumerate(added):
+                publication.id = firstId + offset
+                self._attach(publication)
+            for index in self._indexes:
+                index.addAll(added)
+            return [(publication if original is None else original).id 
+                    for publication, original in zip(publications, originals)]
+    
+    def _findOriginals(self, publications):
+        """Return, for each of the given new publications, the publication it 
+        duplicates in this DataBase or earlier among the given ones, or None 
+        if it is no duplicate or duplicates are kept.
+        
+        throws:
+            DuplicatePublicationException: Duplicates are rejected and one of 
+            the given publications is a duplicate.
+        """
+        if self._duplicatePolicy == self.KEEP_DUPLICATES:
+            return [None] * len(publications)
+        originals = []
+        batch = dict()
+        for publication in publications:
+            key = DuplicateIndex.canonicalKey(publication)
+            id = self._duplicateIndex.findFirst(key)
+            if id is not None:
+                original = self._publications[id]
+            else:
+                original = batch.setdefault(key, publication)
+                if original is publication:
+                    original = None
+            if original is not None and \
+            self._duplicatePolicy == self.REJECT_DUPLICATES:
+                raise DuplicatePublicationException(original)
+            originals.append(original)
+        return originals
+    
+    def _checkNewPublication(self, publication):
+        """Raise an IllegalValueException if the given publication can not be 
+        added to this DataBase.
         """
         if not self.canHaveAsPublication(publication) or \
         self.hasPublication(publication):
             raise IllegalValueException("The database can not have the given\
             publication.")
-        
-        publication.id = ReferenceDataBase.incrementID 
-        ReferenceDataBase.incrementID += 1
-        self._publications[publication.getId()] = publication
+        if self._graph is not None and (publication.cites or publication.citedBy):
+            raise IllegalValueException("Publications must be added to a \
+            database with a compact citation graph before they cite or are cited.")
+    
+    def _attach(self, publication):
+        """Attach the given publication, which already has its ID, to this 
+        DataBase; the indexes are left to the caller.
+        """
+        self._publications[publication.id] = publication
+        publication.database = self
+        if self._graph is not None:
+            publication.cites = CitationSet(self, self._graph, publication.id, 
+                                            True)
+            publication.citedBy = CitationSet(self, self._graph, publication.id, 
+                                              False)
 
     
     def removePublication(self, publication):
@@ -140,15 +367,170 @@ class ReferenceDataBase(object):
             publications, the given publication terminated, the association 
             between this publication and all the other publication are removed.
         """
-        if self.hasPublication(publication): 
-            publication.terminate()
-            self._publications.remove(publication.getId())
+        with self._lock.writeLocked():
+            if self.hasPublication(publication): 
+                self.removePublications([publication.id])
+    
+    def removePublications(self, ids, compact=True):
+        """Remove the publications with the given IDs from this DataBase and 
+        terminate them, in a single pass over their citations.
+        
+        Each citation between a removed publication and one that stays is 
+        removed once, from the set of the one that stays, and the citations 
+        among the removed publications are dropped with them. The citation 
+        caches and each index are brought up to date once for the whole 
+        batch. With a compact citation graph the removed citations are left 
+        as tombstones, merged into the graph right away or by compact.
+        
+        Args:
+            ids (iterable): The IDs of the publications to be removed.
+            compact (bool): False to keep the tombstones of the compact 
+                citation graph until compact is called, e.g. in the 
+                background.
+        Returns:
+            (list) The removed publications.
+        Throws:
+            IllegalPublicationIdException: One of the IDs is not in the 
+            DataBase. No publication has been removed.
+        """
+        with self._lock.writeLocked():
+            publications = self.getPublicationsWithIDs(dict.fromkeys(ids))
+            changed = set(publications)
+            if self._graph is not None:
+                for publication in publications:
+                    changed.update(publication.getAllCites())
+                self._graph.removeNodes(
+                    [publication.id for publication in publications], 
+                    deferCompaction=not compact)
+            else:
+                self._detachCitations(publications, changed)
+            self._citationEngine.citationsChanged(changed)
+        
+            # Terminating the publications now only removes their citations 
+            # with other databases; the indexes are updated once at the end.
+            self._detachedPublications = []
+            try:
+                for publication in publications:
+                    publication.terminate()
+            finally:
+                detached, self._detachedPublications = \
+                    self._detachedPublications, None
+                for index in self._indexes:
+                    index.removeAll(detached)
+            return publications
+    
+    def _detachCitations(self, publications, changedCited):
+        """Remove the citations between the given publications and the other 
+        publications of this DataBase from the sets of both, adding the cited 
+        publications that stay to changedCited.
+        """
+        removed = set(publications)
+        for publication in publications:
+            for cited in publication.getAllCites():
+                if cited not in removed and cited.database is self:
+                    cited.citedBy.discard(publication)
+                    changedCited.add(cited)
+            for citing in publication.getAllCitedBy():
+                if citing not in removed and citing.database is self:
+                    citing.cites.discard(publication)
+        for publication in publications:
+            publication.cites = set(cited for cited in publication.cites 
+                                    if cited.database is not self)
+            publication.citedBy = set(citing for citing in publication.citedBy 
+                                      if citing.database is not self)
+    
+    def compact(self, background=False):
+        """Merge the tombstones and buffered citations of the compact 
+        citation graph of this DataBase into its arrays, under the write 
+        lock; nothing to do for citations stored in sets.
+        
+        Args:
+            background (bool): True to compact in a new thread.
+        Returns:
+            (threading.Thread) The started thread if background is True, 
+            otherwise None.
+        """
+        if background:
+            thread = threading.Thread(target=self.compact)
+            thread.start()
+            return thread
+        with self._lock.writeLocked():
+            if self._graph is not None and \
+                    self._graph.getPendingChangeCount():
+                self._graph.compact()
+    
+    def _detach(self, publication):
+        """Remove the given terminated publication from the indexes and the 
+        publications of this DataBase; while removePublications runs, it 
+        updates the indexes itself.
+        """
+        if self._detachedPublications is not None:
+            self._detachedPublications.append(publication)
+        else:
+            for index in self._indexes:
+                index.remove(publication)
+        publication.database = None
+        if self._graph is not None:
+            publication.cites, publication.citedBy = set(), set()
+        del self._publications[publication.id]
+    
+    def publicationChanging(self, publication, attribute):
+        """Allow an attribute of one of the publications of this DataBase to 
+        change; a DataBase can always be changed.
+        
+        Args:
+            publication (Publication): The publication to be changed.
+            attribute (str): The name of the attribute to be changed.
+        """
+    
+    def publicationChanged(self, publication, attribute, oldValue):
+        """Bring the indexes of this DataBase up to date after an attribute of 
+        one of its publications changed.
+        
+        Args:
+            publication (Publication): The changed publication.
+            attribute (str): The name of the changed attribute.
+            oldValue: The value of the attribute before the change.
+        """
+        with self._lock.writeLocked():
+            if attribute == 'terminated':
+                if publication.database is self:
+                    self._detach(publication)
+            elif self.hasPublication(publication):
+                for index in self._indexes:
+                    index.update(publication, attribute, oldValue)
+    
+    def weightChanged(self, cls):
+        """Bring the author scores of this DataBase up to date after the 
+        weight of the given publication type changed.
+        
+        Args:
+            cls (type): The publication type whose weight changed.
+        """
+        with self._lock.writeLocked():
+            self._scoreIndex.weightChanged(cls)
+    
+    def citationChanged(self, citing, cited):
+        """Bring the citation caches of this DataBase up to date after a 
+        citation between the given publications was added or removed.
+        
+        Args:
+            citing (Publication): The citing end of the changed citation.
+            cited (Publication): The cited end of the changed citation.
+        """
+        with self._lock.writeLocked():
+            if self._changedCitedPublications is not None:
+                self._changedCitedPublications.add(cited)
+            else:
+                self._citationEngine.citationChanged(citing, cited)
      
     
-    def getAllPublication(self):
-        """Return a set collecting all publications associated with this Database.
+    def getAllPublications(self):
+        """Return a list collecting all publications associated with this 
+        Database.
         """
-        return self._publications.values()
+        with self._lock.readLocked():
+            return list(self._publications.values())
     
     @staticmethod
     def isValidAuthor(author):
@@ -161,8 +543,7 @@ class ReferenceDataBase(object):
         Returns:
             (boolean): true if this is a valid author name.
         """
-        return re.match('^[a-zA-Z ]{1,20}, [a-zA-Z][a-zA-Z ]{1,20}$', author) \
-            is not None
+        return re.match(r'^[A-Z]\. [a-zA-Z ]{1,20}$', author) is not None
     
     def findByAuthor(self, authorName):
         """Find all publications authored by an author.
@@ -176,28 +557,344 @@ class ReferenceDataBase(object):
             IllegalArgumentException If the given authorName is not in format 
             "initialOfFirstName.lastName"
         """
+        with self._lock.readLocked():
+            if not self.isValidAuthor(authorName):
+                raise IllegalAuthorsException(authorName)
+        
+            ids = self._authorIndex.find(authorName)
+            if self._instrumentation.isEnabled():
+                self._instrumentation.countLookup('author', bool(ids))
+            return set(self._publications[id] for id in ids)
+    
+    def iterByAuthor(self, authorName, orderBy='id', limit=None, offset=0, 
+                     cursor=None):
+        """Iterate over the publications authored by an author, in a stable 
+        order and a page at a time.
+        
+        Args:
+            authorName (str): The author name to be searched, e.g. A. Einstein.
+            orderBy (str): 'id', 'year' or 'citations', see iterFind.
+            limit (int): The maximum number of publications; None for all.
+            offset (int): The number of publications skipped first.
+            cursor: The cursor of an earlier stream to continue after.
+        Returns:
+            (ResultStream) The publications authored by the author.
+        Throws: 
+            IllegalArgumentException If the given authorName is not in format 
+            "initialOfFirstName.lastName"
+        """
         if not self.isValidAuthor(authorName):
             raise IllegalAuthorsException(authorName)
-        
-        referenceSet = set();
-        for publication in self.getAllPublications():
-            if authorName in publication.authorsNames:
-                referenceSet.add(publication)
-        return referenceSet;
+        return self._stream(lambda: self._authorIndex.find(authorName), 
+                            orderBy, limit, offset, cursor)
         
     def findByTitleWord(self, word):
         """Returns all publications that have a given word in their title;
         
+        The word is matched case-insensitively anywhere in the title, so "ems" 
+        finds "MEMS" and "BioMEMS".
+        
         Args:
             word (str): The word to be searched in title.
         Returns:
             (Set): Set of publications that have a given word in their title
         """
-        referenceSet = set()
-        for publication in self.getAllPublications():
-            if word.lower() in publication.getTitle().lower():
-                referenceSet.add(publication)
-        return referenceSet;
+        with self._lock.readLocked():
+            return set(self._publications[id] 
+                       for id in self._findTitleWordIds(word))
+    
+    def iterByTitleWord(self, word, orderBy='id', limit=None, offset=0, 
+                        cursor=None):
+        """Iterate over the publications that have a given word in their 
+        title, as matched by findByTitleWord, in a stable order and a page at 
+        a time.
+        
+        Args:
+            word (str): The word to be searched in title.
+            orderBy (str): 'id', 'year' or 'citations', see iterFind.
+            limit (int): The maximum number of publications; None for all.
+            offset (int): The number of publications skipped first.
+            cursor: The cursor of an earlier stream to continue after.
+        Returns:
+            (ResultStream) The publications that have the word in their title.
+        """
+        return self._stream(lambda: self._findTitleWordIds(word), orderBy, 
+                            limit, offset, cursor)
+    
+    def _findTitleWordIds(self, word):
+        tokens = TitleIndex.tokenize(word)
+        if not tokens:
+            if self._instrumentation.isEnabled():
+                self._instrumentation.addScanned(len(self._publications))
+            return set(id for id, publication in self._publications.items()
+                       if word.lower() in publication.title.lower())
+        
+        # The first token may start and the last one may end inside a word of 
+        # the title, the others are whole words. The index only narrows down 
+        # the candidates, the titles decide.
+        if len(tokens) == 1:
+            ids = self._titleIndex.findContaining(tokens[0])
+        else:
+            ids = self._titleIndex.findPrefix(tokens[-1])
+            for token in tokens[1:-1]:
+                ids &= self._titleIndex.findToken(token)
+            if ids:
+                ids &= self._titleIndex.findContaining(tokens[0])
+        if self._instrumentation.isEnabled():
+            self._instrumentation.countLookup('title', bool(ids))
+            self._instrumentation.addScanned(len(ids))
+        if word.lower() == tokens[0]:
+            return ids
+        return set(id for id in ids 
+                   if word.lower() in self._publications[id].title.lower())
+    
+    def findByTitleWords(self, words, matchAll=True, prefix=False):
+        """Returns all publications whose title matches the given words.
+        
+        Args:
+            words (str): The words to be searched in title.
+            matchAll (bool): True if the title must contain all words, False 
+                if any of the words suffices.
+            prefix (bool): True to match the words as prefixes of the words 
+                of the title.
+        Returns:
+            (Set): Set of publications whose title matches the given words.
+        """
+        with self._lock.readLocked():
+            return set(self._publications[id] for id in 
+                       self._titleIndex.search(words, matchAll, prefix))
+    
+    def findByYearRange(self, first=None, last=None):
+        """Returns all publications published from the first to the last 
+        given year, both included.
+        
+        Args:
+            first (int): The first year; None for no lower bound.
+            last (int): The last year; None for no upper bound.
+        Returns:
+            (Set): Set of publications published in the range.
+        """
+        with self._lock.readLocked():
+            return set(self._publications[id] 
+                       for id in self._yearIndex.findRange(first, last))
+    
+    def countByYear(self):
+        """Returns the number of publications of each year.
+        
+        Returns:
+            (list): (year, count) pairs in increasing order of year.
+        """
+        with self._lock.readLocked():
+            return self._yearIndex.getCountsPerYear()
+    
+    def findOlderThan(self, age, currentYear=None):
+        """Returns all publications more than the given number of years old, 
+        i.e. the publications for which is10YearsOld holds when age is 10.
+        
+        Args:
+            age (int): The number of years.
+            currentYear (int): The current year; None for today's year.
+        Returns:
+            (Set): Set of publications older than the given age.
+        """
+        with self._lock.readLocked():
+            return set(self._publications[id] 
+                       for id in self._yearIndex.findOlderThan(age, currentYear))
+    
+    def findDuplicates(self):
+        """Returns the groups of publications of this DataBase with the same 
+        type, title, authors and year, titles and authors compared regardless 
+        of case and punctuation.
+        
+        Returns:
+            (list): One list of publications per group, each in increasing 
+            order of ID; the groups are ordered by their first ID.
+        """
+        with self._lock.readLocked():
+            return [[self._publications[id] for id in ids] 
+                    for ids in self._duplicateIndex.getDuplicateGroups()]
+    
+    def buildNearDuplicateIndex(self, processes=1):
+        """Build the index of the near duplicates of the publications of this 
+        DataBase, unless it is already built; from then on it is kept up to 
+        date like the other indexes. findNearDuplicates and 
+        clusterNearDuplicates build it when first called.
+        
+        Args:
+            processes (int): The number of processes computing the MinHash 
+                signatures of the publications; 1 computes them in this 
+                process.
+        """
+        with self._lock.writeLocked():
+            if self._nearDuplicateIndex is None:
+                index = NearDuplicateIndex()
+                index.addAll(self._publications.values(), processes)
+                self._nearDuplicateIndex = index
+                self._indexes.append(index)
+    
+    def findNearDuplicates(self, publication, threshold=0.8):
+        """Returns the publications of this DataBase whose title and authors 
+        are similar to those of the given publication, e.g. differ by a typo, 
+        punctuation or the order of the authors.
+        
+        The similarity is the Jaccard similarity of the title trigrams and 
+        author names, estimated from their MinHash signatures.
+        
+        Args:
+            publication (Publication): The publication to be compared, in 
+                this DataBase or not.
+            threshold (float): The smallest similarity, from 0 to 1.
+        Returns:
+            (list): (publication, similarity) pairs, most similar first; 
+            without the given publication itself.
+        """
+        self.buildNearDuplicateIndex()
+        with self._lock.readLocked():
+            return [(self._publications[id], similarity) for id, similarity 
+                    in self._nearDuplicateIndex.find(publication, threshold) 
+                    if self._publications[id] is not publication]
+    
+    def clusterNearDuplicates(self, threshold=0.8, processes=1):
+        """Returns the clusters of publications of this DataBase with similar 
+        titles and authors, in time linear in the number of publications.
+        
+        Args:
+            threshold (float): The smallest similarity, from 0 to 1, of the 
+                pairs joining a cluster.
+            processes (int): The number of processes computing the MinHash 
+                signatures if the index of the near duplicates is not built 
+                yet.
+        Returns:
+            (list): One list of publications per cluster, each in increasing 
+            order of ID; the clusters are ordered by their first ID.
+        """
+        self.buildNearDuplicateIndex(processes)
+        with self._lock.readLocked():
+            return [[self._publications[id] for id in ids] for ids in 
+                    self._nearDuplicateIndex.cluster(threshold)]
+    
+    def find(self, query):
+        """Returns all publications satisfying the given query.
+        
+        Args:
+            query (Query): The predicates to be satisfied, e.g. 
+                AuthorIs("B. Wang") & YearBetween(2000, 2010).
+        Returns:
+            (Set): Set of publications satisfying the query.
+        """
+        with self._lock.readLocked():
+            context = self._queryContext()
+            ids = query.select(context)
+            if self._instrumentation.isEnabled():
+                self._instrumentation.addScanned(context.scannedCount)
+            return set(self._publications[id] for id in ids)
+    
+    def iterFind(self, query, orderBy='id', limit=None, offset=0, cursor=None):
+        """Iterate over the publications satisfying the given query, in a 
+        stable order and a page at a time.
+        
+        The matching IDs and their sort keys are taken once, when the first 
+        publication is asked for, and put in a heap in linear time; every 
+        page then pops its publications from the heap under the read lock. 
+        The order thus stays the same while the stream is consumed, and 
+        publications removed in the meantime are skipped.
+        
+        Args:
+            query (Query): The predicates to be satisfied.
+            orderBy (str): 'id' for increasing ID, 'year' for increasing year, 
+                or 'citations' for the most directly cited first; ties are 
+                broken by increasing ID.
+            limit (int): The maximum number of publications; None for all.
+            offset (int): The number of publications skipped first.
+            cursor: The cursor of an earlier stream, as returned by its 
+                getCursor, to continue after; it is the sort key of the last 
+                publication returned: its ID, (year, ID) or 
+                (-citations, ID).
+        Returns:
+            (ResultStream) The publications satisfying the query.
+        throws:
+            IllegalValueException: The order is unknown, or the limit or 
+            offset is negative.
+        """
+        return self._stream(lambda: query.select(self._queryContext()), 
+                            orderBy, limit, offset, cursor)
+    
+    # The sort keys of the orders of iterFind and the other iter* methods.
+    _orderKeys = {
+        'year': lambda publication: (publication.year, publication.id), 
+        'citations': lambda publication: (-len(publication.getAllCitedBy()), 
+                                          publication.id)}
+    
+    def _stream(self, findIds, orderBy, limit, offset, cursor):
+        """Return a ResultStream over the publications with the IDs returned 
+        by findIds, called under the read lock, in the given order.
+        """
+        if orderBy != 'id' and orderBy not in self._orderKeys:
+            raise IllegalValueException("Unknown order of a query.")
+        sortKey = self._orderKeys.get(orderBy)
+        heap = []
+        isStarted = []
+        
+        def fetch(after, count):
+            with self._lock.readLocked():
+                publications = self._publications
+                if not isStarted:
+                    isStarted.append(True)
+                    ids = findIds()
+                    if sortKey is None:
+                        heap.extend(ids if after is None 
+                                    else filter(after.__lt__, ids))
+                    else:
+                        heap.extend(entry for entry in 
+                                    ((sortKey(publications[id]), id) 
+                                     for id in ids)
+                                    if after is None or entry[0] > after)
+                    heapq.heapify(heap)
+                rows = []
+                while heap and len(rows) < count:
+                    entry = heapq.heappop(heap)
+                    key, id = (entry, entry) if sortKey is None else entry
+                    publication = publications.get(id)
+                    if publication is not None and \
+                    (after is None or key > after):
+                        rows.append((key, publication))
+                return rows
+        
+        return ResultStream(fetch, limit, offset, cursor, self.hasPublication)
+    
+    def explain(self, query):
+        """Returns the steps find takes to evaluate the given query.
+        
+        Args:
+            query (Query): The predicates to be satisfied.
+        Returns:
+            (list): A description of each index lookup, check and scan.
+        """
+        with self._lock.readLocked():
+            context = self._queryContext()
+            query.select(context)
+            if self._instrumentation.isEnabled():
+                self._instrumentation.addScanned(context.scannedCount)
+            return context.steps
+    
+    def _queryContext(self):
+        return QueryContext(self._publications, {'author': self._authorIndex, 
+                                                 'title': self._titleIndex, 
+                                                 'year': self._yearIndex})
+    
+    def rankByTitle(self, words, k=10):
+        """Returns the publications whose title best matches the given words, 
+        ranked by their BM25 score.
+        
+        Args:
+            words (str): The words to be searched in title.
+            k (int): The maximum number of publications to be returned.
+        Returns:
+            (list): At most k (publication, score) pairs, best match first.
+        """
+        with self._lock.readLocked():
+            return [(self._publications[id], score) 
+                    for id, score in self._titleIndex.rank(words, k)]
     
     def addCitation(self, publicationId1, publicationId2):
         """Add a citation relationship of two publications. Given as a pair of 
@@ -211,61 +908,339 @@ class ReferenceDataBase(object):
             IllegalArgumentException: The publication with publicationID is 
             not in the DataBase The publication1 can not cites publication2.
         """
-        publication1 = self.getPublicationWithID(publicationId1)
-        publication2 = self.getPublicationWithID(publicationId2)
-        publication1.addAsCites(publication2)
+        with self._lock.writeLocked():
+            publication1 = self.getPublicationWithID(publicationId1)
+            publication2 = self.getPublicationWithID(publicationId2)
+            publication1.addAsCite(publication2)
     
-    @classmethod
-    def getCurrentIncrementID(cls):
-        """Get the current incrementID.
+    def addCitations(self, pairs, skipInvalid=False, rollback=True):
+        """Add the given citation relationships in one transaction. Each is 
+        given as a pair of publication identifiers where the second represents 
+        a publication cited by the first.
+        
+        The whole batch is validated before anything changes, resolving each 
+        ID with a single dictionary lookup and comparing the full attributes 
+        of the two publications only when their years are equal, and the 
+        citation caches are brought up to date once for the whole batch. A 
+        terminated publication is removed from its DataBase, so it is 
+        rejected as unknown.
+        
+        Args:
+            pairs (iterable): The (citing ID, cited ID) pairs to be added.
+            skipInvalid (bool): True to add the valid pairs and report the 
+                others, False to add none of them if one is invalid.
+            rollback (bool): True to remove the citations already added if 
+                adding the batch fails part way, so either all valid pairs 
+                are added or none; False to keep them and spare the record 
+                of the added citations.
+        Returns:
+            (dict) The rejected pairs per reason: 'unknown' if one of the IDs 
+            is not in the DataBase, 'same' if both are the same publication, 
+            'newer' if the cited publication is newer than the citing one. 
+            Empty if all pairs were valid.
+        Throws: 
+            IllegalPublicationIdException: One of the IDs is not in the 
+            DataBase and skipInvalid is False. No citation has been added.
+            IllegalArgumentException: One of the citing publications can not 
+            cite its cited publication and skipInvalid is False. No citation 
+            has been added.
+        """
+        with self._lock.writeLocked():
+            citations, rejected = self._checkCitations(pairs, skipInvalid)
+        
+            added = [] if rollback else None
+            self._changedCitedPublications = set()
+            try:
+                for publication1, publication2 in citations:
+                    if rollback:
+                        if publication1.alreadyCites(publication2):
+                            continue
+                        added.append((publication1, publication2))
+                    publication1.linkAsCite(publication2)
+            except BaseException:
+                if rollback:
+                    for publication1, publication2 in reversed(added):
+                        publication1.unlinkAsCite(publication2)
+                raise
+            finally:
+                changed, self._changedCitedPublications = \
+                    self._changedCitedPublications, None
+                self._citationEngine.citationsChanged(changed)
+            return rejected
+    
+    def _checkCitations(self, pairs, skipInvalid):
+        """Return the (citing, cited) publications of the valid pairs and the 
+        invalid pairs per reason, see addCitations.
+        """
+        publications = self._publications
+        citations = []
+        rejected = dict()
+        for pair in pairs:
+            publicationId1, publicationId2 = pair
+            publication1 = publications.get(publicationId1)
+            publication2 = publications.get(publicationId2)
+            if publication1 is None or publication2 is None:
+                if not skipInvalid:
+                    raise IllegalPublicationIdException(
+                        publicationId1 if publication1 is None 
+                        else publicationId2)
+                reason = 'unknown'
+            else:
+                reason = self.citationRejection(publication1, publication2)
+                if reason is None:
+                    citations.append((publication1, publication2))
+                    continue
+                if not skipInvalid:
+                    raise IllegalValueException("Publication {} can not \
+                    cite publication {}.".format(publicationId1, 
+                                                 publicationId2))
+            rejected.setdefault(reason, []).append(pair)
+        return citations, rejected
+    
+    @staticmethod
+    def citationRejection(publication1, publication2):
+        """Return why the first of the given publications of a DataBase can 
+        not cite the second, like canCites but comparing the full attributes 
+        only when the years are equal.
+        
+        Args:
+            publication1 (Publication): The citing publication.
+            publication2 (Publication): The cited publication.
+        Returns:
+            (str) 'newer' if the cited publication is newer than the citing 
+            one, 'same' if both are the same, or None if the citation is 
+            valid.
+        """
+        if publication1.year < publication2.year:
+            return 'newer'
+        if publication1 is publication2 or (
+                publication1.year == publication2.year and 
+                publication1.isTheSameAs(publication2)):
+            return 'same'
+        return None
+    
+    def saveSnapshot(self, path):
+        """Write the publications of this DataBase and the citations between 
+        them to a binary snapshot file, to be opened with openSnapshot.
+        
+        Args:
+            path (str): The path of the snapshot file.
+        Throws:
+            IllegalValueException: An issue number does not fit in the 
+            32-bit field of the snapshot; no file is written.
+        """
+        with self._lock.readLocked():
+            from SnapshotReferenceDataBase import SnapshotReferenceDataBase
+            SnapshotReferenceDataBase.write(self.getAllPublications(), path, 
+                                            self._ids.getNextId())
+    
+    @staticmethod
+    def openSnapshot(path):
+        """Open a snapshot file written by saveSnapshot, by mapping it into 
+        memory; publications are only read from it when they are accessed.
+        
+        Args:
+            path (str): The path of the snapshot file.
+        Returns:
+            (SnapshotReferenceDataBase) A read-only database on the snapshot.
+        """
+        from SnapshotReferenceDataBase import SnapshotReferenceDataBase
+        return SnapshotReferenceDataBase(path)
+    
+    def getCurrentIncrementID(self):
+        """Get the current incrementID of this DataBase.
         
         Returns: 
-            (int) The current increment ID.
+            (int) The ID the next added publication gets.
         """
-        return ReferenceDataBase.incrementID
+        return self._ids.getNextId()
     
-    @classmethod
-    def setCurrentIncrementID(cls, ID):
-        """Set the IncrementID to the given value.
+    def setCurrentIncrementID(self, ID):
+        """Set the IncrementID of this DataBase to the given value.
         Args:
             ID (int): The id number to be set.
         Throws: 
-            IllegalIncrementIDException: if the given ID is out of bound.
-        """    
-        ReferenceDataBase.incrementID = ID
+            IllegalPublicationIdException: if the given ID is not above the 
+            IDs of the publications of this DataBase.
+        """
+        with self._lock.writeLocked():
+            if self._publications and ID <= max(self._publications):
+                raise IllegalPublicationIdException(ID)
+            self._ids.setNextId(ID)
+    
+    def readLocked(self):
+        """Return a context manager holding the read side of the lock of this 
+        DataBase, for a consistent view over several queries.
+        """
+        return self._lock.readLocked()
+    
+    def writeLocked(self):
+        """Return a context manager holding the write side of the lock of 
+        this DataBase, for changes that must appear at once.
+        """
+        return self._lock.writeLocked()
+    
+    def enableInstrumentation(self):
+        """Start collecting the statistics of the calls of the public 
+        methods of this DataBase: per method the calls, errors, latencies, 
+        rows scanned and returned and citation graph nodes visited, and the 
+        hits and misses of the index lookups. While disabled, which is the 
+        default, the methods run without timing.
+        """
+        self._instrumentation.enable(self, self._instrumentedMethods)
+    
+    def disableInstrumentation(self):
+        """Stop collecting the statistics of the calls of this DataBase; 
+        those collected so far are kept.
+        """
+        self._instrumentation.disable()
+    
+    def getInstrumentation(self):
+        """Return the Instrumentation collecting the statistics of this 
+        DataBase, to take a snapshot of them, reset them or export them in 
+        the Prometheus text format.
+        """
+        return self._instrumentation
     
     def authorCitationIndex(self, authorName):
         """Calculate the citation index of given author. 
         
         The citation index is defined as the weighted sum of the citations of 
         all the author's publications. The weight depend on the type of 
-        publication the author is cited in.
+        publication the author is cited in. It is read from a table that is 
+        kept up to date as publications, their authors and the type weights 
+        change.
         
         Args:
             authorName (str): The author name.
         Returns:
             (double) The author citation index. 
         """
-        citationIndex = 0;
-        publications = self.findByAuthor(authorName)
-        for publication in publications:
-            citationIndex += publication.getWeight()
-        return citationIndex
+        with self._lock.readLocked():
+            if not self.isValidAuthor(authorName):
+                raise IllegalAuthorsException(authorName)
+            return self._scoreIndex.getScore(authorName)
+    
+    def authorCitationIndices(self, authorNames=None):
+        """Calculate the citation index of each given author.
+        
+        Args:
+            authorNames (iterable): The author names; None for all authors of 
+                this DataBase.
+        Returns:
+            (dict) The citation index of each author.
+        Throws: 
+            IllegalAuthorsException: One of the given author names is not in 
+            format "initialOfFirstName. lastName".
+        """
+        with self._lock.readLocked():
+            if authorNames is None:
+                return self._scoreIndex.getScores()
+            authorNames = list(authorNames)
+            for authorName in authorNames:
+                if not self.isValidAuthor(authorName):
+                    raise IllegalAuthorsException(authorName)
+            return dict((authorName, self._scoreIndex.getScore(authorName)) 
+                        for authorName in authorNames)
     
-    def findDirIndirCites(self, Id):
+    def findDirIndirCites(self, Id, maxDepth=None, cancelEvent=None):
         """For the given publication, returns all publications that directly or 
         indirectly cite this publication.
         
         Args:
             id: The publication id to be searched.
+            maxDepth (int): The maximum length of the citation chains to be 
+                followed, 1 for direct citations only. None for no limit.
+            cancelEvent (threading.Event): An event that stops the search once 
+                set, e.g. by another thread.
         Returns:
             (set) The set of publication that direct/indirectly cites this 
             publication.
+        Throws:
+            QueryCancelledException: The cancel event was set before the 
+            search finished.
+        """
+        with self._lock.readLocked():
+            return set(self._citationEngine.findCiting(
+                self.getPublicationWithID(Id), maxDepth, cancelEvent))
+    
+    def iterDirIndirCites(self, Id, maxDepth=None, orderBy=None, limit=None, 
+                          offset=0, cursor=None):
+        """Iterate over the publications that directly or indirectly cite the 
+        given publication, a page at a time.
+        
+        In breadth-first order, the default, the search only goes as far as 
+        the publications consumed; the cursor is then the number of 
+        publications returned so far. The other orders need all citing 
+        publications first, see iterFind.
+        
+        Args:
+            Id (int): The publication id to be searched.
+            maxDepth (int): The maximum length of the citation chains to be 
+                followed, 1 for direct citations only. None for no limit.
+            orderBy (str): None for breadth-first order, or 'id', 'year' or 
+                'citations'.
+            limit (int): The maximum number of publications; None for all.
+            offset (int): The number of publications skipped first.
+            cursor: The cursor of an earlier stream to continue after.
+        Returns:
+            (ResultStream) The publications that directly or indirectly cite 
+            the given publication.
+        throws:
+            IllegalPublicationIdException: The given ID does not exist in the 
+            DataBase.
+        """
+        publication = self.getPublicationWithID(Id)
+        if orderBy is not None:
+            return self._stream(lambda: set(citing.id for citing in 
+                                            self._citationEngine.findCiting(
+                                                publication, maxDepth)), 
+                                orderBy, limit, offset, cursor)
+        traversal = [None, 0]
+        
+        def fetch(after, count):
+            with self._lock.readLocked():
+                after = after or 0
+                if traversal[0] is None or traversal[1] != after:
+                    # A new traversal, skipping the rows already returned.
+                    traversal[0] = self._citationEngine.iterCiting(publication, 
+                                                                   maxDepth)
+                    traversal[1] = 0
+                    for citing in itertools.islice(self._alive(traversal[0]), 
+                                                   after):
+                        traversal[1] += 1
+                rows = []
+                for citing in itertools.islice(self._alive(traversal[0]), 
+                                               count):
+                    traversal[1] += 1
+                    rows.append((traversal[1], citing))
+                return rows
+        
+        return ResultStream(fetch, limit, offset, cursor, self.hasPublication)
+    
+    def _alive(self, publications):
+        """Yield the given publications that are still in this DataBase."""
+        return (publication for publication in publications 
+                if self.hasPublication(publication))
+    
+    def countDirIndirCites(self, Id, maxDepth=None, cancelEvent=None):
+        """For the given publication, returns the number of publications that 
+        directly or indirectly cite this publication.
+        
+        Args:
+            id: The publication id to be searched.
+            maxDepth (int): The maximum length of the citation chains to be 
+                followed, 1 for direct citations only. None for no limit.
+            cancelEvent (threading.Event): An event that stops the search once 
+                set, e.g. by another thread.
+        Returns:
+            (int) The number of publications that direct/indirectly cites this 
+            publication.
+        Throws:
+            QueryCancelledException: The cancel event was set before the 
+            search finished.
         """
-        publicationsSet = self.getPublicationWithID(Id).getAllCitedBy()
-        results = set(publicationsSet)
-        if (len(publicationsSet) != 0):
-            for pub in publicationsSet:
-                results.addAll(self.findDirIndirCites(pub.getId()))
-        return results
+        with self._lock.readLocked():
+            return self._citationEngine.countCiting(
+                self.getPublicationWithID(Id), maxDepth, cancelEvent)
         
\ No newline at end of file
@@ -0,0 +1,606 @@
+"""Unit Test for ReferenceDataBase
+
+..:: moduleauthors:: Wang Bo <wangbomicro@gmail.com>
+"""
+from Exceptions import IllegalAuthorsException, IllegalValueException, \
+    IllegalPublicationIdException, DuplicatePublicationException
+from Book import Book
+from Publication import Publication
+from Query import YearBetween
+from ReferenceDataBase import ReferenceDataBase
+import sys
+import threading
+import unittest
+
+class FailingPublication(Publication):
+    """A publication failing to cite its failing publication half way."""
+
+    def linkAsCite(self, other):
+        if other is self.failing:
+            self._getMutableCites().add(other)
+            raise MemoryError()
+        Publication.linkAsCite(self, other)
+
+
+class ReferenceDataBaseTest(unittest.TestCase):
+    """Unit Test for ReferenceDataBase"""
+
+    _authors = ["Wang, Bo", "De Coster, Jeroen", "Wevers, Martine"]
+
+    def createDataBase(self):
+        return ReferenceDataBase()
+
+    def setUp(self):
+        self.dataBase = self.createDataBase()
+        self.publication1 = Publication("Gas leak rate study of MEMS",
+                                        self._authors, 1990)
+        self.publication2 = Publication("Packaging of MEMS",
+                                        ["Wang, Bo", "Witvrouw, Ann"], 2012)
+        self.publication3 = Publication("Thin film getters",
+                                        ["Mao, Shengping"], 2014)
+        self.dataBase.addAsPublication(self.publication1)
+        self.dataBase.addAsPublication(self.publication2)
+        self.dataBase.addAsPublication(self.publication3)
+
+    def testFindByAuthor(self):
+        self.assertEqual(set([self.publication1, self.publication2]),
+                         self.dataBase.findByAuthor("B. Wang"))
+        self.assertEqual(set([self.publication3]),
+                         self.dataBase.findByAuthor("S. Mao"))
+        self.assertEqual(set(), self.dataBase.findByAuthor("A. Einstein"))
+        self.assertRaises(IllegalAuthorsException, self.dataBase.findByAuthor,
+                          "Wang, Bo")
+
+    def testFindByAuthorAfterAuthorsChanged(self):
+        self.publication2.authors = ["Einstein, Albert"]
+        self.assertEqual(set([self.publication1]),
+                         self.dataBase.findByAuthor("B. Wang"))
+        self.assertEqual(set([self.publication2]),
+                         self.dataBase.findByAuthor("A. Einstein"))
+
+    def testFindByAuthorAfterRemove(self):
+        self.dataBase.removePublication(self.publication1)
+        self.assertEqual(set([self.publication2]),
+                         self.dataBase.findByAuthor("B. Wang"))
+        self.assertEqual(set(), self.dataBase.findByAuthor("J. De Coster"))
+        self.publication1.authors = ["Einstein, Albert"]
+        self.assertEqual(set(), self.dataBase.findByAuthor("A. Einstein"))
+
+    def testFindByTitleWord(self):
+        self.assertEqual(set([self.publication1, self.publication2]),
+                         self.dataBase.findByTitleWord("mems"))
+        self.assertEqual(set([self.publication3]),
+                         self.dataBase.findByTitleWord("Getter"))
+        self.assertEqual(set([self.publication1]),
+                         self.dataBase.findByTitleWord("leak rate"))
+        self.assertEqual(set(), self.dataBase.findByTitleWord("rate leak"))
+
+    def testFindByTitleWordInsideWords(self):
+        self.assertEqual(set([self.publication1, self.publication2]),
+                         self.dataBase.findByTitleWord("EMS"))
+        self.assertEqual(set([self.publication2]),
+                         self.dataBase.findByTitleWord("aging of ME"))
+        self.assertEqual(set([self.publication1]),
+                         self.dataBase.findByTitleWord("ak rate st"))
+        self.assertEqual(set(), self.dataBase.findByTitleWord("mems,"))
+
+    def testFindByTitleWordAfterTitleChanged(self):
+        self.publication3.title = "thin film getters for mems"
+        self.publication3.captializeTitle()
+        self.assertEqual(3, len(self.dataBase.findByTitleWord("MEMS")))
+        self.publication1.title = "Outgassing"
+        self.assertEqual(set([self.publication2, self.publication3]),
+                         self.dataBase.findByTitleWord("mems"))
+
+    def testFindByTitleWords(self):
+        self.assertEqual(set([self.publication2]),
+                         self.dataBase.findByTitleWords("MEMS packaging"))
+        self.assertEqual(set([self.publication2, self.publication3]),
+                         self.dataBase.findByTitleWords("packaging thin",
+                                                        matchAll=False))
+        self.assertEqual(set([self.publication2]),
+                         self.dataBase.findByTitleWords("pack me", prefix=True))
+
+    def testRankByTitle(self):
+        ranking = self.dataBase.rankByTitle("packaging mems", k=2)
+        self.assertEqual([self.publication2, self.publication1],
+                         [publication for publication, score in ranking])
+
+    def testFindByYearRange(self):
+        self.assertEqual(set([self.publication2, self.publication3]),
+                         self.dataBase.findByYearRange(2000))
+        self.assertEqual(set([self.publication1, self.publication2]),
+                         self.dataBase.findByYearRange(1990, 2012))
+        self.assertEqual(set(), self.dataBase.findByYearRange(1991, 2011))
+        self.assertEqual([(1990, 1), (2012, 1), (2014, 1)],
+                         self.dataBase.countByYear())
+        self.assertEqual(set([self.publication1, self.publication2]),
+                         self.dataBase.findOlderThan(10, 2023))
+
+    def testFindByYearRangeAfterYearChanged(self):
+        self.publication3.year = 1995
+        self.assertEqual(set([self.publication1, self.publication3]),
+                         self.dataBase.findByYearRange(None, 2000))
+        self.assertEqual([(1990, 1), (1995, 1), (2012, 1)],
+                         self.dataBase.countByYear())
+        self.dataBase.removePublication(self.publication1)
+        self.assertEqual(set([self.publication3]),
+                         self.dataBase.findOlderThan(10, 2020))
+
+    def testFindDirIndirCites(self):
+        self.dataBase.addCitation(self.publication2.id, self.publication1.id)
+        self.dataBase.addCitation(self.publication3.id, self.publication2.id)
+        self.assertEqual(set([self.publication2, self.publication3]),
+                         self.dataBase.findDirIndirCites(self.publication1.id))
+        self.assertEqual(set([self.publication2]),
+                         self.dataBase.findDirIndirCites(self.publication1.id,
+                                                         maxDepth=1))
+        self.assertEqual(2, self.dataBase.countDirIndirCites(
+            self.publication1.id))
+        self.assertEqual(set(),
+                         self.dataBase.findDirIndirCites(self.publication3.id))
+
+    def testFindDirIndirCitesAfterGraphChanged(self):
+        self.dataBase.addCitation(self.publication2.id, self.publication1.id)
+        self.assertEqual(set([self.publication2]),
+                         self.dataBase.findDirIndirCites(self.publication1.id))
+        self.dataBase.addCitation(self.publication3.id, self.publication2.id)
+        self.assertEqual(set([self.publication2, self.publication3]),
+                         self.dataBase.findDirIndirCites(self.publication1.id))
+        self.publication3.removeAsCite(self.publication2)
+        self.assertEqual(set([self.publication2]),
+                         self.dataBase.findDirIndirCites(self.publication1.id))
+        self.dataBase.removePublication(self.publication2)
+        self.assertEqual(set(),
+                         self.dataBase.findDirIndirCites(self.publication1.id))
+
+    def testFindDirIndirCitesDeepChain(self):
+        previous = self.publication1
+        for number in range(3000):
+            publication = Publication("Chain %d" % number, self._authors, 2000)
+            self.dataBase.addAsPublication(publication)
+            self.dataBase.addCitation(publication.id, previous.id)
+            previous = publication
+        self.assertEqual(3000, self.dataBase.countDirIndirCites(
+            self.publication1.id))
+
+    def testInstrumentation(self):
+        self.dataBase.addCitation(self.publication2.id, self.publication1.id)
+        self.dataBase.addCitation(self.publication3.id, self.publication2.id)
+        self.dataBase.findByAuthor("B. Wang")
+        self.assertEqual({}, self.dataBase.getInstrumentation().getSnapshot()[
+            'methods'])
+        self.dataBase.enableInstrumentation()
+        self.dataBase.findDirIndirCites(self.publication1.id)
+        self.dataBase.findDirIndirCites(self.publication1.id)
+        self.dataBase.findDirIndirCites(self.publication1.id, maxDepth=1)
+        self.dataBase.findByAuthor("B. Wang")
+        self.dataBase.findByAuthor("A. Einstein")
+        self.dataBase.find(YearBetween(2000, 2020))
+        stream = self.dataBase.iterByAuthor("B. Wang", limit=1)
+        self.assertEqual(1, len(list(stream)))
+        self.assertEqual(self.publication1.id, stream.getCursor())
+        self.assertRaises(IllegalAuthorsException, self.dataBase.findByAuthor,
+                          "Wang, Bo")
+        self.dataBase.disableInstrumentation()
+        self.dataBase.findByAuthor("S. Mao")
+        snapshot = self.dataBase.getInstrumentation().getSnapshot()
+        self.assertFalse(snapshot['enabled'])
+        cites = snapshot['methods']['findDirIndirCites']
+        self.assertEqual(3, cites['calls'])
+        self.assertEqual(5, cites['rowsReturned'])
+        self.assertEqual(4, cites['nodesVisited'])
+        self.assertEqual({'hits': 1, 'misses': 1},
+                         snapshot['lookups']['citationCache'])
+        self.assertEqual({'hits': 1, 'misses': 1},
+                         snapshot['lookups']['author'])
+        byAuthor = snapshot['methods']['findByAuthor']
+        self.assertEqual(3, byAuthor['calls'])
+        self.assertEqual(1, byAuthor['errors'])
+        self.assertEqual(2, snapshot['methods']['find']['rowsScanned'])
+        self.assertEqual(2, snapshot['methods']['find']['rowsReturned'])
+        self.assertEqual(1, snapshot['methods']['iterByAuthor'][
+            'rowsReturned'])
+
+    def testIterByAuthor(self):
+        publications = [Publication("Bonding %d" % number, ["Wang, Bo"], 
+                                    2000 + number % 3) for number in range(10)]
+        self.dataBase.addPublications(publications)
+        self.dataBase.addCitation(publications[5].id, publications[4].id)
+        stream = self.dataBase.iterByAuthor("B. Wang", limit=4)
+        self.assertEqual([self.publication1, self.publication2] + 
+                         publications[:2], list(stream))
+        self.assertEqual(publications[2:5], 
+                         list(self.dataBase.iterByAuthor(
+                             "B. Wang", limit=3, cursor=stream.getCursor())))
+        self.assertEqual(publications[8:], 
+                         list(self.dataBase.iterByAuthor("B. Wang", 
+                                                         offset=10)))
+        byYear = list(self.dataBase.iterByAuthor("B. Wang", orderBy='year'))
+        self.assertEqual([1990, 2000, 2000, 2000, 2000, 2001, 2001, 2001, 
+                          2002, 2002, 2002, 2012], 
+                         [publication.year for publication in byYear])
+        self.assertEqual([publications[4], self.publication1], 
+                         list(self.dataBase.iterByAuthor(
+                             "B. Wang", orderBy='citations', limit=2)))
+        self.assertRaises(IllegalValueException, self.dataBase.iterByAuthor, 
+                          "B. Wang", 'title')
+        self.assertRaises(IllegalAuthorsException, self.dataBase.iterByAuthor, 
+                          "Wang, Bo")
+
+    def testIterSkipsRemovedPublications(self):
+        stream = self.dataBase.iterByTitleWord("mems")
+        self.assertEqual(self.publication1, next(stream))
+        self.dataBase.removePublication(self.publication2)
+        self.assertEqual([], list(stream))
+        self.assertEqual([self.publication1], 
+                         list(self.dataBase.iterByTitleWord("mems")))
+
+    def testIterDirIndirCites(self):
+        previous = self.publication1
+        chain = []
+        for number in range(100):
+            publication = Publication("Chain %d" % number, self._authors, 2000)
+            self.dataBase.addAsPublication(publication)
+            self.dataBase.addCitation(publication.id, previous.id)
+            chain.append(publication)
+            previous = publication
+        stream = self.dataBase.iterDirIndirCites(self.publication1.id, limit=5)
+        self.assertEqual(chain[:5], list(stream))
+        self.assertEqual(chain[5:7], list(self.dataBase.iterDirIndirCites(
+            self.publication1.id, limit=2, cursor=stream.getCursor())))
+        self.assertEqual(chain[:2], list(self.dataBase.iterDirIndirCites(
+            self.publication1.id, maxDepth=2)))
+        self.assertEqual(chain[-2:], list(self.dataBase.iterDirIndirCites(
+            self.publication1.id, orderBy='id', offset=98)))
+
+    def testIterFind(self):
+        query = YearBetween(2000)
+        self.assertEqual([self.publication2, self.publication3], 
+                         list(self.dataBase.iterFind(query)))
+        self.assertEqual([self.publication3], 
+                         list(self.dataBase.iterFind(query, offset=1)))
+
+    def testAddPublications(self):
+        first = Publication("Bonding", ["Wang, Bo"], 2015)
+        second = Publication("Dicing", ["Mao, Shengping"], 2015)
+        nextId = self.dataBase.getCurrentIncrementID()
+        self.assertEqual([nextId, nextId + 1],
+                         self.dataBase.addPublications([first, second]))
+        self.assertEqual(first, self.dataBase.getPublicationWithID(nextId))
+        self.assertEqual(set([self.publication3, second]),
+                         self.dataBase.findByAuthor("S. Mao"))
+        self.assertEqual(set([first]), self.dataBase.findByTitleWord("bond"))
+
+    def testAddPublicationsAllOrNothing(self):
+        new = Publication("Bonding", ["Wang, Bo"], 2015)
+        self.assertRaises(IllegalValueException, self.dataBase.addPublications,
+                          [new, self.publication1])
+        self.assertRaises(IllegalValueException, self.dataBase.addPublications,
+                          [new, new])
+        self.assertEqual(-1, new.id)
+        self.assertEqual(3, len(self.dataBase.getAllPublications()))
+
+    def testFindDuplicates(self):
+        duplicate = Publication("Packaging of mems", ["Wang, Bo", 
+                                                      "Witvrouw, Ann"], 2012)
+        self.assertEqual(1004, self.dataBase.addAsPublication(duplicate))
+        self.assertEqual([[self.publication2, duplicate]], 
+                         self.dataBase.findDuplicates())
+        self.publication3.title = "Gas leak rate study of MEMS"
+        self.publication3.authors = self._authors
+        self.publication3.year = 1990
+        self.assertEqual([[self.publication1, self.publication3], 
+                          [self.publication2, duplicate]], 
+                         self.dataBase.findDuplicates())
+        self.dataBase.removePublication(duplicate)
+        self.assertEqual([[self.publication1, self.publication3]], 
+                         self.dataBase.findDuplicates())
+
+    def testRejectDuplicates(self):
+        self.dataBase.setDuplicatePolicy(ReferenceDataBase.REJECT_DUPLICATES)
+        duplicate = Publication("Packaging of MEMS", ["Wang, Bo", 
+                                                      "Witvrouw, Ann"], 2012)
+        new = Publication("Bonding", ["Wang, Bo"], 2015)
+        self.assertRaises(DuplicatePublicationException, 
+                          self.dataBase.addAsPublication, duplicate)
+        self.assertRaises(DuplicatePublicationException, 
+                          self.dataBase.addPublications, [new, duplicate])
+        self.assertRaises(DuplicatePublicationException, 
+                          self.dataBase.addPublications, 
+                          [new, Publication("Bonding", ["Wang, Bo"], 2015)])
+        self.assertEqual(3, len(self.dataBase.getAllPublications()))
+        self.assertRaises(IllegalValueException, 
+                          self.dataBase.setDuplicatePolicy, "drop")
+
+    def testMergeDuplicates(self):
+        self.dataBase.setDuplicatePolicy(ReferenceDataBase.MERGE_DUPLICATES)
+        duplicate = Publication("Packaging of MEMS", ["Wang, Bo", 
+                                                      "Witvrouw, Ann"], 2012)
+        self.assertEqual(self.publication2.id, 
+                         self.dataBase.addAsPublication(duplicate))
+        self.assertFalse(self.dataBase.hasPublication(duplicate))
+        new = Publication("Bonding", ["Wang, Bo"], 2015)
+        ids = self.dataBase.addPublications(
+            [new, duplicate, Publication("Bonding", ["Wang, Bo"], 2015)])
+        self.assertEqual([new.id, self.publication2.id, new.id], ids)
+        self.assertEqual(4, len(self.dataBase.getAllPublications()))
+        self.assertEqual([], self.dataBase.findDuplicates())
+
+    def testFindNearDuplicates(self):
+        nearDuplicate = Publication("Gas leak-rate study of MEMS.", 
+                                    list(reversed(self._authors)), 1991)
+        self.assertEqual([self.publication1], 
+                         [publication for publication, similarity in 
+                          self.dataBase.findNearDuplicates(nearDuplicate, 0.6)])
+        self.dataBase.addAsPublication(nearDuplicate)
+        self.assertEqual([nearDuplicate], 
+                         [publication for publication, similarity in 
+                          self.dataBase.findNearDuplicates(self.publication1, 
+                                                           0.6)])
+        self.assertEqual([[self.publication1, nearDuplicate]], 
+                         self.dataBase.clusterNearDuplicates(0.6))
+        nearDuplicate.title = "Wafer bonding"
+        self.assertEqual([], self.dataBase.clusterNearDuplicates(0.6))
+        self.publication3.title = "Gas leak rate study of MEMS"
+        self.publication3.authors = self._authors
+        self.dataBase.removePublication(self.publication1)
+        self.assertEqual([(self.publication3, 1.0)], 
+                         self.dataBase.findNearDuplicates(self.publication1))
+
+    def testRemovePublications(self):
+        self.dataBase.addCitations([
+            (self.publication2.id, self.publication1.id),
+            (self.publication3.id, self.publication2.id),
+            (self.publication3.id, self.publication1.id)])
+        self.assertEqual(set([self.publication2, self.publication3]),
+                         self.dataBase.findDirIndirCites(self.publication1.id))
+        self.assertRaises(IllegalPublicationIdException,
+                          self.dataBase.removePublications,
+                          [self.publication2.id, 42])
+        self.assertTrue(self.dataBase.hasPublication(self.publication2))
+        self.assertEqual([self.publication2, self.publication3],
+                         self.dataBase.removePublications(
+                             [self.publication2.id, self.publication3.id,
+                              self.publication2.id], compact=False))
+        self.assertTrue(self.publication2.isTerminated())
+        self.assertFalse(self.dataBase.hasPublication(self.publication3))
+        self.assertEqual(set(), self.publication1.getAllCitedBy())
+        self.assertEqual(set(), self.publication3.getAllCites())
+        self.assertEqual(set(),
+                         self.dataBase.findDirIndirCites(self.publication1.id))
+        self.assertEqual(set([self.publication1]),
+                         self.dataBase.findByAuthor("B. Wang"))
+        self.assertEqual(set(), self.dataBase.findByTitleWord("packaging"))
+        self.assertEqual([(1990, 1)], self.dataBase.countByYear())
+        self.assertEqual(1.0, self.dataBase.authorCitationIndex("B. Wang"))
+        self.assertEqual(0.0, self.dataBase.authorCitationIndex("S. Mao"))
+        self.dataBase.compact(background=True).join()
+        self.assertEqual(set(), self.publication1.getAllCitedBy())
+        self.assertTrue(self.dataBase.hasProperPublication())
+
+    def testAddCitations(self):
+        self.assertEqual(set(),
+                         self.dataBase.findDirIndirCites(self.publication1.id))
+        self.dataBase.addCitations([
+            (self.publication2.id, self.publication1.id),
+            (self.publication3.id, self.publication2.id)])
+        self.assertEqual(set([self.publication2, self.publication3]),
+                         self.dataBase.findDirIndirCites(self.publication1.id))
+
+    def testAddCitationsAllOrNothing(self):
+        self.assertRaises(IllegalValueException, self.dataBase.addCitations, [
+            (self.publication2.id, self.publication1.id),
+            (self.publication1.id, self.publication3.id)])
+        self.assertRaises(IllegalPublicationIdException,
+                          self.dataBase.addCitations,
+                          [(self.publication2.id, self.publication1.id),
+                           (self.publication2.id, 42)])
+        self.assertEqual(set(), self.publication1.getAllCitedBy())
+
+    def testAddCitationsSkipInvalid(self):
+        same = Publication("Packaging of MEMS", ["Wang, Bo", "Witvrouw, Ann"],
+                           2012)
+        self.dataBase.addAsPublication(same)
+        rejected = self.dataBase.addCitations([
+            (self.publication2.id, self.publication1.id),
+            (self.publication1.id, self.publication3.id),
+            (self.publication3.id, 42),
+            (same.id, self.publication2.id),
+            (self.publication3.id, self.publication3.id),
+            (self.publication3.id, self.publication2.id)], skipInvalid=True)
+        self.assertEqual({
+            'newer': [(self.publication1.id, self.publication3.id)],
+            'unknown': [(self.publication3.id, 42)],
+            'same': [(same.id, self.publication2.id),
+                     (self.publication3.id, self.publication3.id)]}, rejected)
+        self.assertEqual(set([self.publication2, self.publication3]),
+                         self.dataBase.findDirIndirCites(self.publication1.id))
+        self.assertEqual({}, self.dataBase.addCitations(
+            [(self.publication2.id, self.publication1.id)], skipInvalid=True))
+
+    def testAddCitationsRollback(self):
+        failing = Publication("Failing", self._authors, 2000)
+        citing = FailingPublication("Citing", self._authors, 2015)
+        citing.failing = failing
+        self.dataBase.addPublications([failing, citing])
+        self.dataBase.addCitation(citing.id, self.publication2.id)
+        pairs = [(citing.id, self.publication2.id),
+                 (citing.id, self.publication1.id),
+                 (citing.id, failing.id)]
+        self.assertRaises(MemoryError, self.dataBase.addCitations, pairs)
+        self.assertEqual(set([self.publication2]), citing.getAllCites())
+        self.assertEqual(set(), self.publication1.getAllCitedBy())
+        self.assertEqual(set(), failing.getAllCitedBy())
+        self.assertRaises(MemoryError, self.dataBase.addCitations, pairs,
+                          rollback=False)
+        self.assertEqual(set([citing]),
+                         self.dataBase.findDirIndirCites(self.publication1.id))
+
+    def testAuthorCitationIndices(self):
+        self.dataBase.addAsPublication(Book("Packaging", ["Wang, Bo"], 2015,
+                                            "Springer"))
+        weight = Book.getWeight()
+        Book.setWeight(2.5)
+        try:
+            indices = self.dataBase.authorCitationIndices()
+            self.assertEqual(set(["B. Wang", "J. De Coster", "M. Wevers",
+                                  "A. Witvrouw", "S. Mao"]), set(indices))
+            for authorName, index in indices.items():
+                self.assertEqual(self.dataBase.authorCitationIndex(authorName),
+                                 index)
+            self.assertEqual(4.5, indices["B. Wang"])
+            self.assertEqual({"S. Mao": 1.0, "A. Einstein": 0},
+                             self.dataBase.authorCitationIndices(
+                                 ["S. Mao", "A. Einstein"]))
+            self.assertRaises(IllegalAuthorsException,
+                              self.dataBase.authorCitationIndices, ["Mao, S"])
+        finally:
+            Book.setWeight(weight)
+
+    def testAuthorCitationIndexKeptUpToDate(self):
+        book = Book("Packaging", ["Wang, Bo"], 2015, "Springer")
+        self.dataBase.addAsPublication(book)
+        self.assertEqual(3.0, self.dataBase.authorCitationIndex("B. Wang"))
+        weight = Book.getWeight()
+        Book.setWeight(4.0)
+        try:
+            self.assertEqual(6.0, self.dataBase.authorCitationIndex("B. Wang"))
+        finally:
+            Book.setWeight(weight)
+        book.authors = ["Mao, Shengping"]
+        self.assertEqual(2.0, self.dataBase.authorCitationIndex("B. Wang"))
+        self.assertEqual(2.0, self.dataBase.authorCitationIndex("S. Mao"))
+        self.dataBase.addCitation(self.publication3.id, self.publication2.id)
+        self.publication2.terminate()
+        self.assertFalse(self.dataBase.hasPublication(self.publication2))
+        self.assertEqual(set(), self.publication3.getAllCites())
+        self.assertEqual(1.0, self.dataBase.authorCitationIndex("B. Wang"))
+        self.assertEqual(0, self.dataBase.authorCitationIndex("A. Witvrouw"))
+
+    def testIDsPerDataBase(self):
+        other = self.createDataBase()
+        publication = Publication("Bonding", ["Wang, Bo"], 2015)
+        other.addAsPublication(publication)
+        self.assertEqual(1001, publication.id)
+        self.assertEqual(self.publication3.id + 1,
+                         self.dataBase.getCurrentIncrementID())
+        self.assertFalse(self.dataBase.hasPublication(publication))
+        self.assertRaises(IllegalPublicationIdException,
+                          self.dataBase.setCurrentIncrementID,
+                          self.publication3.id)
+
+    def testConcurrentReadersAndWriter(self):
+        errors = []
+        done = threading.Event()
+
+        def write():
+            try:
+                previous = self.publication3
+                for number in range(300):
+                    publication = Publication("Getter {}".format(number),
+                                              ["Mao, Shengping"], 2015)
+                    self.dataBase.addAsPublication(publication)
+                    self.dataBase.addCitation(publication.id, previous.id)
+                    previous = publication
+            finally:
+                done.set()
+
+        def read():
+            try:
+                while not done.is_set():
+                    cited = self.dataBase.findDirIndirCites(
+                        self.publication3.id)
+                    authored = self.dataBase.findByAuthor("S. Mao")
+                    # Citations are added after their publications.
+                    self.assertTrue(len(cited) < len(authored))
+                    self.dataBase.findByTitleWord("getter")
+            except Exception as exception:
+                errors.append(exception)
+
+        threads = [threading.Thread(target=read) for number in range(3)]
+        threads.append(threading.Thread(target=write))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], errors)
+        self.assertEqual(300, self.dataBase.countDirIndirCites(
+            self.publication3.id))
+
+    def testConcurrentRename(self):
+        errors = []
+        done = threading.Event()
+
+        def rename():
+            try:
+                for number in range(500):
+                    self.publication3.title = "Alpha {}".format(number)
+                    self.publication3.year = 2000 + number % 10
+                    self.publication3.title = "Beta {}".format(number)
+            finally:
+                done.set()
+
+        def read():
+            try:
+                while not done.is_set():
+                    with self.dataBase.readLocked():
+                        for word in ("alpha", "beta"):
+                            for publication in \
+                                    self.dataBase.findByTitleWord(word):
+                                self.assertIn(word, 
+                                              publication.title.lower())
+                        year = self.publication3.year
+                        self.assertIn(self.publication3, 
+                                      self.dataBase.findByYearRange(year, 
+                                                                    year))
+            except Exception as exception:
+                errors.append(exception)
+
+        switchInterval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=read), 
+                       threading.Thread(target=rename)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switchInterval)
+        self.assertEqual([], errors)
+        self.assertEqual(set([self.publication3]), 
+                         self.dataBase.findByTitleWord("beta 499"))
+
+class CompactGraphReferenceDataBaseTest(ReferenceDataBaseTest):
+    """Unit Test for ReferenceDataBase with a compact citation graph"""
+
+    def createDataBase(self):
+        return ReferenceDataBase(compactGraph=True)
+
+    def testCitationsStoredInGraph(self):
+        self.dataBase.addCitation(self.publication2.id, self.publication1.id)
+        self.assertEqual(set([self.publication1]),
+                         self.publication2.getAllCites())
+        self.assertEqual(set([self.publication2]),
+                         self.publication1.getAllCitedBy())
+        self.assertTrue(self.publication1.haveProperCitedBy())
+        self.publication2.removeAsCite(self.publication1)
+        self.assertEqual(set(), self.publication1.getAllCitedBy())
+
+    def testAddPublicationWithCitations(self):
+        citing = Publication("Citing", self._authors, 2015)
+        cited = Publication("Cited", self._authors, 2010)
+        citing.addAsCite(cited)
+        self.assertRaises(IllegalValueException,
+                          self.dataBase.addAsPublication, citing)
+        self.assertRaises(IllegalValueException,
+                          self.publication3.addAsCite, cited)
+
+    def testTerminate(self):
+        self.dataBase.addCitation(self.publication2.id, self.publication1.id)
+        self.dataBase.terminate()
+        self.assertEqual(set([self.publication1]), self.publication2.cites)
+
+if __name__ == "__main__":
+    unittest.main()
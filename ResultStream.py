@@ -0,0 +1,99 @@
+"""A lazy, paginated iterator over the results of a query.
+
+..:: moduleauthor: Wang Bo <wangbomicro@gmail.com>
+"""
+from Exceptions import IllegalValueException
+from collections import deque
+
+class ResultStream(object):
+    """Iterator over the results of a query in a stable order, fetched a page
+    at a time.
+
+    The rows come from a fetch function: fetch(after, count) returns at most
+    count (key, publication) rows whose key follows the given key, or all
+    first rows if it is None, in increasing order of key; fewer than count
+    rows means no row is left. The first page holds 32 rows, or fewer when
+    the limit is lower, and every next page twice as many, so a caller
+    stopping early pays only for about the rows it consumed.
+
+    The key of the last row returned is the cursor: a new query started at
+    that cursor continues right after that row. Fetched rows that no longer
+    pass the filter when their turn comes, e.g. removed publications, are
+    skipped.
+    """
+
+    _firstPageSize = 32
+
+    def __init__(self, fetch, limit=None, offset=0, cursor=None, filter=None):
+        """Initialize this new ResultStream.
+
+        Args:
+            fetch (callable): The function fetching the pages.
+            limit (int): The maximum number of rows returned; None for no
+                limit.
+            offset (int): The number of rows skipped first.
+            cursor: The key after which the rows start, as returned by
+                getCursor; None to start at the first row.
+            filter (callable): A function telling whether a fetched
+                publication may still be returned; None to return all.
+        throws:
+            IllegalValueException: The limit or the offset is negative.
+        """
+        if (limit is not None and limit < 0) or offset < 0:
+            raise IllegalValueException("The limit and offset of a query \
+            can not be negative.")
+        self._fetch = fetch
+        self._limit = limit
+        self._offset = offset
+        self._cursor = cursor
+        self._after = cursor
+        self._filter = filter
+        self._page = deque()
+        self._pageSize = self._firstPageSize
+        self._isExhausted = False
+        self._count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._limit is not None and self._count >= self._limit:
+            raise StopIteration
+        while True:
+            if not self._page:
+                self._fetchPage()
+                if not self._page:
+                    raise StopIteration
+            key, publication = self._page.popleft()
+            if self._filter is None or self._filter(publication):
+                break
+        self._cursor = key
+        self._count += 1
+        return publication
+
+    def getCursor(self):
+        """Return the key of the last row returned, or the cursor this
+        stream started at if none was returned yet.
+        """
+        return self._cursor
+
+    def _fetchPage(self):
+        if self._isExhausted:
+            return
+        if self._offset:
+            skipped = self._fetch(self._after, self._offset)
+            if len(skipped) < self._offset:
+                self._isExhausted = True
+                return
+            self._after = self._cursor = skipped[-1][0]
+            self._offset = 0
+        count = self._pageSize
+        if self._limit is not None:
+            count = min(count, self._limit - self._count)
+        rows = self._fetch(self._after, count)
+        if len(rows) < count:
+            self._isExhausted = True
+        if rows:
+            self._after = rows[-1][0]
+        self._page.extend(rows)
+        self._pageSize *= 2
@@ -0,0 +1,54 @@
+"""Unit Test for ResultStream
+
+..:: moduleauthors:: Wang Bo <wangbomicro@gmail.com>
+"""
+from Exceptions import IllegalValueException
+from ResultStream import ResultStream
+import bisect
+import unittest
+
+class ResultStreamTest(unittest.TestCase):
+    """Unit Test for ResultStream"""
+
+    def setUp(self):
+        self.keys = list(range(0, 2000, 2))
+        self.counts = []
+
+    def fetch(self, after, count):
+        self.counts.append(count)
+        start = 0 if after is None else bisect.bisect_right(self.keys, after)
+        return [(key, "row {}".format(key))
+                for key in self.keys[start:start + count]]
+
+    def testAllRows(self):
+        rows = list(ResultStream(self.fetch))
+        self.assertEqual(["row {}".format(key) for key in self.keys], rows)
+        self.assertEqual([32, 64, 128, 256, 512, 1024], self.counts)
+
+    def testLimitAndOffset(self):
+        stream = ResultStream(self.fetch, limit=3, offset=5)
+        self.assertEqual(["row 10", "row 12", "row 14"], list(stream))
+        self.assertEqual([5, 3], self.counts)
+        self.assertEqual(14, stream.getCursor())
+        self.assertEqual([], list(ResultStream(self.fetch, limit=0)))
+        self.assertEqual([], list(ResultStream(self.fetch, offset=1000)))
+
+    def testCursor(self):
+        stream = ResultStream(self.fetch)
+        for row in stream:
+            if row == "row 40":
+                break
+        self.assertEqual([32], self.counts)
+        self.assertEqual(["row 42", "row 44"],
+                         list(ResultStream(self.fetch, limit=2,
+                                           cursor=stream.getCursor())))
+        self.assertEqual(1998, ResultStream(self.fetch, cursor=1998).getCursor())
+        self.assertEqual([], list(ResultStream(self.fetch, cursor=1998)))
+
+    def testIllegalArguments(self):
+        self.assertRaises(IllegalValueException, ResultStream, self.fetch, -1)
+        self.assertRaises(IllegalValueException, ResultStream, self.fetch,
+                          None, -1)
+
+if __name__ == "__main__":
+    unittest.main()
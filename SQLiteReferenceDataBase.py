@@ -0,0 +1,858 @@
+"""A reference database stored in an SQLite file, for collections of
+publications larger than memory.
+
+..:: moduleauthor: Wang Bo <wangbomicro@gmail.com>
+..:: invar: Every publication object handed out by the database is the only
+    live object for its row.
+"""
+from Book import Book
+from ConferencePaper import ConferencePaper
+from CSRCitationGraph import CitationSet
+from Exceptions import IllegalValueException, IllegalAuthorsException, \
+    IllegalPublicationIdException, QueryCancelledException
+from JournalArticle import JournalArticle
+from Publication import Publication
+from ReferenceDataBase import ReferenceDataBase
+from TitleIndex import TitleIndex
+from collections import OrderedDict
+import contextlib
+import itertools
+import sqlite3
+import threading
+import weakref
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS publications (
+    id INTEGER PRIMARY KEY,
+    type TEXT NOT NULL,
+    title TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    venue TEXT,
+    issueNumber INTEGER
+);
+CREATE TABLE IF NOT EXISTS authors (
+    publicationId INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    shortName TEXT NOT NULL,
+    PRIMARY KEY (publicationId, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS authorsByShortName ON authors (shortName);
+CREATE TABLE IF NOT EXISTS titleTokens (
+    token TEXT NOT NULL,
+    publicationId INTEGER NOT NULL,
+    PRIMARY KEY (token, publicationId)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS titleTokensByPublication
+    ON titleTokens (publicationId);
+CREATE TABLE IF NOT EXISTS titleVocabulary (
+    id INTEGER PRIMARY KEY,
+    token TEXT NOT NULL UNIQUE
+);
+CREATE TRIGGER IF NOT EXISTS titleTokenAdded AFTER INSERT ON titleTokens
+BEGIN
+    INSERT OR IGNORE INTO titleVocabulary (token) VALUES (NEW.token);
+END;
+CREATE TRIGGER IF NOT EXISTS titleTokenRemoved AFTER DELETE ON titleTokens
+WHEN NOT EXISTS (SELECT 1 FROM titleTokens WHERE token = OLD.token)
+BEGIN
+    DELETE FROM titleVocabulary WHERE token = OLD.token;
+END;
+CREATE TABLE IF NOT EXISTS citations (
+    citingId INTEGER NOT NULL,
+    citedId INTEGER NOT NULL,
+    PRIMARY KEY (citingId, citedId)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS citationsByCited ON citations (citedId, citingId);
+"""
+
+# The trigrams of the vocabulary, for substring queries; needs an SQLite
+# built with the FTS5 trigram tokenizer.
+_TRIGRAM_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS titleTrigrams USING fts5(
+    token, content='titleVocabulary', content_rowid='id',
+    tokenize='trigram');
+CREATE TRIGGER IF NOT EXISTS titleVocabularyAdded
+AFTER INSERT ON titleVocabulary
+BEGIN
+    INSERT INTO titleTrigrams (rowid, token) VALUES (NEW.id, NEW.token);
+END;
+CREATE TRIGGER IF NOT EXISTS titleVocabularyRemoved
+AFTER DELETE ON titleVocabulary
+BEGIN
+    INSERT INTO titleTrigrams (titleTrigrams, rowid, token)
+        VALUES ('delete', OLD.id, OLD.token);
+END;
+"""
+
+# The number of SQLite virtual machine instructions between checks of the
+# cancel event of a query.
+_CANCEL_CHECK_INTERVAL = 1000
+
+# SQLite limits the number of parameters of a single statement.
+_CHUNK_SIZE = 500
+
+_CITING_CLOSURE = """
+WITH RECURSIVE citing(id) AS (
+    SELECT citingId FROM citations WHERE citedId = ?
+    UNION
+    SELECT citations.citingId FROM citations JOIN citing
+        ON citations.citedId = citing.id
+)
+"""
+
+_CITING_WITHIN_DEPTH = """
+WITH RECURSIVE citing(id, depth) AS (
+    SELECT citingId, 1 FROM citations WHERE citedId = ?
+    UNION
+    SELECT citations.citingId, citing.depth + 1 FROM citations JOIN citing
+        ON citations.citedId = citing.id WHERE citing.depth < ?
+)
+"""
+
+
+class SQLiteReferenceDataBase(object):
+    """Reference database with the same public interface as
+    ReferenceDataBase, keeping its publications, authors, title tokens and
+    citations in indexed tables of an SQLite file.
+
+    Publications are materialized from their rows on access and kept in a
+    bounded least-recently-used cache. Publications still referenced
+    elsewhere stay the one object for their row, and changes made through
+    their setters or citation methods are written to the file directly.
+    """
+
+    _types = dict((cls.__name__, cls) for cls in
+                  (Publication, Book, ConferencePaper, JournalArticle))
+
+    def __init__(self, path, maxCachedPublications=10000):
+        """Initialize this new SQLiteReferenceDataBase on the given file,
+        creating the tables if the file is new.
+
+        Args:
+            path (str): The path of the SQLite file, or ":memory:".
+            maxCachedPublications (int): The maximum number of publications
+                kept alive by the cache.
+        """
+        # Calls may come from any thread, e.g. the executor threads of an
+        # AsyncReferenceDataBase; every use of the connection and of the
+        # cache holds the lock.
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+        try:
+            self._connection.executescript(_TRIGRAM_SCHEMA)
+            self._hasTrigrams = True
+        except sqlite3.OperationalError:
+            self._hasTrigrams = False
+        self._connection.execute(
+            "INSERT OR IGNORE INTO meta VALUES ('nextId', 1001)")
+        # Files written before the vocabulary was kept have an empty one.
+        self._connection.execute(
+            "INSERT OR IGNORE INTO titleVocabulary (token) "
+            "SELECT DISTINCT token FROM titleTokens "
+            "WHERE NOT EXISTS (SELECT 1 FROM titleVocabulary)")
+        self._connection.commit()
+        self._transactionDepth = 0
+        self._isTerminated = False
+        self._cache = OrderedDict()
+        self._maxCachedPublications = maxCachedPublications
+        self._live = weakref.WeakValueDictionary()
+        self._graph = SQLiteCitationGraph(self)
+        self._lock = threading.RLock()
+
+    def writeLocked(self):
+        """Return a context manager serializing changes of the publications
+        of this DataBase, and the uses of its connection and cache.
+        """
+        return self._lock
+
+    def close(self):
+        """Close the SQLite file of this DataBase.
+        """
+        with self._lock:
+            self._connection.close()
+
+    def isTerminated(self):
+        """Check whether this DataBase is already terminated.
+        """
+        return self._isTerminated
+
+    def terminate(self):
+        """Terminate this DataBase.
+         Post: This DataBase is terminated.
+         Post: All publication belonging to this DataBase have been Removed.
+        """
+        if not self.isTerminated():
+            with self._transaction() as connection:
+                for table in ("publications", "authors", "titleTokens",
+                              "citations"):
+                    connection.execute("DELETE FROM " + table)
+                for publication in list(self._live.values()):
+                    self._detach(publication)
+                self._cache.clear()
+        self._isTerminated = True
+
+    def hasPublication(self, publication):
+        """Check whether this DataBase has the given publication as one of the
+        publications attached to it.
+
+        Args:
+            publication (publication): The publication to check.
+        """
+        return publication.database is self and \
+            self.hasPublicationID(publication.id)
+
+    def hasPublicationID(self, id):
+        """Check whether publication with the given ID in the database.
+
+        Args:
+            id (int): The id to be checked.
+        """
+        with self._lock:
+            return id in self._live or self._connection.execute(
+                "SELECT 1 FROM publications WHERE id = ?", (id,)).fetchone() \
+                is not None
+
+    def getPublicationWithID(self, id):
+        """Get the publication in the database by the given ID.
+
+        Args:
+            id (int): The publication ID.
+        Returns:
+            (Publication) The publication with the given ID.
+        throws:
+            IllegalPublicationIdException: If the given ID do not exist in
+            the publication DataBase.
+        """
+        return self.getPublicationsWithIDs([id])[0]
+
+    def getPublicationsWithIDs(self, ids):
+        """Get the publications in the database with the given IDs.
+
+        Args:
+            ids (iterable): The publication IDs.
+        Returns:
+            (list) The publications, in the order of the given IDs.
+        throws:
+            IllegalPublicationIdException: If one of the given IDs does not
+            exist in the publication DataBase.
+        """
+        ids = list(ids)
+        with self._lock:
+            missing = [id for id in set(ids) if id not in self._live]
+            for start in range(0, len(missing), _CHUNK_SIZE):
+                self._load(missing[start:start + _CHUNK_SIZE])
+            publications = []
+            for id in ids:
+                publication = self._live.get(id)
+                if publication is None:
+                    raise IllegalPublicationIdException(id)
+                self._touch(publication)
+                publications.append(publication)
+        return publications
+
+    def getAllPublications(self):
+        """Return a generator over all publications of this Database, in the
+        order of their IDs, loading them a chunk at a time.
+        """
+        lastId = None
+        while True:
+            if lastId is None:
+                rows = self._column(
+                    "SELECT id FROM publications ORDER BY id LIMIT ?",
+                    (_CHUNK_SIZE,))
+            else:
+                rows = self._column(
+                    "SELECT id FROM publications WHERE id > ? ORDER BY id "
+                    "LIMIT ?", (lastId, _CHUNK_SIZE))
+            if not rows:
+                return
+            for publication in self.getPublicationsWithIDs(rows):
+                yield publication
+            lastId = rows[-1]
+
+    def getPublicationCount(self):
+        """Return the number of publications of this DataBase.
+        """
+        return self._column("SELECT COUNT(*) FROM publications")[0]
+
+    def canHaveAsPublication(self, publication):
+        """Check whether this Database can have the given publication as one
+        of its elements.
+
+        Args:
+            publication (Publication): The publication to check
+        Return:
+            (Boolean) False if the given publication is not effective, is
+            terminated, or belongs to another database.
+        """
+        return publication is not None and not publication.isTerminated() \
+            and type(publication).__name__ in self._types \
+            and publication.database is None
+
+    def addAsPublication(self, publication):
+        """Add the given publication to this Database.
+
+        Args:
+            publication (Publication): The publication to be added.
+        Returns:
+            (int) The ID given to the publication.
+        Post:
+            This Database has the given publication as one of its publications.
+        throws:
+            IllegalArgumentException: The given publication can not be
+            attached to the DataBase, or already has citations.
+        """
+        return self.addPublications([publication])[0]
+
+    def addPublications(self, publications):
+        """Add all given publications to this Database, or none of them.
+
+        Args:
+            publications (iterable): The publications to be added.
+        Returns:
+            (list) The IDs given to the publications, in the given order.
+        throws:
+            IllegalArgumentException: One of the given publications can not be
+            added, or it occurs more than once in the batch.
+        """
+        publications = list(publications)
+        batch = set()
+        for publication in publications:
+            if not self.canHaveAsPublication(publication) or \
+                    id(publication) in batch:
+                raise IllegalValueException("The database can not have the \
+                given publication.")
+            if publication.cites or publication.citedBy:
+                raise IllegalValueException("Publications must be added to \
+                the database before they cite or are cited.")
+            batch.add(id(publication))
+
+        with self._transaction() as connection:
+            firstId = self._reserveIds(len(publications))
+            for offset, publication in enumerate(publications):
+                publication.id = firstId + offset
+                self._insert(connection, publication)
+            for publication in publications:
+                self._attach(publication)
+        return [publication.id for publication in publications]
+
+    def removePublication(self, publication):
+        """Remove the given publication from this DataBase.
+
+        Args:
+            publication (Publication):The publication to be removed.
+        Post: This Database does not have the given publication as one of its
+            publications, and the given publication is terminated.
+        """
+        if not self.hasPublication(publication):
+            return
+        with self._transaction():
+            publication.terminate()
+
+    def removePublications(self, ids, compact=True):
+        """Remove the publications with the given IDs from this DataBase and
+        terminate them, deleting their rows and citations with one statement
+        per table and chunk of IDs, in one transaction.
+
+        Args:
+            ids (iterable): The IDs of the publications to be removed.
+            compact (bool): Ignored, SQLite reuses the freed pages itself.
+        Returns:
+            (list) The removed publications.
+        Throws:
+            IllegalPublicationIdException: One of the IDs is not in the
+            DataBase. No publication has been removed.
+        """
+        publications = self.getPublicationsWithIDs(dict.fromkeys(ids))
+        ids = [publication.id for publication in publications]
+        with self._transaction() as connection:
+            for start in range(0, len(ids), _CHUNK_SIZE):
+                chunk = ids[start:start + _CHUNK_SIZE]
+                marks = ", ".join("?" * len(chunk))
+                for table, column in (("citations", "citingId"),
+                                      ("citations", "citedId"),
+                                      ("publications", "id"),
+                                      ("authors", "publicationId"),
+                                      ("titleTokens", "publicationId")):
+                    connection.execute("DELETE FROM {} WHERE {} IN ({})".format(
+                        table, column, marks), chunk)
+            for publication in publications:
+                self._cache.pop(publication.id, None)
+                self._detach(publication)
+        # Detached and without citations left, terminating only marks them.
+        for publication in publications:
+            publication.terminate()
+        return publications
+
+    def publicationChanging(self, publication, attribute):
+        """Allow an attribute of one of the publications of this DataBase to
+        change; the change is written by publicationChanged.
+
+        Args:
+            publication (Publication): The publication to be changed.
+            attribute (str): The name of the attribute to be changed.
+        """
+
+    def publicationChanged(self, publication, attribute, oldValue):
+        """Write a changed attribute of one of the publications of this
+        DataBase to the file.
+
+        Args:
+            publication (Publication): The changed publication.
+            attribute (str): The name of the changed attribute.
+            oldValue: The value of the attribute before the change.
+        """
+        if not self.hasPublication(publication):
+            return
+        if attribute == 'terminated':
+            self._delete(publication)
+            return
+        with self._transaction() as connection:
+            if attribute == 'authors':
+                connection.execute("DELETE FROM authors WHERE publicationId = ?",
+                                   (publication.id,))
+                self._insertAuthors(connection, publication)
+            elif attribute == 'title':
+                connection.execute(
+                    "DELETE FROM titleTokens WHERE publicationId = ?",
+                    (publication.id,))
+                self._insertTitle(connection, publication)
+            elif attribute == 'year':
+                connection.execute("UPDATE publications SET year = ? "
+                                   "WHERE id = ?", (publication.year,
+                                                    publication.id))
+            elif attribute in ('publisher', 'conference', 'journal'):
+                connection.execute("UPDATE publications SET venue = ? "
+                                   "WHERE id = ?", (getattr(publication,
+                                   attribute), publication.id))
+            elif attribute == 'issueNumber':
+                connection.execute("UPDATE publications SET issueNumber = ? "
+                                   "WHERE id = ?", (publication.issueNumber,
+                                                    publication.id))
+            if attribute == 'title':
+                connection.execute("UPDATE publications SET title = ? "
+                                   "WHERE id = ?", (publication.title,
+                                                    publication.id))
+
+    def citationChanged(self, citing, cited):
+        """Citations are written to the file by the citation sets of the
+        publications themselves, so nothing is left to do here.
+        """
+
+    def findByAuthor(self, authorName):
+        """Find all publications authored by an author.
+
+        Args:
+            authorName (str): The author name to be searched, given as
+            "initialOfFirstName. lastName", e.g., A. Einstein.
+        Returns:
+            (set) all publications authored by an author.
+        Throws:
+            IllegalAuthorsException If the given authorName is not in format
+            "initialOfFirstName.lastName"
+        """
+        if not ReferenceDataBase.isValidAuthor(authorName):
+            raise IllegalAuthorsException(authorName)
+        return set(self.getPublicationsWithIDs(self._column(
+            "SELECT DISTINCT publicationId FROM authors WHERE shortName = ?",
+            (authorName,))))
+
+    def findByTitleWord(self, word):
+        """Returns all publications that have a given word in their title.
+
+        The word is matched like ReferenceDataBase.findByTitleWord does.
+
+        Args:
+            word (str): The word to be searched in title.
+        Returns:
+            (Set): Set of publications that have a given word in their title
+        """
+        tokens = TitleIndex.tokenize(word)
+        if not tokens:
+            return set(publication for publication in self.getAllPublications()
+                       if word.lower() in publication.title.lower())
+
+        if len(tokens) == 1:
+            ids = set()
+        else:
+            prefix = tokens[-1]
+            ids = set(self._column(
+                "SELECT publicationId FROM titleTokens WHERE token >= ? AND "
+                "token < ?", (prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1))))
+            for token in tokens[1:-1]:
+                if not ids:
+                    break
+                ids &= set(self._column("SELECT publicationId FROM "
+                                        "titleTokens WHERE token = ?",
+                                        (token,)))
+        if len(tokens) == 1 or ids:
+            containing = self._findContaining(tokens[0])
+            ids = containing if len(tokens) == 1 else ids & containing
+        candidates = self.getPublicationsWithIDs(ids)
+        if word.lower() == tokens[0]:
+            return set(candidates)
+        return set(publication for publication in candidates
+                   if word.lower() in publication.title.lower())
+
+    def addCitation(self, publicationId1, publicationId2):
+        """Add a citation relationship of two publications, the second being
+        cited by the first.
+
+        Args:
+            publicationID1 (int):The publication id that cites publication2.
+            publicationID2 (int):The publication id that cited by publication1
+        Throws:
+            IllegalArgumentException: The publication with publicationID is
+            not in the DataBase The publication1 can not cites publication2.
+        """
+        publication1 = self.getPublicationWithID(publicationId1)
+        publication2 = self.getPublicationWithID(publicationId2)
+        publication1.addAsCite(publication2)
+
+    def addCitations(self, pairs, skipInvalid=False, rollback=True):
+        """Add the given citation relationships in one transaction, like
+        ReferenceDataBase.addCitations. The valid pairs are inserted in a
+        single SQLite transaction, which is always rolled back if it fails.
+
+        Args:
+            pairs (iterable): The (citing ID, cited ID) pairs to be added.
+            skipInvalid (bool): True to add the valid pairs and report the
+                others, False to add none of them if one is invalid.
+            rollback (bool): Ignored, the transaction is atomic.
+        Returns:
+            (dict) The rejected pairs per reason: 'unknown', 'same' or
+            'newer', see ReferenceDataBase.addCitations.
+        Throws:
+            IllegalPublicationIdException: One of the IDs is not in the
+            DataBase and skipInvalid is False. No citation has been added.
+            IllegalArgumentException: One of the citing publications can not
+            cite its cited publication and skipInvalid is False. No citation
+            has been added.
+        """
+        valid = []
+        rejected = dict()
+        for pair in pairs:
+            publicationId1, publicationId2 = pair
+            try:
+                publication1, publication2 = self.getPublicationsWithIDs(
+                    [publicationId1, publicationId2])
+            except IllegalPublicationIdException:
+                if not skipInvalid:
+                    raise
+                reason = 'unknown'
+            else:
+                reason = ReferenceDataBase.citationRejection(publication1,
+                                                             publication2)
+                if reason is None:
+                    valid.append((publicationId1, publicationId2))
+                    continue
+                if not skipInvalid:
+                    raise IllegalValueException("Publication {} can not \
+                    cite publication {}.".format(publicationId1,
+                                                 publicationId2))
+            rejected.setdefault(reason, []).append(pair)
+        with self._transaction() as connection:
+            connection.executemany("INSERT OR IGNORE INTO citations "
+                                   "VALUES (?, ?)", valid)
+        return rejected
+
+    def authorCitationIndex(self, authorName):
+        """Calculate the citation index of given author, the sum of the
+        weights of the types of the author's publications.
+
+        Args:
+            authorName (str): The author name.
+        Returns:
+            (double) The author citation index.
+        """
+        return self.authorCitationIndices([authorName])[authorName]
+
+    def authorCitationIndices(self, authorNames=None):
+        """Calculate the citation index of each given author with a single
+        query counting the publications of each type per author.
+
+        Args:
+            authorNames (iterable): The author names; None for all authors of
+                this DataBase.
+        Returns:
+            (dict) The citation index of each author.
+        """
+        query = ("SELECT shortName, type, COUNT(DISTINCT id) FROM publications "
+                 "JOIN authors ON authors.publicationId = publications.id ")
+        if authorNames is None:
+            rows = self._rows(
+                query + "GROUP BY shortName, type ORDER BY shortName, type")
+            indices = dict()
+        else:
+            authorNames = list(authorNames)
+            for authorName in authorNames:
+                if not ReferenceDataBase.isValidAuthor(authorName):
+                    raise IllegalAuthorsException(authorName)
+            indices = dict.fromkeys(authorNames, 0)
+            distinctNames = sorted(indices)
+            # Stay below the limit on the number of query parameters.
+            rows = itertools.chain.from_iterable(
+                self._rows(
+                    query + "WHERE shortName IN ({}) GROUP BY shortName, type "
+                    "ORDER BY shortName, type".format(
+                        ", ".join("?" * len(names))), names)
+                for names in (distinctNames[start:start + 500]
+                              for start in range(0, len(distinctNames), 500)))
+        for authorName, type, count in rows:
+            indices[authorName] = indices.get(authorName, 0) + \
+                self._types[type].getWeight() * count
+        return indices
+
+    def findDirIndirCites(self, Id, maxDepth=None, cancelEvent=None):
+        """For the given publication, returns all publications that directly or
+        indirectly cite this publication, using a recursive query.
+
+        Args:
+            id: The publication id to be searched.
+            maxDepth (int): The maximum length of the citation chains to be
+                followed, 1 for direct citations only. None for no limit.
+            cancelEvent (threading.Event): An event that interrupts the query
+                once set.
+        Returns:
+            (set) The set of publication that direct/indirectly cites this
+            publication.
+        Throws:
+            QueryCancelledException: The cancel event was set before the
+            query finished.
+        """
+        return set(self.getPublicationsWithIDs(
+            self._citingIds("SELECT DISTINCT id FROM citing", Id, maxDepth,
+                            cancelEvent)))
+
+    def countDirIndirCites(self, Id, maxDepth=None, cancelEvent=None):
+        """For the given publication, returns the number of publications that
+        directly or indirectly cite this publication.
+
+        Args:
+            id: The publication id to be searched.
+            maxDepth (int): The maximum length of the citation chains to be
+                followed, 1 for direct citations only. None for no limit.
+            cancelEvent (threading.Event): An event that interrupts the query
+                once set.
+        Returns:
+            (int) The number of publications that direct/indirectly cites this
+            publication.
+        Throws:
+            QueryCancelledException: The cancel event was set before the
+            query finished.
+        """
+        return self._citingIds("SELECT COUNT(DISTINCT id) FROM citing", Id,
+                               maxDepth, cancelEvent)[0]
+
+    def _citingIds(self, select, Id, maxDepth, cancelEvent=None):
+        if not self.hasPublicationID(Id):
+            raise IllegalPublicationIdException(Id)
+        if maxDepth is None:
+            query, parameters = _CITING_CLOSURE + select, (Id,)
+        else:
+            query, parameters = _CITING_WITHIN_DEPTH + select, (Id, maxDepth)
+        if cancelEvent is None:
+            return self._column(query, parameters)
+        with self._lock:
+            if cancelEvent.is_set():
+                raise QueryCancelledException()
+            # SQLite aborts the query once the handler returns True.
+            self._connection.set_progress_handler(cancelEvent.is_set,
+                                                  _CANCEL_CHECK_INTERVAL)
+            try:
+                return self._column(query, parameters)
+            except sqlite3.OperationalError:
+                if cancelEvent.is_set():
+                    raise QueryCancelledException()
+                raise
+            finally:
+                self._connection.set_progress_handler(None, 0)
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Run the enclosed statements in one transaction, committed when the
+        outermost enclosing transaction ends and rolled back on an error.
+        """
+        with self._lock:
+            self._transactionDepth += 1
+            try:
+                yield self._connection
+            except BaseException:
+                self._transactionDepth -= 1
+                if self._transactionDepth == 0:
+                    self._connection.rollback()
+                raise
+            self._transactionDepth -= 1
+            if self._transactionDepth == 0:
+                self._connection.commit()
+
+    def _findContaining(self, fragment):
+        """Return the IDs of the publications having a title token that
+        contains the given fragment, found in the vocabulary of the titles,
+        through its trigrams if it has at least three characters, and joined
+        back through the indexed title tokens.
+        """
+        if self._hasTrigrams and len(fragment) >= 3:
+            return set(self._column(
+                "SELECT publicationId FROM titleTrigrams "
+                "CROSS JOIN titleVocabulary ON titleVocabulary.id = "
+                "titleTrigrams.rowid "
+                "CROSS JOIN titleTokens ON titleTokens.token = "
+                "titleVocabulary.token WHERE titleTrigrams MATCH ?",
+                ('"' + fragment + '"',)))
+        return set(self._column(
+            "SELECT publicationId FROM titleVocabulary "
+            "CROSS JOIN titleTokens ON titleTokens.token = "
+            "titleVocabulary.token "
+            "WHERE instr(titleVocabulary.token, ?)", (fragment,)))
+
+    def _column(self, query, parameters=()):
+        return [row[0] for row in self._rows(query, parameters)]
+
+    def _rows(self, query, parameters=()):
+        with self._lock:
+            return self._connection.execute(query, parameters).fetchall()
+
+    def _reserveIds(self, count):
+        firstId = self._connection.execute(
+            "SELECT value FROM meta WHERE key = 'nextId'").fetchone()[0]
+        self._connection.execute("UPDATE meta SET value = ? "
+                                 "WHERE key = 'nextId'", (firstId + count,))
+        return firstId
+
+    def _insert(self, connection, publication):
+        venue = getattr(publication, 'publisher',
+                        getattr(publication, 'conference',
+                                getattr(publication, 'journal', None)))
+        connection.execute(
+            "INSERT INTO publications VALUES (?, ?, ?, ?, ?, ?)",
+            (publication.id, type(publication).__name__, publication.title,
+             publication.year, venue,
+             getattr(publication, 'issueNumber', None)))
+        self._insertAuthors(connection, publication)
+        self._insertTitle(connection, publication)
+
+    def _insertAuthors(self, connection, publication):
+        connection.executemany(
+            "INSERT INTO authors VALUES (?, ?, ?, ?)",
+            [(publication.id, position, author,
+              publication.getAuthorName(author))
+             for position, author in enumerate(publication.authors)])
+
+    def _insertTitle(self, connection, publication):
+        connection.executemany(
+            "INSERT OR IGNORE INTO titleTokens VALUES (?, ?)",
+            [(token, publication.id)
+             for token in set(TitleIndex.tokenize(publication.title))])
+
+    def _load(self, ids):
+        placeholders = ",".join("?" * len(ids))
+        authors = dict()
+        for publicationId, name in self._connection.execute(
+                "SELECT publicationId, name FROM authors WHERE publicationId "
+                "IN ({}) ORDER BY publicationId, position".format(placeholders),
+                ids):
+            authors.setdefault(publicationId, []).append(name)
+        for id, type, title, year, venue, issueNumber in \
+                self._connection.execute(
+                    "SELECT * FROM publications WHERE id IN ({})".format(
+                        placeholders), ids):
+            publication = self._create(type, title, authors.get(id, []), year,
+                                       venue, issueNumber)
+            publication.id = id
+            self._attach(publication)
+
+    def _create(self, type, title, authors, year, venue, issueNumber):
+        if type == 'JournalArticle':
+            return JournalArticle(title, authors, venue, issueNumber, year)
+        if type == 'Publication':
+            return Publication(title, authors, year)
+        return self._types[type](title, authors, year, venue)
+
+    def _attach(self, publication):
+        publication.database = self
+        publication.cites = CitationSet(self, self._graph, publication.id, True)
+        publication.citedBy = CitationSet(self, self._graph, publication.id,
+                                          False)
+        self._live[publication.id] = publication
+        self._touch(publication)
+
+    def _delete(self, publication):
+        """Delete the rows of the given terminated publication and its
+        citations in one transaction, and detach it from this DataBase.
+        """
+        with self._transaction() as connection:
+            for table, column in (("citations", "citingId"),
+                                  ("citations", "citedId"),
+                                  ("publications", "id"),
+                                  ("authors", "publicationId"),
+                                  ("titleTokens", "publicationId")):
+                connection.execute("DELETE FROM {} WHERE {} = ?".format(
+                    table, column), (publication.id,))
+            self._cache.pop(publication.id, None)
+            self._detach(publication)
+
+    def _detach(self, publication):
+        publication.database = None
+        publication.cites = publication.citedBy = Publication._noCitations
+        self._live.pop(publication.id, None)
+
+    def _touch(self, publication):
+        self._cache.pop(publication.id, None)
+        self._cache[publication.id] = publication
+        if len(self._cache) > self._maxCachedPublications:
+            self._cache.popitem(last=False)
+
+
+class SQLiteCitationGraph(object):
+    """Citation graph stored in the citations table of an
+    SQLiteReferenceDataBase, with the methods CitationSet expects.
+    """
+
+    def __init__(self, database):
+        """Initialize this new SQLiteCitationGraph.
+
+        Args:
+            database (SQLiteReferenceDataBase): The database owning the table.
+        """
+        self._database = database
+
+    def addEdge(self, citingId, citedId):
+        """Add the citation from the first to the second publication.
+        """
+        with self._database._transaction() as connection:
+            connection.execute("INSERT OR IGNORE INTO citations VALUES (?, ?)",
+                               (citingId, citedId))
+
+    def removeEdge(self, citingId, citedId):
+        """Remove the citation from the first to the second publication.
+        """
+        with self._database._transaction() as connection:
+            connection.execute("DELETE FROM citations WHERE citingId = ? AND "
+                               "citedId = ?", (citingId, citedId))
+
+    def hasEdge(self, citingId, citedId):
+        """Check whether the first publication cites the second one.
+        """
+        return bool(self._database._rows(
+            "SELECT 1 FROM citations WHERE citingId = ? AND citedId = ?",
+            (citingId, citedId)))
+
+    def successors(self, id):
+        """Return the IDs of the publications cited by the given publication.
+        """
+        return self._database._column(
+            "SELECT citedId FROM citations WHERE citingId = ?", (id,))
+
+    def predecessors(self, id):
+        """Return the IDs of the publications citing the given publication.
+        """
+        return self._database._column(
+            "SELECT citingId FROM citations WHERE citedId = ?", (id,))
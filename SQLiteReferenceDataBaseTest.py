@@ -0,0 +1,204 @@
+"""Unit Test for SQLiteReferenceDataBase
+
+..:: moduleauthors:: Wang Bo <wangbomicro@gmail.com>
+"""
+from Book import Book
+from ConferencePaper import ConferencePaper
+from Exceptions import IllegalValueException, \
+    IllegalPublicationIdException, QueryCancelledException
+from JournalArticle import JournalArticle
+from SQLiteReferenceDataBase import SQLiteReferenceDataBase
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+class LateEvent(threading.Event):
+    """An event that is only reported set from its second check on."""
+
+    def __init__(self):
+        threading.Event.__init__(self)
+        self.checks = 0
+
+    def is_set(self):
+        self.checks += 1
+        return self.checks > 1
+
+class SQLiteReferenceDataBaseTest(unittest.TestCase):
+    """Unit Test for SQLiteReferenceDataBase"""
+
+    _authors = ["Wang, Bo", "De Coster, Jeroen", "Wevers, Martine"]
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "references.db")
+        self.dataBase = SQLiteReferenceDataBase(self.path,
+                                                maxCachedPublications=2)
+        self.article = JournalArticle("Gas leak rate study of MEMS",
+                                      self._authors, "journal of MEMS", 123,
+                                      1990)
+        self.book = Book("Packaging of MEMS", ["Wang, Bo", "Witvrouw, Ann"],
+                         2012, "Springer")
+        self.paper = ConferencePaper("Thin film getters", ["Mao, Shengping"],
+                                     2014, "Transducers")
+        self.dataBase.addPublications([self.article, self.book, self.paper])
+
+    def tearDown(self):
+        self.dataBase.close()
+        shutil.rmtree(self.directory)
+
+    def reopen(self):
+        self.dataBase.close()
+        self.dataBase = SQLiteReferenceDataBase(self.path)
+
+    def testGetPublicationWithID(self):
+        self.assertTrue(self.article is
+                        self.dataBase.getPublicationWithID(self.article.id))
+        self.assertRaises(IllegalPublicationIdException,
+                          self.dataBase.getPublicationWithID, 42)
+        self.assertRaises(IllegalValueException,
+                          self.dataBase.addAsPublication, self.book)
+
+    def testPersistence(self):
+        articleId, bookId = self.article.id, self.book.id
+        self.dataBase.addCitation(bookId, articleId)
+        self.book.title = "Wafer level packaging"
+        self.reopen()
+        article = self.dataBase.getPublicationWithID(articleId)
+        book = self.dataBase.getPublicationWithID(bookId)
+        self.assertEqual(JournalArticle, type(article))
+        self.assertEqual(self._authors, article.authors)
+        self.assertEqual(123, article.issueNumber)
+        self.assertEqual("Springer", book.publisher)
+        self.assertEqual(set([book]), article.getAllCitedBy())
+        self.assertEqual(set([book]), self.dataBase.findByTitleWord("wafer"))
+        self.assertEqual(3, self.dataBase.getPublicationCount())
+
+    def testFind(self):
+        self.assertEqual(set([self.article, self.book]),
+                         self.dataBase.findByAuthor("B. Wang"))
+        self.assertEqual(set([self.article, self.book]),
+                         self.dataBase.findByTitleWord("mem"))
+        self.assertEqual(set([self.article]),
+                         self.dataBase.findByTitleWord("leak rate"))
+        self.assertEqual(set([self.article, self.book]),
+                         self.dataBase.findByTitleWord("EMS"))
+        self.assertEqual(set([self.book]),
+                         self.dataBase.findByTitleWord("aging of ME"))
+        self.assertEqual(2.0, self.dataBase.authorCitationIndex("B. Wang"))
+
+    def testFindByTitleWordInVocabulary(self):
+        self.assertEqual(set([self.paper]),
+                         self.dataBase.findByTitleWord("etter"))
+        self.assertEqual(set([self.paper]),
+                         self.dataBase.findByTitleWord("tt"))
+        self.paper.title = "Thin film sorbents"
+        self.assertEqual(set(), self.dataBase.findByTitleWord("etter"))
+        self.assertEqual(set(), self.dataBase.findByTitleWord("tt"))
+        self.assertEqual(set([self.paper]),
+                         self.dataBase.findByTitleWord("rben"))
+        self.dataBase.removePublication(self.paper)
+        self.assertEqual(set(), self.dataBase.findByTitleWord("rben"))
+        self.assertEqual(0, self.dataBase._connection.execute(
+            "SELECT COUNT(*) FROM titleVocabulary WHERE token IN "
+            "('thin', 'film', 'sorbents', 'getters')").fetchone()[0])
+
+    def testFindByTitleWordWithoutVocabulary(self):
+        with self.dataBase._connection as connection:
+            connection.execute("DELETE FROM titleVocabulary")
+        self.reopen()
+        self.assertEqual(2, len(self.dataBase.findByTitleWord("EMS")))
+        self.assertEqual(1, len(self.dataBase.findByTitleWord("ck")))
+        # Without the FTS5 trigram tokenizer the vocabulary is scanned.
+        self.dataBase._hasTrigrams = False
+        self.assertEqual(2, len(self.dataBase.findByTitleWord("EMS")))
+
+    def testAuthorCitationIndices(self):
+        indices = self.dataBase.authorCitationIndices()
+        self.assertEqual({"B. Wang": 2.0, "J. De Coster": 1.0,
+                          "M. Wevers": 1.0, "A. Witvrouw": 1.0, "S. Mao": 1.0},
+                         indices)
+        self.assertEqual({"B. Wang": 2.0, "A. Einstein": 0},
+                         self.dataBase.authorCitationIndices(
+                             ["B. Wang", "A. Einstein", "B. Wang"]))
+
+    def testFindDirIndirCites(self):
+        self.dataBase.addCitations([(self.book.id, self.article.id),
+                                    (self.paper.id, self.book.id)])
+        self.assertEqual(set([self.book, self.paper]),
+                         self.dataBase.findDirIndirCites(self.article.id))
+        self.assertEqual(set([self.book]),
+                         self.dataBase.findDirIndirCites(self.article.id, 1))
+        self.assertEqual(2, self.dataBase.countDirIndirCites(self.article.id))
+        self.assertRaises(IllegalValueException, self.dataBase.addCitations,
+                          [(self.article.id, self.paper.id)])
+        self.assertEqual({'newer': [(self.article.id, self.paper.id)],
+                          'unknown': [(self.book.id, 42)]},
+                         self.dataBase.addCitations(
+                             [(self.article.id, self.paper.id),
+                              (self.book.id, 42)], skipInvalid=True))
+
+    def testCancelFindDirIndirCites(self):
+        publications = [ConferencePaper("Getters {}".format(number),
+                                        ["Mao, Shengping"], 2015, "MEMS")
+                        for number in range(300)]
+        self.dataBase.addPublications(publications)
+        self.dataBase.addCitations(
+            [(publication.id, cited.id) for publication, cited in
+             zip(publications, [self.paper] + publications)])
+        cancelEvent = threading.Event()
+        cancelEvent.set()
+        self.assertRaises(QueryCancelledException,
+                          self.dataBase.findDirIndirCites, self.paper.id,
+                          cancelEvent=cancelEvent)
+        # Set while the query runs, so the progress handler interrupts it.
+        cancelEvent = LateEvent()
+        self.assertRaises(QueryCancelledException,
+                          self.dataBase.countDirIndirCites, self.paper.id,
+                          cancelEvent=cancelEvent)
+        self.assertTrue(cancelEvent.checks > 1)
+        self.assertEqual(300, self.dataBase.countDirIndirCites(
+            self.paper.id, cancelEvent=threading.Event()))
+
+    def testRemovePublications(self):
+        self.dataBase.addCitations([(self.book.id, self.article.id),
+                                    (self.paper.id, self.book.id)])
+        self.assertEqual([self.book, self.paper],
+                         self.dataBase.removePublications([self.book.id,
+                                                           self.paper.id]))
+        self.assertTrue(self.paper.isTerminated())
+        self.assertEqual(set(), self.article.getAllCitedBy())
+        self.assertEqual(set([self.article]),
+                         self.dataBase.findByAuthor("B. Wang"))
+        self.assertRaises(IllegalPublicationIdException,
+                          self.dataBase.getPublicationWithID, self.book.id)
+
+    def testRemovePublication(self):
+        self.dataBase.addCitation(self.book.id, self.article.id)
+        self.dataBase.removePublication(self.book)
+        self.assertTrue(self.book.isTerminated())
+        self.assertEqual(set(), self.article.getAllCitedBy())
+        self.assertEqual(set([self.article]),
+                         self.dataBase.findByAuthor("B. Wang"))
+        self.assertEqual(2, len(list(self.dataBase.getAllPublications())))
+
+    def testTerminatePublication(self):
+        self.dataBase.addCitations([(self.book.id, self.article.id),
+                                    (self.paper.id, self.book.id)])
+        self.book.terminate()
+        self.assertFalse(self.dataBase.hasPublication(self.book))
+        self.assertEqual(set(), self.article.getAllCitedBy())
+        self.assertEqual(set([self.article]),
+                         self.dataBase.findByAuthor("B. Wang"))
+        self.reopen()
+        self.assertRaises(IllegalPublicationIdException,
+                          self.dataBase.getPublicationWithID, self.book.id)
+        self.assertEqual(2, len(list(self.dataBase.getAllPublications())))
+        self.assertEqual(set(),
+                         self.dataBase.findDirIndirCites(self.article.id))
+        paper = self.dataBase.getPublicationWithID(self.paper.id)
+        self.assertEqual(set(), paper.getAllCites())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,633 @@
+"""A read-only reference database served from a memory-mapped binary
+snapshot file.
+
+..:: moduleauthor: Wang Bo <wangbomicro@gmail.com>
+
+The snapshot file starts with a fixed header followed by 8-byte aligned
+sections, all in native byte order:
+
+- records: one fixed-width record per publication, sorted by ID;
+- stringOffsets, stringData: the string heap, holding every title, author
+  name, venue and index key once, as UTF-8;
+- authorLists: the string indices of the authors of each record;
+- forwardPointers, forwardRows, reversePointers, reverseRows: the citations
+  as CSR arrays of record indices, cited and citing respectively;
+- authorKeys, authorPointers, authorRows: the "A. Einstein" names, sorted,
+  with the records of each;
+- tokenKeys, tokenPointers, tokenRows: the title tokens, sorted, with the
+  records of each.
+
+Opening a snapshot only maps the file and reads the header. Publications are
+materialized when they are accessed, and processes opening the same file
+share its pages through the page cache.
+"""
+from Book import Book
+from ConferencePaper import ConferencePaper
+from CSRCitationGraph import CitationSet
+from Exceptions import IllegalAuthorsException, \
+    IllegalPublicationIdException, IllegalStateException, \
+    IllegalValueException
+from JournalArticle import JournalArticle
+from Publication import Publication
+from TitleIndex import TitleIndex
+from array import array
+from collections import OrderedDict
+import bisect
+import contextlib
+import mmap
+import struct
+import sys
+import weakref
+
+_MAGIC = b'RDBSNAP\x00'
+_VERSION = 1
+_BYTE_ORDERS = {'little': 1, 'big': 2}
+_SECTIONS = ('records', 'stringOffsets', 'stringData', 'authorLists',
+             'forwardPointers', 'forwardRows', 'reversePointers',
+             'reverseRows', 'authorKeys', 'authorPointers', 'authorRows',
+             'tokenKeys', 'tokenPointers', 'tokenRows')
+_HEADER = struct.Struct('=8sIIQQQ' + 'QQ' * len(_SECTIONS))
+# id, year, issueNumber, title, venue, first author, author count, type
+_RECORD = struct.Struct('=qiiIIIIB7x')
+_NO_STRING = 0xFFFFFFFF
+_MIN_INT32, _MAX_INT32 = -2 ** 31, 2 ** 31 - 1
+_TYPES = (Publication, Book, ConferencePaper, JournalArticle)
+_VENUES = ('publisher', 'conference', 'journal')
+
+
+class SnapshotReferenceDataBase(object):
+    """Reference database answering the queries of ReferenceDataBase from a
+    memory-mapped snapshot file written by ReferenceDataBase.saveSnapshot.
+
+    The snapshot is read-only: every operation that would change it raises
+    an IllegalStateException.
+    """
+
+    def __init__(self, path, maxCachedPublications=10000):
+        """Initialize this new SnapshotReferenceDataBase on the given file.
+
+        Args:
+            path (str): The path of the snapshot file.
+            maxCachedPublications (int): The maximum number of materialized
+                publications kept alive by the cache.
+        Throws:
+            IllegalValueException: The file is not a snapshot of a supported
+            version and byte order.
+        """
+        with open(path, 'rb') as snapshotFile:
+            self._map = mmap.mmap(snapshotFile.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        header = _HEADER.unpack_from(self._map, 0)
+        magic, version, byteOrder, recordCount, edgeCount, nextId = header[:6]
+        if magic != _MAGIC or version != _VERSION or \
+                byteOrder != _BYTE_ORDERS[sys.byteorder]:
+            self._map.close()
+            raise IllegalValueException("{} is not a readable snapshot."
+                                        .format(path))
+        self._recordCount = recordCount
+        self._edgeCount = edgeCount
+        self._nextId = nextId
+        self._view = memoryview(self._map)
+        self._sections = dict()
+        for position, name in enumerate(_SECTIONS):
+            offset, length = header[6 + 2 * position:8 + 2 * position]
+            self._sections[name] = self._view[offset:offset + length]
+        self._arrays = []
+        self._stringOffsets = self._cast('stringOffsets', 'Q')
+        self._authorLists = self._cast('authorLists', 'I')
+        self._forwardPointers = self._cast('forwardPointers', 'Q')
+        self._forwardRows = self._cast('forwardRows', 'I')
+        self._reversePointers = self._cast('reversePointers', 'Q')
+        self._reverseRows = self._cast('reverseRows', 'I')
+        self._authorKeys = self._cast('authorKeys', 'I')
+        self._authorPointers = self._cast('authorPointers', 'Q')
+        self._authorRows = self._cast('authorRows', 'I')
+        self._tokenKeys = self._cast('tokenKeys', 'I')
+        self._tokenPointers = self._cast('tokenPointers', 'Q')
+        self._tokenRows = self._cast('tokenRows', 'I')
+        # The title vocabulary is decoded once; the tokens by substring are
+        # only built by the first title query needing them.
+        self._tokens = [self._string(key) for key in self._tokenKeys]
+        self._tokenGrams = None
+        self._cache = OrderedDict()
+        self._maxCachedPublications = maxCachedPublications
+        self._live = weakref.WeakValueDictionary()
+        self._graph = SnapshotCitationGraph(self)
+
+    @classmethod
+    def write(cls, publications, path, nextId):
+        """Write a snapshot of the given publications and the citations
+        between them to the given file.
+
+        Args:
+            publications (iterable): The publications, all with an ID.
+            path (str): The path of the snapshot file to be written.
+            nextId (int): The next ID the database would hand out.
+        Throws:
+            IllegalValueException: The issue number of a publication does
+            not fit in the 32-bit field of its record.
+        """
+        publications = sorted(publications, key=lambda publication:
+                              publication.id)
+        rows = dict((publication.id, row)
+                    for row, publication in enumerate(publications))
+        strings = _StringHeap()
+        records = bytearray(_RECORD.size * len(publications))
+        authorLists = array('I')
+        forward = _RowBuilder()
+        reverse = _RowBuilder()
+        authors = dict()
+        tokens = dict()
+        for row, publication in enumerate(publications):
+            venue = None
+            for attribute in _VENUES:
+                if hasattr(publication, attribute):
+                    venue = getattr(publication, attribute)
+            issueNumber = getattr(publication, 'issueNumber', 0)
+            if not _MIN_INT32 <= issueNumber <= _MAX_INT32:
+                raise IllegalValueException("The issue number {} of "
+                                            "publication {} can not be "
+                                            "stored in a snapshot.".format(
+                                                issueNumber, publication.id))
+            _RECORD.pack_into(
+                records, row * _RECORD.size, publication.id, publication.year,
+                issueNumber,
+                strings.add(publication.title),
+                _NO_STRING if venue is None else strings.add(venue),
+                len(authorLists), len(publication.authors),
+                _TYPES.index(type(publication)))
+            authorLists.extend(strings.add(author)
+                               for author in publication.authors)
+            forward.addRow(rows[cited.id] for cited in publication.getAllCites()
+                           if cited.database is publication.database)
+            reverse.addRow(rows[citing.id] for citing in publication.getAllCitedBy()
+                           if citing.database is publication.database)
+            for name in set(publication.getAuthorsName()):
+                authors.setdefault(name, []).append(row)
+            for token in set(TitleIndex.tokenize(publication.title)):
+                tokens.setdefault(token, []).append(row)
+
+        authorIndex = _RowBuilder.fromDictionary(authors, strings)
+        tokenIndex = _RowBuilder.fromDictionary(tokens, strings)
+        stringOffsets, stringData = strings.getArrays()
+        sections = (records, stringOffsets, stringData, authorLists,
+                    forward.pointers, forward.rows,
+                    reverse.pointers, reverse.rows) + authorIndex + tokenIndex
+
+        with open(path, 'wb') as snapshotFile:
+            snapshotFile.write(b'\x00' * _HEADER.size)
+            locations = []
+            for section in sections:
+                data = section if isinstance(section, (bytes, bytearray)) \
+                    else section.tobytes()
+                snapshotFile.write(b'\x00' * (-snapshotFile.tell() % 8))
+                locations.extend((snapshotFile.tell(), len(data)))
+                snapshotFile.write(data)
+            snapshotFile.seek(0)
+            snapshotFile.write(_HEADER.pack(
+                _MAGIC, _VERSION, _BYTE_ORDERS[sys.byteorder],
+                len(publications), len(forward.rows), nextId, *locations))
+
+    def close(self):
+        """Release the mapping of the snapshot file. Publications that are
+        not materialized yet can no longer be accessed.
+        """
+        for view in self._arrays + list(self._sections.values()) + \
+                [self._view]:
+            view.release()
+        self._map.close()
+
+    def writeLocked(self):
+        """A snapshot is read-only, so its changes need no lock.
+        """
+        return contextlib.nullcontext()
+
+    def isTerminated(self):
+        """A snapshot is never terminated.
+        """
+        return False
+
+    def getNextId(self):
+        """Return the next ID of the database the snapshot was taken of.
+        """
+        return self._nextId
+
+    def getPublicationCount(self):
+        """Return the number of publications in the snapshot.
+        """
+        return self._recordCount
+
+    def getCitationCount(self):
+        """Return the number of citations in the snapshot.
+        """
+        return self._edgeCount
+
+    def hasPublication(self, publication):
+        """Check whether the given publication was materialized from this
+        snapshot.
+
+        Args:
+            publication (publication): The publication to check.
+        """
+        return publication.database is self
+
+    def hasPublicationID(self, id):
+        """Check whether publication with the given ID in the snapshot.
+
+        Args:
+            id (int): The id to be checked.
+        """
+        return self._findRow(id) is not None
+
+    def getPublicationWithID(self, id):
+        """Get the publication in the snapshot by the given ID.
+
+        Args:
+            id (int): The publication ID.
+        Returns:
+            (Publication) The publication with the given ID.
+        throws:
+            IllegalPublicationIdException: If the given ID do not exist in
+            the snapshot.
+        """
+        row = self._findRow(id)
+        if row is None:
+            raise IllegalPublicationIdException(id)
+        return self._materialize(row)
+
+    def getPublicationsWithIDs(self, ids):
+        """Get the publications in the snapshot with the given IDs.
+
+        Args:
+            ids (iterable): The publication IDs.
+        Returns:
+            (list) The publications, in the order of the given IDs.
+        """
+        return [self.getPublicationWithID(id) for id in ids]
+
+    def getAllPublications(self):
+        """Return a generator over all publications of the snapshot, in the
+        order of their IDs.
+        """
+        for row in range(self._recordCount):
+            yield self._materialize(row)
+
+    def findByAuthor(self, authorName):
+        """Find all publications authored by an author.
+
+        Args:
+            authorName (str): The author name to be searched, given as
+            "initialOfFirstName. lastName", e.g., A. Einstein.
+        Returns:
+            (set) all publications authored by an author.
+        Throws:
+            IllegalAuthorsException If the given authorName is not in format
+            "initialOfFirstName.lastName"
+        """
+        from ReferenceDataBase import ReferenceDataBase
+        if not ReferenceDataBase.isValidAuthor(authorName):
+            raise IllegalAuthorsException(authorName)
+        return set(self._materialize(row) for row in self._authorRowsOf(
+            authorName))
+
+    def findByTitleWord(self, word):
+        """Returns all publications that have a given word in their title.
+
+        The word is matched like ReferenceDataBase.findByTitleWord does.
+
+        Args:
+            word (str): The word to be searched in title.
+        Returns:
+            (Set): Set of publications that have a given word in their title
+        """
+        tokens = TitleIndex.tokenize(word)
+        if not tokens:
+            return set(publication for publication in self.getAllPublications()
+                       if word.lower() in publication.title.lower())
+        if len(tokens) == 1:
+            rows = set()
+        else:
+            rows = self._tokenRowsOf(self._tokensWithPrefix(tokens[-1]))
+            for token in tokens[1:-1]:
+                if not rows:
+                    break
+                rows &= self._tokenRowsOf([token])
+        if len(tokens) == 1 or rows:
+            if self._tokenGrams is None:
+                grams = dict()
+                for token in self._tokens:
+                    for gram in TitleIndex.grams(token):
+                        grams.setdefault(gram, set()).add(token)
+                self._tokenGrams = grams
+            containing = self._tokenRowsOf(TitleIndex.matchGrams(
+                self._tokenGrams, tokens[0]))
+            rows = containing if len(tokens) == 1 else rows & containing
+        candidates = [self._materialize(row) for row in rows]
+        if word.lower() == tokens[0]:
+            return set(candidates)
+        return set(publication for publication in candidates
+                   if word.lower() in publication.title.lower())
+
+    def authorCitationIndex(self, authorName):
+        """Calculate the citation index of given author, the sum of the
+        weights of the types of the author's publications.
+
+        Args:
+            authorName (str): The author name.
+        Returns:
+            (double) The author citation index.
+        """
+        from ReferenceDataBase import ReferenceDataBase
+        if not ReferenceDataBase.isValidAuthor(authorName):
+            raise IllegalAuthorsException(authorName)
+        return sum(_TYPES[self._readRecord(row)[7]].getWeight()
+                   for row in self._authorRowsOf(authorName))
+
+    def findDirIndirCites(self, Id, maxDepth=None):
+        """For the given publication, returns all publications that directly or
+        indirectly cite this publication.
+
+        Args:
+            id: The publication id to be searched.
+            maxDepth (int): The maximum length of the citation chains to be
+                followed, 1 for direct citations only. None for no limit.
+        Returns:
+            (set) The set of publication that direct/indirectly cites this
+            publication.
+        """
+        return set(self._materialize(row)
+                   for row in self._citingRows(Id, maxDepth))
+
+    def countDirIndirCites(self, Id, maxDepth=None):
+        """For the given publication, returns the number of publications that
+        directly or indirectly cite this publication.
+
+        Args:
+            id: The publication id to be searched.
+            maxDepth (int): The maximum length of the citation chains to be
+                followed, 1 for direct citations only. None for no limit.
+        Returns:
+            (int) The number of publications that direct/indirectly cites this
+            publication.
+        """
+        return len(self._citingRows(Id, maxDepth))
+
+    def addAsPublication(self, publication):
+        """A snapshot is read-only.
+        """
+        self._readOnly()
+
+    def addPublications(self, publications):
+        """A snapshot is read-only.
+        """
+        self._readOnly()
+
+    def removePublication(self, publication):
+        """A snapshot is read-only.
+        """
+        self._readOnly()
+
+    def removePublications(self, ids, compact=True):
+        """A snapshot is read-only.
+        """
+        self._readOnly()
+
+    def addCitation(self, publicationId1, publicationId2):
+        """A snapshot is read-only.
+        """
+        self._readOnly()
+
+    def addCitations(self, pairs, skipInvalid=False, rollback=True):
+        """A snapshot is read-only.
+        """
+        self._readOnly()
+
+    def publicationChanging(self, publication, attribute):
+        """A snapshot is read-only, so changing one of its publications is
+        refused before the attribute changes.
+        """
+        self._readOnly()
+
+    def publicationChanged(self, publication, attribute, oldValue):
+        """A snapshot is read-only, so changing one of its publications is
+        reported as an error; the change is not written to the snapshot.
+        """
+        self._readOnly()
+
+    def citationChanged(self, citing, cited):
+        """A snapshot is read-only.
+        """
+        self._readOnly()
+
+    def _cast(self, name, code):
+        view = self._sections[name].cast(code)
+        self._arrays.append(view)
+        return view
+
+    def _readOnly(self):
+        raise IllegalStateException("The snapshot is read-only.")
+
+    def _readRecord(self, row):
+        return _RECORD.unpack_from(self._sections['records'],
+                                   row * _RECORD.size)
+
+    def _findRow(self, id):
+        low, high = 0, self._recordCount
+        while low < high:
+            middle = (low + high) // 2
+            if self._readRecord(middle)[0] < id:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._recordCount and self._readRecord(low)[0] == id:
+            return low
+        return None
+
+    def _string(self, index):
+        return bytes(self._sections['stringData'][
+            self._stringOffsets[index]:self._stringOffsets[index + 1]]
+        ).decode('utf-8')
+
+    def _tokensWithPrefix(self, prefix):
+        start = bisect.bisect_left(self._tokens, prefix)
+        end = start
+        while end < len(self._tokens) and \
+                self._tokens[end].startswith(prefix):
+            end += 1
+        return self._tokens[start:end]
+
+    def _tokenRowsOf(self, tokens):
+        """Return the rows of the publications whose title has one of the
+        given tokens."""
+        rows = set()
+        for token in tokens:
+            position = bisect.bisect_left(self._tokens, token)
+            if position < len(self._tokens) and \
+                    self._tokens[position] == token:
+                rows.update(self._postings(self._tokenPointers,
+                                           self._tokenRows, position))
+        return rows
+
+    def _keyRange(self, keys, key, prefix):
+        """Return the range of positions in the given sorted keys that equal
+        the given key, or start with it if prefix is True.
+        """
+        low, high = 0, len(keys)
+        while low < high:
+            middle = (low + high) // 2
+            if self._string(keys[middle]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        end = low
+        while end < len(keys) and (
+                self._string(keys[end]).startswith(key) if prefix
+                else self._string(keys[end]) == key):
+            end += 1
+        return low, end
+
+    @staticmethod
+    def _postings(pointers, rows, position):
+        return rows[pointers[position]:pointers[position + 1]].tolist()
+
+    def _authorRowsOf(self, authorName):
+        start, end = self._keyRange(self._authorKeys, authorName, False)
+        if start == end:
+            return []
+        return self._postings(self._authorPointers, self._authorRows, start)
+
+    def _citingRows(self, Id, maxDepth):
+        row = self._findRow(Id)
+        if row is None:
+            raise IllegalPublicationIdException(Id)
+        reached = set()
+        frontier = [row]
+        depth = 0
+        while frontier and (maxDepth is None or depth < maxDepth):
+            nextFrontier = []
+            for current in frontier:
+                for citing in self._postings(self._reversePointers,
+                                             self._reverseRows, current):
+                    if citing not in reached:
+                        reached.add(citing)
+                        nextFrontier.append(citing)
+            frontier = nextFrontier
+            depth += 1
+        return reached
+
+    def _materialize(self, row):
+        id, year, issueNumber, title, venue, firstAuthor, authorCount, \
+            typeCode = self._readRecord(row)
+        publication = self._live.get(id)
+        if publication is None:
+            title = self._string(title)
+            authors = [self._string(self._authorLists[position]) for position
+                       in range(firstAuthor, firstAuthor + authorCount)]
+            venue = None if venue == _NO_STRING else self._string(venue)
+            cls = _TYPES[typeCode]
+            if cls is JournalArticle:
+                publication = cls(title, authors, venue, issueNumber, year)
+            elif cls is Publication:
+                publication = cls(title, authors, year)
+            else:
+                publication = cls(title, authors, year, venue)
+            publication.id = id
+            publication.database = self
+            publication.cites = CitationSet(self, self._graph, id, True)
+            publication.citedBy = CitationSet(self, self._graph, id, False)
+            self._live[id] = publication
+        self._cache.pop(id, None)
+        self._cache[id] = publication
+        if len(self._cache) > self._maxCachedPublications:
+            self._cache.popitem(last=False)
+        return publication
+
+
+class SnapshotCitationGraph(object):
+    """Read-only citation graph over the CSR sections of a snapshot, with the
+    methods CitationSet expects.
+    """
+
+    def __init__(self, snapshot):
+        """Initialize this new SnapshotCitationGraph.
+
+        Args:
+            snapshot (SnapshotReferenceDataBase): The snapshot it reads from.
+        """
+        self._snapshot = snapshot
+
+    def _ids(self, pointers, rows, id):
+        snapshot = self._snapshot
+        return [snapshot._readRecord(row)[0] for row in
+                snapshot._postings(pointers, rows, snapshot._findRow(id))]
+
+    def successors(self, id):
+        """Return the IDs of the publications cited by the given publication.
+        """
+        return self._ids(self._snapshot._forwardPointers,
+                         self._snapshot._forwardRows, id)
+
+    def predecessors(self, id):
+        """Return the IDs of the publications citing the given publication.
+        """
+        return self._ids(self._snapshot._reversePointers,
+                         self._snapshot._reverseRows, id)
+
+    def hasEdge(self, citingId, citedId):
+        """Check whether the first publication cites the second one.
+        """
+        return citedId in self.successors(citingId)
+
+    def addEdge(self, citingId, citedId):
+        """A snapshot is read-only.
+        """
+        self._snapshot._readOnly()
+
+    removeEdge = addEdge
+
+
+class _StringHeap(object):
+    """The string heap of a snapshot being written."""
+
+    def __init__(self):
+        self._indices = dict()
+        self._strings = []
+
+    def add(self, value):
+        index = self._indices.get(value)
+        if index is None:
+            index = self._indices[value] = len(self._strings)
+            self._strings.append(value)
+        return index
+
+    def getArrays(self):
+        offsets = array('Q', [0])
+        data = bytearray()
+        for value in self._strings:
+            data.extend(value.encode('utf-8'))
+            offsets.append(len(data))
+        return offsets, data
+
+
+class _RowBuilder(object):
+    """CSR pointers and rows of a snapshot being written."""
+
+    def __init__(self):
+        self.pointers = array('Q', [0])
+        self.rows = array('I')
+
+    def addRow(self, values):
+        self.rows.extend(sorted(values))
+        self.pointers.append(len(self.rows))
+
+    @classmethod
+    def fromDictionary(cls, postings, strings):
+        """Return the sorted keys, as string indices, and the CSR pointers
+        and rows of the given postings.
+        """
+        keys = array('I')
+        builder = cls()
+        for key in sorted(postings):
+            keys.append(strings.add(key))
+            builder.addRow(postings[key])
+        return keys, builder.pointers, builder.rows
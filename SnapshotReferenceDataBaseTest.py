@@ -0,0 +1,121 @@
+"""Unit Test for SnapshotReferenceDataBase
+
+..:: moduleauthors:: Wang Bo <wangbomicro@gmail.com>
+"""
+from Book import Book
+from ConferencePaper import ConferencePaper
+from Exceptions import IllegalPublicationIdException, IllegalStateException, \
+    IllegalValueException
+from JournalArticle import JournalArticle
+from ReferenceDataBase import ReferenceDataBase
+import os
+import shutil
+import tempfile
+import unittest
+
+class SnapshotReferenceDataBaseTest(unittest.TestCase):
+    """Unit Test for SnapshotReferenceDataBase"""
+
+    _authors = ["Wang, Bo", "De Coster, Jeroen", "Wevers, Martine"]
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "references.snapshot")
+        dataBase = ReferenceDataBase()
+        self.article = JournalArticle("Gas leak rate study of MEMS",
+                                      self._authors, "journal of MEMS", 123,
+                                      1990)
+        self.book = Book("Packaging of MEMS", ["Wang, Bo", "Witvrouw, Ann"],
+                         2012, "Springer")
+        self.paper = ConferencePaper("Thin film getters", ["Mao, Shengping"],
+                                     2014, "Transducers")
+        dataBase.addPublications([self.article, self.book, self.paper])
+        dataBase.addCitations([(self.book.id, self.article.id),
+                               (self.paper.id, self.book.id)])
+        dataBase.saveSnapshot(self.path)
+        self.snapshot = ReferenceDataBase.openSnapshot(self.path)
+
+    def tearDown(self):
+        self.snapshot.close()
+        shutil.rmtree(self.directory)
+
+    def testPublications(self):
+        self.assertEqual(3, self.snapshot.getPublicationCount())
+        self.assertEqual(2, self.snapshot.getCitationCount())
+        article = self.snapshot.getPublicationWithID(self.article.id)
+        self.assertTrue(article.isTheSameAs(self.article))
+        self.assertEqual("journal of MEMS", article.journal)
+        self.assertEqual(123, article.issueNumber)
+        self.assertTrue(article is
+                        self.snapshot.getPublicationWithID(self.article.id))
+        book = self.snapshot.getPublicationWithID(self.book.id)
+        self.assertEqual("Springer", book.publisher)
+        self.assertEqual(set([book]), article.getAllCitedBy())
+        self.assertRaises(IllegalPublicationIdException,
+                          self.snapshot.getPublicationWithID, 42)
+
+    def testQueries(self):
+        ids = lambda publications: set(publication.id
+                                       for publication in publications)
+        self.assertEqual(set([self.article.id, self.book.id]),
+                         ids(self.snapshot.findByAuthor("B. Wang")))
+        self.assertEqual(set([self.article.id, self.book.id]),
+                         ids(self.snapshot.findByTitleWord("mem")))
+        self.assertEqual(set([self.article.id]),
+                         ids(self.snapshot.findByTitleWord("leak rate")))
+        self.assertEqual(set([self.article.id, self.book.id]),
+                         ids(self.snapshot.findByTitleWord("EMS")))
+        self.assertEqual(set([self.book.id]),
+                         ids(self.snapshot.findByTitleWord("aging of ME")))
+        self.assertEqual(set([self.book.id, self.paper.id]), ids(
+            self.snapshot.findDirIndirCites(self.article.id)))
+        self.assertEqual(1, self.snapshot.countDirIndirCites(
+            self.article.id, maxDepth=1))
+        self.assertEqual(2.0, self.snapshot.authorCitationIndex("B. Wang"))
+
+    def testTitleVocabulary(self):
+        ids = lambda publications: set(publication.id
+                                       for publication in publications)
+        self.assertEqual(set([self.paper.id]),
+                         ids(self.snapshot.findByTitleWord("ett")))
+        self.assertEqual(set([self.paper.id]),
+                         ids(self.snapshot.findByTitleWord("getter")))
+        self.assertEqual(set([self.article.id]),
+                         ids(self.snapshot.findByTitleWord("rate study of")))
+        self.assertEqual(set(), ids(self.snapshot.findByTitleWord("ettr")))
+        self.assertEqual(set(), ids(self.snapshot.findByTitleWord("of leak")))
+
+    def testIssueNumberOutOfRange(self):
+        dataBase = ReferenceDataBase()
+        dataBase.addAsPublication(JournalArticle("Gas leak rate study",
+                                                 self._authors, "journal",
+                                                 2 ** 31, 1990))
+        path = os.path.join(self.directory, "large.snapshot")
+        self.assertRaises(IllegalValueException, dataBase.saveSnapshot, path)
+        self.assertFalse(os.path.exists(path))
+
+    def testReadOnly(self):
+        book = self.snapshot.getPublicationWithID(self.book.id)
+        self.assertRaises(IllegalStateException,
+                          self.snapshot.addCitation, self.paper.id,
+                          self.article.id)
+        self.assertRaises(IllegalStateException, setattr, book, "title",
+                          "Other title")
+        self.assertRaises(IllegalStateException, setattr, book, "year", 2015)
+        self.assertRaises(IllegalStateException, setattr, book, "publisher",
+                          "Other publisher")
+        self.assertEqual(self.book.title, book.title)
+        self.assertEqual(2012, book.year)
+        self.assertEqual(self.book.publisher, book.publisher)
+        self.assertEqual(set([book.id]),
+                         set(publication.id for publication in
+                             self.snapshot.findByTitleWord("packaging")))
+
+    def testInvalidFile(self):
+        with open(self.path, 'r+b') as snapshotFile:
+            snapshotFile.write(b'NOTASNAP')
+        self.assertRaises(IllegalValueException,
+                          ReferenceDataBase.openSnapshot, self.path)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+"""A table of shared strings, so equal author and venue names are stored once.
+
+..:: moduleauthor: Wang Bo <wangbomicro@gmail.com>
+"""
+
+class StringTable(object):
+    """Table handing out one shared instance per distinct string value.
+
+    Strings stay in the table for its whole lifetime, which suits the
+    recurring author, journal, publisher and conference names it is meant
+    for.
+    """
+
+    def __init__(self):
+        """Initialize this new StringTable with no strings.
+        """
+        self._strings = dict()
+
+    def intern(self, value):
+        """Return the shared instance of the given string.
+
+        Args:
+            value (str): The string to be shared. None is returned unchanged.
+        Returns:
+            (str) A string equal to the given one, the same object for every
+            call with an equal value.
+        """
+        if value is None:
+            return None
+        return self._strings.setdefault(value, value)
+
+    def __contains__(self, value):
+        return value in self._strings
+
+    def __len__(self):
+        return len(self._strings)
+
+    def clear(self):
+        """Remove all strings from this table.
+        """
+        self._strings.clear()
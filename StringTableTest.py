@@ -0,0 +1,22 @@
+"""Unit Test for StringTable
+
+..:: moduleauthors:: Wang Bo <wangbomicro@gmail.com>
+"""
+from StringTable import StringTable
+import unittest
+
+class StringTableTest(unittest.TestCase):
+    """Unit Test for StringTable"""
+
+    def testIntern(self):
+        table = StringTable()
+        first = table.intern("".join(["journal ", "of MEMS"]))
+        second = table.intern("".join(["journal of ", "MEMS"]))
+        self.assertEqual("journal of MEMS", second)
+        self.assertTrue(first is second)
+        self.assertEqual(1, len(table))
+        self.assertTrue("journal of MEMS" in table)
+        self.assertEqual(None, table.intern(None))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,336 @@
+"""A tokenized inverted index over publication titles with BM25 ranking.
+
+..:: moduleauthor: Wang Bo <wangbomicro@gmail.com>
+..:: invar: Every posting in the index refers to a publication whose title
+    contains the token it is filed under, with the right term frequency.
+"""
+import bisect
+import heapq
+import math
+import re
+
+class TitleIndex(object):
+    """Inverted index mapping lowercase title tokens to the IDs of the
+    publications whose title contains them.
+
+    Next to the postings the index keeps the sorted vocabulary, used for
+    prefix queries, the tokens by each of their substrings of up to three
+    characters, used for substring queries, and the title lengths, used for
+    BM25 ranking.
+    """
+
+    _gramLength = 3
+
+    _tokenPattern = re.compile(r'[a-z0-9]+')
+
+    def __init__(self):
+        """Initialize this new TitleIndex with no entries.
+
+        Post:
+            No title is filed in this index.
+        """
+        self._postings = dict()
+        self._vocabulary = []
+        self._grams = dict()
+        self._lengths = dict()
+        self._totalLength = 0
+
+    @classmethod
+    def tokenize(cls, text):
+        """Split the given text into lowercase alphanumeric tokens.
+
+        Args:
+            text (str): The text to be split.
+        Returns:
+            (list) The tokens of the text, in order of appearance.
+        """
+        return cls._tokenPattern.findall(text.lower())
+
+    @classmethod
+    def grams(cls, token):
+        """Return the distinct substrings of up to three characters of the
+        given token, under which it is filed for substring queries.
+
+        Args:
+            token (str): The token.
+        Returns:
+            (set) The substrings of the token.
+        """
+        return set(token[start:start + length]
+                   for length in range(1, cls._gramLength + 1)
+                   for start in range(len(token) - length + 1))
+
+    @classmethod
+    def matchGrams(cls, grams, fragment):
+        """Return the tokens containing the given fragment, from a dictionary
+        mapping each substring returned by grams to the tokens having it.
+
+        A fragment of up to three characters is looked up directly; a longer
+        one is only checked against the tokens having all its trigrams.
+
+        Args:
+            grams (dict): The tokens by substring.
+            fragment (str): The lowercase fragment.
+        Returns:
+            (set) The matching tokens.
+        """
+        length = cls._gramLength
+        if len(fragment) <= length:
+            return set(grams.get(fragment, ()))
+        candidates = sorted((grams.get(fragment[start:start + length], ())
+                             for start in range(len(fragment) - length + 1)),
+                            key=len)
+        tokens = set(candidates[0])
+        for other in candidates[1:]:
+            if not tokens:
+                break
+            tokens &= other
+        return set(token for token in tokens if fragment in token)
+
+    def add(self, publication):
+        """File the given publication under each token of its title.
+
+        Args:
+            publication (Publication): The publication to be indexed.
+        """
+        self._addTitle(publication.id, publication.title)
+
+    def addAll(self, publications):
+        """File each of the given publications under each token of its
+        title, sorting the new tokens into the vocabulary once.
+
+        Args:
+            publications (iterable): The publications to be indexed.
+        """
+        newTokens = []
+        for publication in publications:
+            self._addTitle(publication.id, publication.title, newTokens)
+        if newTokens:
+            self._vocabulary.extend(newTokens)
+            self._vocabulary.sort()
+
+    def remove(self, publication):
+        """Remove the given publication from the entries of its title tokens.
+
+        Args:
+            publication (Publication): The publication to be removed.
+        """
+        self._removeTitle(publication.id, publication.title)
+
+    def removeAll(self, publications):
+        """Remove each of the given publications from the entries of its
+        title tokens, removing the emptied tokens from the vocabulary once.
+
+        Args:
+            publications (iterable): The publications to be removed.
+        """
+        emptiedTokens = set()
+        for publication in publications:
+            self._removeTitle(publication.id, publication.title, emptiedTokens)
+        if emptiedTokens:
+            self._vocabulary[:] = [token for token in self._vocabulary
+                                   if token not in emptiedTokens]
+
+    def update(self, publication, attribute, oldValue):
+        """Re-index the given publication after one of its attributes changed.
+
+        Args:
+            publication (Publication): The changed publication.
+            attribute (str): The name of the changed attribute.
+            oldValue: The value of the attribute before the change.
+        """
+        if attribute != 'title':
+            return
+        self._removeTitle(publication.id, oldValue)
+        self.add(publication)
+
+    def clear(self):
+        """Remove all entries of this index.
+        """
+        self._postings.clear()
+        del self._vocabulary[:]
+        self._grams.clear()
+        self._lengths.clear()
+        self._totalLength = 0
+
+    def findToken(self, token):
+        """Return the IDs of all publications whose title has the given token.
+
+        Args:
+            token (str): The token to be searched, compared case-insensitively.
+        Returns:
+            (set) The IDs of the matching publications.
+        """
+        return set(self._postings.get(token.lower(), ()))
+
+    def findPrefix(self, prefix):
+        """Return the IDs of all publications whose title has a token starting
+        with the given prefix.
+
+        Args:
+            prefix (str): The prefix to be searched, compared case-insensitively.
+        Returns:
+            (set) The IDs of the matching publications.
+        """
+        ids = set()
+        for token in self.getTokensWithPrefix(prefix):
+            ids.update(self._postings[token])
+        return ids
+
+    def findContaining(self, fragment):
+        """Return the IDs of all publications whose title has a token that
+        contains the given fragment.
+
+        Args:
+            fragment (str): The fragment to be searched, compared
+                case-insensitively.
+        Returns:
+            (set) The IDs of the matching publications.
+        """
+        ids = set()
+        for token in self.getTokensContaining(fragment):
+            ids.update(self._postings[token])
+        return ids
+
+    def countToken(self, token):
+        """Return the number of publications whose title has the given token.
+
+        Args:
+            token (str): The token, compared case-insensitively.
+        """
+        return len(self._postings.get(token.lower(), ()))
+
+    def countPrefix(self, prefix):
+        """Return an upper bound of the number of publications whose title
+        has a token starting with the given prefix.
+
+        Args:
+            prefix (str): The prefix, compared case-insensitively.
+        """
+        return sum(len(self._postings[token])
+                   for token in self.getTokensWithPrefix(prefix))
+
+    def getTokensWithPrefix(self, prefix):
+        """Return all indexed tokens that start with the given prefix.
+
+        Args:
+            prefix (str): The prefix, compared case-insensitively.
+        Returns:
+            (list) The matching tokens in sorted order.
+        """
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        tokens = []
+        for token in self._vocabulary[start:]:
+            if not token.startswith(prefix):
+                break
+            tokens.append(token)
+        return tokens
+
+    def getTokensContaining(self, fragment):
+        """Return all indexed tokens that contain the given fragment.
+
+        Args:
+            fragment (str): The fragment, compared case-insensitively.
+        Returns:
+            (list) The matching tokens in sorted order.
+        """
+        return sorted(self.matchGrams(self._grams, fragment.lower()))
+
+    def search(self, query, matchAll=True, prefix=False):
+        """Return the IDs of the publications whose title matches the tokens
+        of the given query.
+
+        Args:
+            query (str): The words to be searched.
+            matchAll (bool): True to require all tokens (AND), False to
+                require any of them (OR).
+            prefix (bool): True to match tokens as prefixes of title tokens.
+        Returns:
+            (set) The IDs of the matching publications.
+        """
+        find = self.findPrefix if prefix else self.findToken
+        tokens = self.tokenize(query)
+        if not tokens:
+            return set()
+        if not matchAll:
+            ids = set()
+            for token in tokens:
+                ids.update(find(token))
+            return ids
+        # Intersect starting from the rarest token to keep the sets small.
+        postings = sorted((find(token) for token in tokens), key=len)
+        ids = postings[0]
+        for other in postings[1:]:
+            if not ids:
+                break
+            ids &= other
+        return ids
+
+    def rank(self, query, k=10, k1=1.2, b=0.75):
+        """Rank the publications matching any token of the given query by
+        their BM25 score.
+
+        Args:
+            query (str): The words to be searched.
+            k (int): The number of results to be returned.
+            k1 (float): The BM25 term frequency saturation parameter.
+            b (float): The BM25 length normalization parameter.
+        Returns:
+            (list) At most k (id, score) pairs, best match first.
+        """
+        documentCount = len(self._lengths)
+        if documentCount == 0:
+            return []
+        averageLength = float(self._totalLength) / documentCount or 1.0
+        scores = dict()
+        for token in set(self.tokenize(query)):
+            postings = self._postings.get(token)
+            if not postings:
+                continue
+            frequency = len(postings)
+            idf = math.log(1.0 + (documentCount - frequency + 0.5) /
+                           (frequency + 0.5))
+            for id, termFrequency in postings.items():
+                norm = k1 * (1.0 - b + b * self._lengths[id] / averageLength)
+                scores[id] = scores.get(id, 0.0) + \
+                    idf * termFrequency * (k1 + 1.0) / (termFrequency + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def _addTitle(self, id, title, newTokens=None):
+        tokens = self.tokenize(title)
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = dict()
+                for gram in self.grams(token):
+                    self._grams.setdefault(gram, set()).add(token)
+                if newTokens is None:
+                    bisect.insort(self._vocabulary, token)
+                else:
+                    newTokens.append(token)
+            postings[id] = postings.get(id, 0) + 1
+        self._lengths[id] = len(tokens)
+        self._totalLength += len(tokens)
+
+    def _removeTitle(self, id, title, emptiedTokens=None):
+        if id not in self._lengths:
+            return
+        for token in set(self.tokenize(title)):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(id, None)
+            if not postings:
+                del self._postings[token]
+                for gram in self.grams(token):
+                    tokens = self._grams[gram]
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._grams[gram]
+                if emptiedTokens is None:
+                    del self._vocabulary[bisect.bisect_left(self._vocabulary,
+                                                            token)]
+                else:
+                    emptiedTokens.add(token)
+        self._totalLength -= self._lengths.pop(id)
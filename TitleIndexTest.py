@@ -0,0 +1,76 @@
+"""Unit Test for TitleIndex
+
+..:: moduleauthors:: Wang Bo <wangbomicro@gmail.com>
+"""
+from Publication import Publication
+from TitleIndex import TitleIndex
+import unittest
+
+class TitleIndexTest(unittest.TestCase):
+    """Unit Test for TitleIndex"""
+
+    _authors = ["Wang, Bo"]
+
+    def setUp(self):
+        self.index = TitleIndex()
+        self.publications = []
+        for id, title in enumerate(["Gas leak rate study of MEMS",
+                                    "MEMS packaging",
+                                    "Leak, leak and leak again"]):
+            publication = Publication(title, self._authors, 2000)
+            publication.id = id
+            self.index.add(publication)
+            self.publications.append(publication)
+
+    def testTokenize(self):
+        self.assertEqual(["leak", "leak", "and", "leak", "again"],
+                         TitleIndex.tokenize("Leak, leak and leak again"))
+
+    def testSearch(self):
+        self.assertEqual(set([0, 1]), self.index.findToken("MEMS"))
+        self.assertEqual(set([1]), self.index.findPrefix("pack"))
+        self.assertEqual(set([0, 1]), self.index.findContaining("EMS"))
+        self.assertEqual(set([0]), self.index.search("mems leak"))
+        self.assertEqual(set([0, 1, 2]),
+                         self.index.search("mems leak", matchAll=False))
+        self.assertEqual(set([0, 2]), self.index.search("LEA", prefix=True))
+
+    def testTokensContaining(self):
+        self.assertEqual(["mems"], self.index.getTokensContaining("EMS"))
+        self.assertEqual(["again", "and", "gas", "leak", "packaging", "rate"],
+                         self.index.getTokensContaining("a"))
+        self.assertEqual(["packaging"],
+                         self.index.getTokensContaining("ckagi"))
+        self.assertEqual([], self.index.getTokensContaining("kagg"))
+        self.assertEqual([], self.index.getTokensContaining("leaks"))
+
+    def testRank(self):
+        self.assertEqual([2, 0],
+                         [id for id, score in self.index.rank("leak", k=5)])
+        self.assertEqual(1, len(self.index.rank("leak", k=1)))
+
+    def testUpdateAndRemove(self):
+        publication = self.publications[1]
+        oldTitle = publication.title
+        publication.title = "Wafer bonding"
+        self.index.update(publication, 'title', oldTitle)
+        self.assertEqual(set([0]), self.index.findToken("mems"))
+        self.assertEqual(set([1]), self.index.findToken("wafer"))
+        self.assertEqual(["bonding"], self.index.getTokensContaining("ondi"))
+        self.assertEqual([], self.index.getTokensContaining("kag"))
+        self.index.remove(publication)
+        self.assertEqual([], self.index.getTokensWithPrefix("waf"))
+        self.assertEqual([], self.index.getTokensContaining("ondi"))
+
+    def testRemoveAll(self):
+        self.index.removeAll(self.publications[1:])
+        self.assertEqual(set([0]), self.index.findToken("mems"))
+        self.assertEqual(set([0]), self.index.findToken("leak"))
+        self.assertEqual([], self.index.getTokensWithPrefix("again"))
+        self.assertEqual([], self.index.getTokensWithPrefix("pack"))
+        self.assertEqual(["leak"], self.index.getTokensWithPrefix("lea"))
+        self.assertEqual(["gas", "leak", "rate"],
+                         self.index.getTokensContaining("a"))
+
+if __name__ == "__main__":
+    unittest.main()
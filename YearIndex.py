@@ -0,0 +1,148 @@
+"""A sorted index from publication years to the IDs of the publications.
+
+..:: moduleauthor: Wang Bo <wangbomicro@gmail.com>
+..:: invar: The years of the index are sorted and each has at least one ID.
+"""
+import bisect
+import datetime
+
+class YearIndex(object):
+    """Index keeping the distinct publication years in a sorted list, next to
+    the set of IDs of the publications of each year.
+
+    Year ranges are found by bisecting the sorted years, so a range query
+    costs O(log years + result size), and counts per year are the sizes of
+    the sets.
+    """
+
+    def __init__(self):
+        """Initialize this new YearIndex with no entries.
+
+        Post:
+            No year is filed in this index.
+        """
+        self._years = []
+        self._ids = dict()
+
+    def add(self, publication):
+        """File the given publication under its year.
+
+        Args:
+            publication (Publication): The publication to be indexed.
+        """
+        self._addYear(publication.id, publication.year)
+
+    def addAll(self, publications):
+        """File each of the given publications under its year.
+
+        Args:
+            publications (iterable): The publications to be indexed.
+        """
+        for publication in publications:
+            self._addYear(publication.id, publication.year)
+
+    def remove(self, publication):
+        """Remove the given publication from the entry of its year.
+
+        Args:
+            publication (Publication): The publication to be removed.
+        """
+        self._removeYear(publication.id, publication.year)
+
+    def removeAll(self, publications):
+        """Remove each of the given publications from the entry of its year.
+
+        Args:
+            publications (iterable): The publications to be removed.
+        """
+        for publication in publications:
+            self.remove(publication)
+
+    def update(self, publication, attribute, oldValue):
+        """Re-index the given publication after one of its attributes changed.
+
+        Args:
+            publication (Publication): The changed publication.
+            attribute (str): The name of the changed attribute.
+            oldValue: The value of the attribute before the change.
+        """
+        if attribute != 'year':
+            return
+        self._removeYear(publication.id, oldValue)
+        self.add(publication)
+
+    def clear(self):
+        """Remove all entries of this index.
+        """
+        del self._years[:]
+        self._ids.clear()
+
+    def findRange(self, first=None, last=None):
+        """Return the IDs of the publications published from the first to the
+        last given year, both included.
+
+        Args:
+            first (int): The first year; None for no lower bound.
+            last (int): The last year; None for no upper bound.
+        Returns:
+            (set) The IDs of the matching publications.
+        """
+        ids = set()
+        for year in self._yearsInRange(first, last):
+            ids.update(self._ids[year])
+        return ids
+
+    def countRange(self, first=None, last=None):
+        """Return the number of publications published from the first to the
+        last given year, both included.
+
+        Args:
+            first (int): The first year; None for no lower bound.
+            last (int): The last year; None for no upper bound.
+        """
+        return sum(len(self._ids[year])
+                   for year in self._yearsInRange(first, last))
+
+    def getCountsPerYear(self):
+        """Return the number of publications of each year.
+
+        Returns:
+            (list) (year, count) pairs in increasing order of year.
+        """
+        return [(year, len(self._ids[year])) for year in self._years]
+
+    def findOlderThan(self, age, currentYear=None):
+        """Return the IDs of the publications more than the given number of
+        years old, as Publication.is10YearsOld counts it.
+
+        Args:
+            age (int): The number of years.
+            currentYear (int): The current year; None for today's year.
+        Returns:
+            (set) The IDs of the matching publications.
+        """
+        if currentYear is None:
+            currentYear = datetime.date.today().year
+        return self.findRange(None, currentYear - age - 1)
+
+    def _yearsInRange(self, first, last):
+        start = 0 if first is None else bisect.bisect_left(self._years, first)
+        end = len(self._years) if last is None else \
+            bisect.bisect_right(self._years, last)
+        return self._years[start:end]
+
+    def _addYear(self, id, year):
+        ids = self._ids.get(year)
+        if ids is None:
+            ids = self._ids[year] = set()
+            bisect.insort(self._years, year)
+        ids.add(id)
+
+    def _removeYear(self, id, year):
+        ids = self._ids.get(year)
+        if ids is None:
+            return
+        ids.discard(id)
+        if not ids:
+            del self._ids[year]
+            del self._years[bisect.bisect_left(self._years, year)]
@@ -0,0 +1,49 @@
+"""Unit Test for YearIndex
+
+..:: moduleauthors:: Wang Bo <wangbomicro@gmail.com>
+"""
+from Publication import Publication
+from YearIndex import YearIndex
+import unittest
+
+class YearIndexTest(unittest.TestCase):
+    """Unit Test for YearIndex"""
+
+    def setUp(self):
+        self.index = YearIndex()
+        self.publications = []
+        for id, year in enumerate([1990, 2012, 2014, 2012], 1001):
+            publication = Publication("Getters", ["Mao, Shengping"], year)
+            publication.id = id
+            self.publications.append(publication)
+        self.index.addAll(self.publications)
+
+    def testFindRange(self):
+        self.assertEqual(set([1002, 1003, 1004]),
+                         self.index.findRange(2000, 2014))
+        self.assertEqual(set([1001]), self.index.findRange(last=2011))
+        self.assertEqual(set([1003]), self.index.findRange(2013))
+        self.assertEqual(set(), self.index.findRange(2015, 2020))
+        self.assertEqual(3, self.index.countRange(2012))
+
+    def testCountsPerYear(self):
+        self.assertEqual([(1990, 1), (2012, 2), (2014, 1)],
+                         self.index.getCountsPerYear())
+
+    def testFindOlderThan(self):
+        self.assertEqual(set([1001, 1002, 1004]),
+                         self.index.findOlderThan(10, currentYear=2023))
+        self.assertEqual(set([1001]),
+                         self.index.findOlderThan(10, currentYear=2022))
+
+    def testUpdateAndRemove(self):
+        publication = self.publications[1]
+        publication.year = 1995
+        self.index.update(publication, 'year', 2012)
+        self.assertEqual([(1990, 1), (1995, 1), (2012, 1), (2014, 1)],
+                         self.index.getCountsPerYear())
+        self.index.remove(self.publications[0])
+        self.assertEqual(set([1002]), self.index.findRange(last=2000))
+
+if __name__ == "__main__":
+    unittest.main()